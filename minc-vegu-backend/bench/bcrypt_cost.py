@@ -0,0 +1,64 @@
+# bench/bcrypt_cost.py
+#
+# bcrypt checks per second per core at different cost factors, measured both
+# inline and through shared.password_pool (to confirm the pool scales across
+# cores and to pick MINC_BCRYPT_ROUNDS / MINC_BCRYPT_WORKERS).
+#
+# Usage (from minc-vegu-backend/):
+#   python -m bench.bcrypt_cost [--costs 8,10,12,14] [--seconds 3] [--threads N]
+
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+def _inline_rate(hashed: bytes, seconds: float) -> float:
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        bcrypt.checkpw(b"correct horse", hashed)
+        n += 1
+    return n / (time.perf_counter() - t0)
+
+
+def _pool_rate(hashed: str, seconds: float, threads: int) -> float:
+    from shared.password_pool import check_password, PasswordPoolBusy
+
+    def worker():
+        n, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            try:
+                check_password("correct horse", hashed)
+                n += 1
+            except PasswordPoolBusy:
+                time.sleep(0.001)
+        return n
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        total = sum(ex.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--costs", default="8,10,12,14")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--threads", type=int, default=(os.cpu_count() or 2) * 2,
+                    help="concurrent callers for the pooled measurement")
+    args = ap.parse_args()
+    cores = os.cpu_count() or 1
+
+    print(f"cores={cores} callers={args.threads}")
+    print(f"{'cost':>4} {'ms/check':>9} {'inline/s':>9} {'pooled/s':>9} {'pooled/s/core':>14}")
+    for cost in [int(c) for c in args.costs.split(",") if c.strip()]:
+        hashed = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=cost))
+        inline = _inline_rate(hashed, args.seconds)
+        pooled = _pool_rate(hashed.decode(), args.seconds, args.threads)
+        print(f"{cost:>4} {1000.0 / inline:>9.1f} {inline:>9.1f} {pooled:>9.1f} {pooled / cores:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# bench/bench_normalizers.py
+#
+# Per-document cost and retained memory of responder normalization:
+#   legacy     — the hand-written chained .get() dict builder (normalizers 1.4)
+#   one        — shared.normalizers.RESPONDER.one, one call per doc
+#   many       — RESPONDER.many over the whole page
+#   record     — RESPONDER.record().from_doc (__slots__ objects, for caches)
+#
+# Usage (from minc-vegu-backend/):
+#   python -m bench.bench_normalizers [--docs 10000] [--rounds 5]
+
+import time
+import random
+import argparse
+import tracemalloc
+
+from shared.normalizers import RESPONDER
+
+
+def legacy_normalize(doc):
+    if not doc:
+        return {}
+    return {
+        "vg_id":              doc.get("vg_id") or doc.get("id") or "",
+        "id":                 doc.get("id") or doc.get("vg_id") or "",
+        "email":              doc.get("email", ""),
+        "institution_name":   doc.get("institution_name") or doc.get("institutionName") or "",
+        "institution_id":     doc.get("institution_id") or doc.get("institutionId") or "",
+        "first_name":         doc.get("first_name") or doc.get("firstName") or "",
+        "middle_name":        doc.get("middle_name") or doc.get("middleName") or "",
+        "last_name":          doc.get("last_name") or doc.get("lastName") or "",
+        "phone":              doc.get("phone", ""),
+        "country":            doc.get("country", ""),
+        "department":         doc.get("department", ""),
+        "status":             doc.get("status", ""),
+        "timezone":           doc.get("timezone", ""),
+        "local_created_at":   doc.get("local_created_at"),
+        "created_at":         doc.get("created_at"),
+        "last_login":         doc.get("last_login"),
+        "reset_locked_until": doc.get("reset_locked_until"),
+        "updated_at":         doc.get("updated_at") or doc.get("_ts"),
+        "admin_notes":        doc.get("admin_notes", ""),
+        "_ts":                doc.get("_ts"),
+    }
+
+
+def _doc(i: int) -> dict:
+    camel = i % 2 == 0   # half the fleet still has camelCase names
+    d = {
+        "id": f"VGR{i:06d}", "vg_id": f"VGR{i:06d}", "email": f"r{i}@example.org",
+        "phone": "+1 555 0100", "country": "US", "department": "Safety", "status": "active",
+        "timezone": "America/Chicago", "created_at": "2025-01-01T00:00:00Z", "_ts": 1710000000 + i,
+        "_rid": "x", "_self": "y", "_etag": "z", "_attachments": "attachments/",
+    }
+    if camel:
+        d.update(firstName="Ada", middleName="", lastName="Lovelace", institutionName="Example U",
+                 institutionId="VGI000001")
+    else:
+        d.update(first_name="Ada", middle_name="", last_name="Lovelace", institution_name="Example U",
+                 institution_id="VGI000001")
+    if random.random() < 0.3:
+        d["admin_notes"] = "checked"
+    return d
+
+
+def _time(fn, rounds: int, n: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / n * 1e9   # ns per doc
+
+
+def _retained(fn) -> int:
+    tracemalloc.start()
+    keep = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--docs", type=int, default=10000)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+    random.seed(3)
+    docs = [_doc(i) for i in range(args.docs)]
+    Record = RESPONDER.record()
+
+    assert [legacy_normalize(d) for d in docs[:100]] == RESPONDER.many(docs[:100])
+
+    cases = [
+        ("legacy", lambda: [legacy_normalize(d) for d in docs]),
+        ("one", lambda: [RESPONDER.one(d) for d in docs]),
+        ("many", lambda: RESPONDER.many(docs)),
+        ("record", lambda: [Record.from_doc(d) for d in docs]),
+    ]
+    print(f"{args.docs} docs, best of {args.rounds}")
+    print(f"{'variant':<10}{'ns/doc':>10}{'bytes/doc':>12}")
+    for name, fn in cases:
+        ns = _time(fn, args.rounds, len(docs))
+        mem = _retained(fn) / len(docs)
+        print(f"{name:<10}{ns:>10.0f}{mem:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# bench/bench_responses.py
+#
+# Bytes on the wire and CPU per response for the shared response layer
+# (shared.http_response): stdlib json vs orjson, then identity / gzip / brotli,
+# over synthetic payloads shaped like our largest responses.
+#
+# Usage (from minc-vegu-backend/):
+#   python -m bench.bench_responses [--messages 50,200,1000] [--seconds 1]
+
+import time
+import gzip
+import random
+import string
+import argparse
+
+from shared.http_response import (
+    strip_internal, _stdlib_dumps, orjson, brotli, GZIP_LEVEL, BROTLI_QUALITY,
+)
+
+
+def _word(n=8):
+    return "".join(random.choice(string.ascii_lowercase) for _ in range(n))
+
+
+def _cosmos_meta(i: int) -> dict:
+    return {"_rid": f"xjsFAKE{i:08d}==", "_self": f"dbs/x==/colls/y==/docs/{i}==/",
+            "_etag": f"\"{i:08x}-0000-0100-0000-65f00000\"", "_attachments": "attachments/",
+            "_ts": 1710000000 + i}
+
+
+def thread_payload(n: int) -> dict:
+    """vegu-complaint-messages: full message docs (SELECT *)."""
+    items = []
+    for i in range(n):
+        items.append(dict({
+            "id": f"msg-{i}", "complaint_vg_id": "VGC000123",
+            "sender_type": random.choice(["user", "responder", "system"]),
+            "message_type": "text",
+            "content": " ".join(_word(random.randint(3, 10)) for _ in range(random.randint(5, 60))),
+            "timestamp": f"2025-01-{1 + i % 28:02d}T10:{i % 60:02d}:00Z",
+        }, **_cosmos_meta(i)))
+    return {"success": True, "count": n, "items": items}
+
+
+def search_payload(n: int) -> dict:
+    """vegu-users-search style rows."""
+    return {"success": True, "items": [{
+        "id": f"VGU{i:06d}", "vg_id": f"VGU{i:06d}", "first_name": _word(6).title(),
+        "middle_name": "", "last_name": _word(8).title(), "email": f"{_word()}@example.org",
+        "institution_name": "Example University", "status": "active", "timezone": "America/New_York",
+    } for i in range(n)]}
+
+
+def _rate(fn, seconds: float) -> float:
+    """Mean microseconds per call."""
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        fn()
+        n += 1
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--messages", default="50,200,1000")
+    ap.add_argument("--seconds", type=float, default=1.0)
+    args = ap.parse_args()
+    random.seed(7)
+
+    encoders = [("json", _stdlib_dumps)]
+    if orjson is not None:
+        encoders.append(("orjson", lambda o: orjson.dumps(o, option=orjson.OPT_NON_STR_KEYS)))
+    else:
+        print("orjson not installed — only stdlib json measured")
+    codecs = [("identity", lambda b: b), ("gzip", lambda b: gzip.compress(b, compresslevel=GZIP_LEVEL))]
+    if brotli is not None:
+        codecs.append(("br", lambda b: brotli.compress(b, quality=BROTLI_QUALITY)))
+    else:
+        print("brotli not installed — br skipped")
+
+    print(f"{'payload':<22}{'encoder':<9}{'codec':<10}{'bytes':>10}{'serialize us':>14}{'compress us':>13}{'total us':>10}")
+    cases = []
+    for n in [int(x) for x in args.messages.split(",") if x.strip()]:
+        cases.append((f"thread n={n}", thread_payload(n)))
+    cases.append(("search n=50", search_payload(50)))   # search routes cap at 20-50 rows
+
+    for label, payload in cases:
+        raw_bytes = len(_stdlib_dumps(payload))
+        for ename, enc in encoders:
+            ser_us = _rate(lambda: enc(strip_internal(payload)), args.seconds)
+            data = enc(strip_internal(payload))
+            for cname, comp in codecs:
+                comp_us = _rate(lambda: comp(data), args.seconds) if cname != "identity" else 0.0
+                print(f"{label:<22}{ename:<9}{cname:<10}{len(comp(data)):>10}{ser_us:>14.0f}{comp_us:>13.0f}{ser_us + comp_us:>10.0f}")
+        print(f"{'':<22}(unstripped stdlib json: {raw_bytes} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+# bench/datagen.py
+#
+# Seedable synthetic data at production-like shapes and volumes.
+# - institutions across countries (PK /country), sized by a Zipf-like weight
+# - responders partitioned by institution_id, ~1/3 stored with snake_case
+#   names and some with optional fields missing (the normalizers' job)
+# - user-profiles (PK /id), complaints with threat levels/status skewed toward
+#   open/low, vgcrypt complaint → user mappings
+# - messages with heavy-tailed thread lengths (Pareto, capped): most threads
+#   have a handful of messages, a few have hundreds
+# - MinC users with real bcrypt hashes: a small pool of salted hashes of
+#   BENCH_PASSWORD is computed once and reused (hashing millions is not the point);
+#   the salts come from the seeded RNG, so the hashes are reproducible too
+# Documents stream out of one generator (nothing is held in memory), so the
+# same seed gives the same data whatever the sink.
+#
+# Sinks:
+#   fake      bench.fake_cosmos.FakeCosmos (load_into(); used by bench.load --profile).
+#             The fake evaluates queries in Python: from "medium" up, latency
+#             mostly measures scan volume — RU per route is the number to watch
+#   jsonl     one <db>.<container>.jsonl per container (orjson when installed)
+#   emulator  local Cosmos emulator / any account: creates db + containers with
+#             bench.fake_cosmos.PK_PATHS, then bulk-writes — transactional
+#             batches of up to 100 per partition, single upserts otherwise,
+#             --concurrency in flight
+#
+# Usage (from minc-vegu-backend/):
+#   python -m bench.datagen --profile large --sink jsonl --out /tmp/minc-data
+#   python -m bench.datagen --profile medium --sink emulator \
+#          [--endpoint https://localhost:8081/] [--key …] [--insecure]
+#   python -m bench.datagen --profile small --scale 3 --only complaints,messages --sink jsonl --out d/
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+
+    def _line(doc) -> bytes:
+        return orjson.dumps(doc) + b"\n"
+except ImportError:   # stdlib fallback
+    def _line(doc) -> bytes:
+        return (json.dumps(doc, separators=(",", ":")) + "\n").encode()
+
+BENCH_PASSWORD = "Bench-Passw0rd!"   # bench.scenarios logs in with it
+VEGU_DB, MINC_DB = "vegu3-main", "minc"
+
+# per-entity counts; messages are drawn per complaint (mean ≈ 7, capped)
+PROFILES: Dict[str, Dict[str, int]] = {
+    "small":  {"institutions": 50, "responders": 500, "users": 1_000, "complaints": 500, "minc": 200},
+    "medium": {"institutions": 400, "responders": 8_000, "users": 40_000, "complaints": 20_000, "minc": 500},
+    "large":  {"institutions": 2_000, "responders": 40_000, "users": 300_000, "complaints": 200_000, "minc": 2_000},
+    "xl":     {"institutions": 5_000, "responders": 150_000, "users": 1_500_000, "complaints": 1_000_000, "minc": 5_000},
+}
+MAX_THREAD = 400
+PARETO_ALPHA = 1.3
+HASH_POOL = 16
+
+COUNTRIES = (("US", 40), ("IN", 20), ("GB", 12), ("CA", 10), ("AU", 6), ("NG", 5), ("DE", 4), ("BR", 3))
+CITIES = {"US": ("Austin", "Denver", "Boston", "Atlanta"), "IN": ("Pune", "Chennai", "Delhi"),
+          "GB": ("Leeds", "Bristol", "London"), "CA": ("Toronto", "Calgary"), "AU": ("Perth", "Sydney"),
+          "NG": ("Lagos", "Abuja"), "DE": ("Berlin", "Bonn"), "BR": ("Recife", "Curitiba")}
+TZ = {"US": "America/Chicago", "IN": "Asia/Kolkata", "GB": "Europe/London", "CA": "America/Toronto",
+      "AU": "Australia/Perth", "NG": "Africa/Lagos", "DE": "Europe/Berlin", "BR": "America/Sao_Paulo"}
+FIRST = ("Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances", "Ken", "Margaret", "Tim",
+         "Radia", "Leslie", "Shafi", "Yukihiro", "Guido", "Anita", "Sophie", "John", "Mary", "Chidi",
+         "Priya", "Arjun", "Mei", "Olu", "Lars", "Ines", "Tomas", "Fatima", "Diego", "Hana")
+LAST = ("Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen", "Thompson", "Hamilton",
+        "Berners", "Perlman", "Lamport", "Goldwasser", "Matsumoto", "Rossum", "Borg", "Wilson", "Okafor",
+        "Sharma", "Iyer", "Chen", "Adeyemi", "Nilsen", "Garcia", "Novak", "Haddad", "Silva", "Kim")
+WORDS = ("harassment", "report", "campus", "safety", "urgent", "follow", "incident", "library",
+         "parking", "dorm", "threat", "message", "photo", "night", "class", "bullying", "online",
+         "stalking", "party", "lab", "coach", "team", "bus", "gym", "hallway", "video", "account")
+INST_KIND = ("University", "College", "Institute", "Academy", "School")
+THREAT_LEVELS = (("low", 50), ("medium", 30), ("high", 15), ("critical", 5))
+THREAT_STATUS = (("open", 45), ("in_review", 25), ("resolved", 30))
+USER_STATUS = (("active", 85), ("pending", 6), ("suspended", 4), ("under investigation", 3), ("expired", 2))
+
+
+def _weighted(pairs) -> Tuple[List[Any], List[float]]:
+    vals = [v for v, _ in pairs]
+    cum, t = [], 0.0
+    for _, w in pairs:
+        t += w
+        cum.append(t)
+    return vals, cum
+
+
+_COUNTRY = _weighted(COUNTRIES)
+_LEVEL = _weighted(THREAT_LEVELS)
+_STATUS = _weighted(THREAT_STATUS)
+_USTATUS = _weighted(USER_STATUS)
+
+
+def _pick(rng: random.Random, table) -> Any:
+    vals, cum = table
+    return rng.choices(vals, cum_weights=cum)[0]
+
+
+# ----- ids (deterministic from the index, so pools need no stored docs) -----
+
+def inst_id(i: int) -> str:
+    return f"VGI{i:06d}"
+
+
+def responder_id(i: int) -> str:
+    return f"VGR{i:07d}"
+
+
+def user_id(i: int) -> str:
+    return f"VGU{i:07d}"
+
+
+def complaint_id(i: int) -> str:
+    return f"VGC{i:07d}"
+
+
+def minc_id(i: int) -> str:
+    # MM + yy + letter + 5 digits (shared.auth.MINC_RE) → 2.6M ids per year
+    return f"MM25{chr(65 + i // 100_000)}{i % 100_000:05d}"
+
+
+def minc_email(i: int) -> str:
+    return f"admin{i}@minc.example"
+
+
+def counts_for(profile: str, scale: float = 1.0) -> Dict[str, int]:
+    return {k: max(1, int(v * scale)) for k, v in PROFILES[profile].items()}
+
+
+def id_pools(counts: Dict[str, int], cap: int = 200_000) -> Dict[str, List[str]]:
+    """Id lists for the load scenarios (at most `cap` per entity)."""
+    return {
+        "institutions": [inst_id(i) for i in range(min(cap, counts["institutions"]))],
+        "responders": [responder_id(i) for i in range(min(cap, counts["responders"]))],
+        "users": [user_id(i) for i in range(min(cap, counts["users"]))],
+        "complaints": [complaint_id(i) for i in range(min(cap, counts["complaints"]))],
+        "minc": [minc_id(i) for i in range(min(cap, counts["minc"]))],
+    }
+
+
+# ----- generator -----
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    cum, t = [], 0.0
+    for k in range(1, n + 1):
+        t += 1.0 / (k ** s)
+        cum.append(t)
+    return cum
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+_B64 = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_BCRYPT_B64 = b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def _bcrypt_salt(rng: random.Random, rounds: int) -> bytes:
+    """bcrypt.gensalt() from `rng` instead of os.urandom (same format)."""
+    import base64
+    raw = bytes(rng.getrandbits(8) for _ in range(16))
+    enc = base64.b64encode(raw).rstrip(b"=").translate(bytes.maketrans(_B64, _BCRYPT_B64))
+    return b"$2b$%02d$" % rounds + enc
+
+
+def _bcrypt_pool(rounds: int, n: int, seed: int = 7) -> List[str]:
+    import bcrypt
+    pw = BENCH_PASSWORD.encode()
+    rng = random.Random(f"{seed}:bcrypt")
+    return [bcrypt.hashpw(pw, _bcrypt_salt(rng, rounds)).decode() for _ in range(n)]
+
+
+def documents(counts: Dict[str, int], seed: int = 7, bcrypt_rounds: int = 12,
+              only: Optional[set] = None, now: Optional[float] = None) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Yield (db, container, doc). Entities come out in dependency order and
+    documents of one partition are contiguous where the shape allows
+    (responders per institution, messages per complaint).
+    """
+    now = now or datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+    day = 86400.0
+    want = (lambda name: True) if not only else (lambda name: name in only)
+
+    n_inst = counts["institutions"]
+    inst_rng = random.Random(f"{seed}:institutions")
+    inst_country = [_pick(inst_rng, _COUNTRY) for _ in range(n_inst)]
+    inst_name = [f"{inst_rng.choice(LAST)} {inst_rng.choice(INST_KIND)} of {inst_rng.choice(CITIES[c])}"
+                 for c in inst_country]
+    inst_weight = _zipf_weights(n_inst)
+
+    if want("institutions"):
+        for i in range(n_inst):
+            c = inst_country[i]
+            created = now - inst_rng.uniform(200, 2000) * day
+            doc = {
+                "id": inst_id(i), "vg_id": inst_id(i), "type": "institution", "name": inst_name[i],
+                "country": c, "country_code": c, "city": inst_rng.choice(CITIES[c]), "timezone": TZ[c],
+                "complaint_email": f"safety@inst{i}.example.edu", "status": "active" if inst_rng.random() < 0.93 else "suspended",
+                "plan_type": inst_rng.choice(("basic", "pro", "enterprise")),
+                "institution_type": inst_rng.choice(("university", "college", "school")),
+                "institution_category": inst_rng.choice(("public", "private")),
+                "max_responders": inst_rng.choice((10, 25, 50, 100)),
+                "created_at": _iso(created), "updated_at": _iso(created + inst_rng.uniform(0, 190) * day),
+            }
+            if inst_rng.random() < 0.4:
+                doc["website_url"] = f"https://inst{i}.example.edu"
+            yield VEGU_DB, "institutions", doc
+
+    # responders: grouped by institution (one partition after another), Zipf-sized
+    if want("responders"):
+        rng = random.Random(f"{seed}:responders")
+        per_inst = [0] * n_inst
+        for _ in range(counts["responders"]):
+            per_inst[rng.choices(range(n_inst), cum_weights=inst_weight)[0]] += 1
+        r = 0
+        for i in range(n_inst):
+            for _ in range(per_inst[i]):
+                first, last = rng.choice(FIRST), rng.choice(LAST)
+                doc = {"id": responder_id(r), "vg_id": responder_id(r), "type": "responder",
+                       "institution_id": inst_id(i), "institution_name": inst_name[i],
+                       "email": f"{first}.{last}.{r}@inst{i}.example.edu".lower(),
+                       "status": "active" if rng.random() < 0.9 else rng.choice(("pending", "suspended", "locked")),
+                       "country": inst_country[i], "timezone": TZ[inst_country[i]],
+                       "created_at": _iso(now - rng.uniform(1, 900) * day)}
+                middle = rng.choice(FIRST) if rng.random() < 0.2 else ""
+                if rng.random() < 0.33:
+                    doc.update(first_name=first, middle_name=middle, last_name=last)
+                else:
+                    doc.update(firstName=first, lastName=last)
+                    if middle or rng.random() < 0.5:
+                        doc["middleName"] = middle
+                if rng.random() < 0.6:
+                    doc["phone"] = f"+1 555 {rng.randrange(10_000):04d}"
+                if rng.random() < 0.3:
+                    doc["department"] = rng.choice(("Safety", "Student Affairs", "Counseling", "Security"))
+                yield VEGU_DB, "responders", doc
+                r += 1
+
+    n_users = counts["users"]
+    if want("users"):
+        rng = random.Random(f"{seed}:users")
+        for u in range(n_users):
+            first, last = rng.choice(FIRST), rng.choice(LAST)
+            i = rng.choices(range(n_inst), cum_weights=inst_weight)[0] if n_inst < 5000 else rng.randrange(n_inst)
+            doc = {"id": user_id(u), "vg_id": user_id(u), "type": "user_profile",
+                   "first_name": first, "middle_name": "", "last_name": last,
+                   "email": f"{first}.{last}{u}@mail.example".lower(), "status": _pick(rng, _USTATUS),
+                   "institution_name": inst_name[i], "institution_id": inst_id(i),
+                   "timezone": TZ[inst_country[i]], "country": inst_country[i],
+                   "created_at": _iso(now - rng.uniform(1, 700) * day)}
+            if rng.random() < 0.5:
+                doc["dob"] = f"{rng.randint(1995, 2008)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            yield VEGU_DB, "user-profiles", doc
+
+    # complaints, each followed by its vgcrypt mapping and its message thread
+    if want("complaints") or want("messages") or want("vgcrypt"):
+        rng = random.Random(f"{seed}:complaints")
+        for c in range(counts["complaints"]):
+            i = rng.choices(range(n_inst), cum_weights=inst_weight)[0] if n_inst < 5000 else rng.randrange(n_inst)
+            vg = complaint_id(c)
+            created = now - rng.expovariate(1 / 60.0) * day
+            subject = " ".join(rng.sample(WORDS, rng.randint(2, 5)))
+            n_msgs = min(MAX_THREAD, int(rng.paretovariate(PARETO_ALPHA) * 2.5))
+            last_ts = created + n_msgs * rng.uniform(60, 3600)
+            if want("complaints"):
+                yield VEGU_DB, "complaints", {
+                    "id": vg, "vg_id": vg, "type": "complaint", "institution_id": inst_id(i),
+                    "institutionId": inst_id(i), "institution_name": inst_name[i],
+                    "subject": subject, "display_subject": subject.capitalize(),
+                    "threat_level": _pick(rng, _LEVEL), "threat_status": _pick(rng, _STATUS),
+                    "created_at": _iso(created), "last_updated": _iso(last_ts), "message_count": n_msgs,
+                }
+            user = rng.randrange(n_users)
+            if want("vgcrypt"):
+                yield VEGU_DB, "vgcrypt", {"id": f"map-{vg}", "complaint_vg_id": vg, "user_vg_id": user_id(user)}
+            if want("messages"):
+                ts = created
+                for j in range(n_msgs):
+                    ts += rng.expovariate(1 / 1800.0)
+                    sender = "user" if j == 0 or rng.random() < 0.55 else rng.choice(("responder", "system"))
+                    yield VEGU_DB, "messages", {
+                        "id": f"{vg}-m{j:04d}", "complaint_vg_id": vg, "sender_type": sender,
+                        "message_type": "text" if rng.random() < 0.95 else "image",
+                        "content": " ".join(rng.choices(WORDS, k=rng.randint(3, 40))),
+                        "timestamp": _iso(ts),
+                    }
+
+    if want("minc"):
+        rng = random.Random(f"{seed}:minc")
+        hashes = _bcrypt_pool(bcrypt_rounds, min(HASH_POOL, counts["minc"]), seed)
+        for m in range(counts["minc"]):
+            yield MINC_DB, "minc_users", {
+                "id": minc_id(m), "mincId": minc_id(m), "email": minc_email(m), "domain": "minc.example",
+                "status": "active", "roles": ["admin"] if rng.random() < 0.3 else ["reviewer"],
+                "passwordHash": hashes[m % len(hashes)], "failedLoginCount": 0,
+                "firstName": rng.choice(FIRST), "lastName": rng.choice(LAST),
+                "createdAt": _iso(now - rng.uniform(1, 900) * day),
+            }
+
+
+# ----- sinks -----
+
+def load_into(cosmos, counts: Dict[str, int], seed: int = 7, bcrypt_rounds: int = 12,
+              only: Optional[set] = None, chunk: int = 5000) -> Dict[str, int]:
+    """Stream into a bench.fake_cosmos.FakeCosmos; returns docs per container."""
+    buf: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+    written: Dict[str, int] = defaultdict(int)
+
+    def flush(key):
+        written[key[1]] += cosmos.container(*key).seed(buf[key])
+        buf[key] = []
+
+    for db, name, doc in documents(counts, seed, bcrypt_rounds, only):
+        b = buf[(db, name)]
+        b.append(doc)
+        if len(b) >= chunk:
+            flush((db, name))
+    for key in list(buf):
+        if buf[key]:
+            flush(key)
+    return dict(written)
+
+
+def write_jsonl(out_dir: str, counts: Dict[str, int], seed: int = 7, bcrypt_rounds: int = 12,
+                only: Optional[set] = None) -> Dict[str, int]:
+    os.makedirs(out_dir, exist_ok=True)
+    files: Dict[Tuple[str, str], Any] = {}
+    written: Dict[str, int] = defaultdict(int)
+    try:
+        for db, name, doc in documents(counts, seed, bcrypt_rounds, only):
+            f = files.get((db, name))
+            if f is None:
+                f = files[(db, name)] = open(os.path.join(out_dir, f"{db}.{name}.jsonl"), "wb", buffering=1 << 20)
+            f.write(_line(doc))
+            written[name] += 1
+    finally:
+        for f in files.values():
+            f.close()
+    return dict(written)
+
+
+EMULATOR_ENDPOINT = "https://localhost:8081/"
+# the emulator's fixed, publicly documented key
+EMULATOR_KEY = "C2y6yDjf5/R+ob0N8A7Cgv30VRDJIWEHLM+4QDU5DE2nQ9nDuVTqobD4b8mGGyPMbIZnqyMsEcaGQy67XIw/Jw=="
+BATCH_MAX = 100
+
+
+def write_emulator(counts: Dict[str, int], seed: int = 7, bcrypt_rounds: int = 12, only: Optional[set] = None,
+                   endpoint: str = EMULATOR_ENDPOINT, key: str = EMULATOR_KEY, insecure: bool = False,
+                   concurrency: int = 16, throughput: int = 4000) -> Dict[str, int]:
+    """
+    Bulk load into a real account (emulator by default). Consecutive docs of
+    one partition go out as transactional batches; the rest as upserts.
+    """
+    from azure.cosmos import CosmosClient, PartitionKey
+    from bench.fake_cosmos import PK_PATHS
+
+    kw = {"connection_verify": False} if insecure else {}
+    client = CosmosClient(endpoint, credential=key, **kw)
+    containers: Dict[Tuple[str, str], Any] = {}
+
+    def container(db: str, name: str):
+        c = containers.get((db, name))
+        if c is None:
+            d = client.create_database_if_not_exists(db)
+            c = containers[(db, name)] = d.create_container_if_not_exists(
+                id=name, partition_key=PartitionKey(path=PK_PATHS.get(name, "/id")), offer_throughput=throughput)
+        return c
+
+    written: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    errors: List[BaseException] = []
+
+    def send(c, name, pk, docs):
+        try:
+            if len(docs) == 1:
+                c.upsert_item(docs[0])
+            else:
+                c.execute_item_batch([("upsert", (d,)) for d in docs], partition_key=pk)
+            with lock:
+                written[name] += len(docs)
+        except BaseException as e:   # surfaced after the pool drains
+            errors.append(e)
+        finally:
+            slots.release()
+
+    def submit(pool, key, pk, docs):
+        slots.acquire()
+        pool.submit(send, container(*key), key[1], pk, docs)
+
+    pk_field = {name: path.strip("/") for name, path in PK_PATHS.items()}
+    pending_key, pending_pk, pending = None, None, []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for db, name, doc in documents(counts, seed, bcrypt_rounds, only):
+            if errors:
+                break
+            pk = doc.get(pk_field.get(name, "id"))
+            if (db, name) != pending_key or pk != pending_pk or len(pending) >= BATCH_MAX:
+                if pending:
+                    submit(pool, pending_key, pending_pk, pending)
+                pending_key, pending_pk, pending = (db, name), pk, []
+            pending.append(doc)
+        if pending and not errors:
+            submit(pool, pending_key, pending_pk, pending)
+    if errors:
+        raise errors[0]
+    return dict(written)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Synthetic MinC/VEGU data at production-like volumes.")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply the profile's counts")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--only", help="comma list: institutions,responders,users,complaints,messages,vgcrypt,minc")
+    ap.add_argument("--bcrypt-rounds", type=int, default=int(os.getenv("MINC_BCRYPT_ROUNDS", 12)))
+    ap.add_argument("--sink", choices=("jsonl", "emulator"), default="jsonl")
+    ap.add_argument("--out", default="bench-data")
+    ap.add_argument("--endpoint", default=os.getenv("COSMOS_EMULATOR_ENDPOINT", EMULATOR_ENDPOINT))
+    ap.add_argument("--key", default=os.getenv("COSMOS_EMULATOR_KEY", EMULATOR_KEY))
+    ap.add_argument("--insecure", action="store_true", help="skip TLS verification (emulator self-signed cert)")
+    ap.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args(argv)
+
+    counts = counts_for(args.profile, args.scale)
+    only = set(args.only.split(",")) if args.only else None
+    print(f"profile={args.profile} scale={args.scale} seed={args.seed} counts={counts}", file=sys.stderr)
+    t0 = time.perf_counter()
+    if args.sink == "jsonl":
+        written = write_jsonl(args.out, counts, args.seed, args.bcrypt_rounds, only)
+    else:
+        written = write_emulator(counts, args.seed, args.bcrypt_rounds, only, endpoint=args.endpoint,
+                                 key=args.key, insecure=args.insecure, concurrency=args.concurrency)
+    secs = time.perf_counter() - t0
+    total = sum(written.values())
+    for name, n in sorted(written.items()):
+        print(f"  {name:<16}{n:>12,}")
+    print(f"{total:,} docs in {secs:.1f}s ({total / secs:,.0f} docs/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,937 @@
+# bench/fake_cosmos.py
+#
+# In-memory stand-in for the azure-cosmos surface this app uses, for load
+# benchmarks without a Cosmos account.
+# - FakeCosmos → get_database_client() → get_container_client(): one
+#   FakeContainer per (db, name), shared like the real proxies
+# - containers: read_item / create_item / upsert_item / replace_item /
+#   patch_item / delete_item / execute_item_batch / query_items (+ by_page),
+#   client_connection.last_response_headers and response_hook, ETags and
+#   If-Match / If-None-Match, so shared.instrumentation sees real-looking headers
+# - SQL: the subset the handlers emit — SELECT [DISTINCT] [TOP n|@p]
+#   (* | VALUE expr | VALUE COUNT(1) | a, b [AS x] | VALUE {…}) FROM alias
+#   [WHERE …] [ORDER BY …] [OFFSET … LIMIT …]; AND/OR/NOT, comparisons,
+#   CONTAINS/STARTSWITH/ENDSWITH (with ignore-case flag), LOWER/UPPER,
+#   IS_DEFINED/IS_NULL, ARRAY_CONTAINS, IIF, LENGTH; Cosmos undefined semantics
+# - latency: every request (point op or query page) sleeps
+#   latency_ms ± jitter_ms; RU charges follow a rough model (1 RU point read,
+#   ~6 RU writes, queries 2.5 RU + a per-scanned-document share), good for
+#   relative comparisons only
+# - regions: regions={"West Europe": 0, "North Europe": 6} adds per-region
+#   latency; the first is the write region and the first preferred one, and reads
+#   honor excluded_locations like the SDK (shared.regions hedging);
+#   tail_rate / tail_ms add an occasional slow request anywhere
+# - throttling: throttle_rate of requests (point ops, query pages) fail with
+#   429 + x-ms-retry-after-ms before doing anything, like a saturated partition
+#
+# Evaluation runs in-process, so its CPU competes with the handlers under
+# test; keep seeded datasets to tens of thousands of docs per container when
+# the numbers should reflect the app rather than the fake.
+#
+# Usage:
+#   from bench.fake_cosmos import FakeCosmos, install
+#   cosmos = FakeCosmos(latency_ms=4, jitter_ms=1)
+#   install(cosmos)          # before importing function_app
+
+import re
+import json
+import time
+import uuid
+import random
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from azure.core import MatchConditions
+from azure.cosmos import exceptions as cx
+
+# partition key path per container name (anything else: /id)
+PK_PATHS = {
+    "minc_users": "/domain",
+    "minc_otp": "/email",
+    "minc_otp_log": "/email",
+    "minc_audit_log": "/subject_id",
+    "institutions": "/country",
+    "responders": "/institution_id",
+    "user-profiles": "/id",
+    "complaints": "/institution_id",
+    "messages": "/complaint_vg_id",
+    "vgcrypt": "/complaint_vg_id",
+}
+
+DEFAULT_PAGE_SIZE = 100
+
+
+class _Undefined:
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "undefined"
+
+
+UNDEF = _Undefined()
+
+
+def _clone(v):
+    # handlers mutate what they read (doc.update(...)); never hand out stored objects
+    if isinstance(v, dict):
+        return {k: _clone(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_clone(x) for x in v]
+    return v
+
+
+# ===== SQL subset =====
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<str>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<num>-?\d+(?:\.\d+)?)
+    | (?P<param>@\w+)
+    | (?P<ident>[A-Za-z_]\w*)
+    | (?P<op><=|>=|!=|<>|=|<|>|\(|\)|,|\.|\[|\]|\{|\}|:|\*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"SELECT", "DISTINCT", "TOP", "VALUE", "FROM", "WHERE", "AND", "OR", "NOT", "ORDER",
+             "BY", "ASC", "DESC", "OFFSET", "LIMIT", "AS", "TRUE", "FALSE", "NULL", "UNDEFINED"}
+
+
+def _tokenize(sql: str) -> List[Tuple[str, Any]]:
+    out, pos, sql = [], 0, sql.strip()
+    while pos < len(sql):
+        m = _TOKEN.match(sql, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"fake_cosmos: cannot parse near {sql[pos:pos + 30]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == "str":
+            out.append(("lit", json.loads('"' + text[1:-1].replace('"', '\\"').replace("\\'", "'") + '"')))
+        elif kind == "num":
+            out.append(("lit", float(text) if "." in text else int(text)))
+        elif kind == "ident" and text.upper() in _KEYWORDS:
+            out.append(("kw", text.upper()))
+        else:
+            out.append((kind, text))
+    out.append(("end", None))
+    return out
+
+
+def _num(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _cmp(op: str, a, b):
+    if a is UNDEF or b is UNDEF:
+        return UNDEF
+    if op in ("=", "!="):
+        same = type(a) is type(b) or (_num(a) and _num(b))
+        eq = same and a == b
+        return eq if op == "=" else (not eq if same else UNDEF)
+    if not ((_num(a) and _num(b)) or (isinstance(a, str) and isinstance(b, str))):
+        return UNDEF
+    return {"<": a < b, ">": a > b, "<=": a <= b, ">=": a >= b}[op]
+
+
+def _str_fn(fn):
+    def call(s, sub, ci=False):
+        if not isinstance(s, str) or not isinstance(sub, str):
+            return UNDEF
+        if ci is True:
+            s, sub = s.lower(), sub.lower()
+        return fn(s, sub)
+    return call
+
+
+def _array_contains(arr, v, partial=False):
+    if not isinstance(arr, list):
+        return UNDEF
+    if partial is True and isinstance(v, dict):
+        return any(isinstance(x, dict) and all(x.get(k, UNDEF) == w for k, w in v.items()) for x in arr)
+    return v in arr
+
+
+_FUNCS: Dict[str, Callable] = {
+    "CONTAINS": _str_fn(lambda s, sub: sub in s),
+    "STARTSWITH": _str_fn(lambda s, sub: s.startswith(sub)),
+    "ENDSWITH": _str_fn(lambda s, sub: s.endswith(sub)),
+    "LOWER": lambda s: s.lower() if isinstance(s, str) else UNDEF,
+    "UPPER": lambda s: s.upper() if isinstance(s, str) else UNDEF,
+    "LENGTH": lambda s: len(s) if isinstance(s, str) else UNDEF,
+    "IS_DEFINED": lambda v: v is not UNDEF,
+    "IS_NULL": lambda v: v is None,
+    "IS_STRING": lambda v: isinstance(v, str),
+    "ARRAY_CONTAINS": _array_contains,
+    "ARRAY_LENGTH": lambda a: len(a) if isinstance(a, list) else UNDEF,
+}
+
+
+class _Query:
+    """Compiled SELECT: closures over (doc, params)."""
+
+    def __init__(self, sql: str):
+        self.toks = _tokenize(sql)
+        self.i = 0
+        self.alias = "c"
+        self.distinct = False
+        self.top = None            # fn(params) → int
+        self.count = False         # SELECT VALUE COUNT(1)
+        self.value = None          # fn(doc, params) for VALUE
+        self.columns = None        # [(name, fn)] or None for *
+        self.where = None
+        self.order: List[Tuple[Callable, bool]] = []
+        self.offset = self.limit = None
+        self._parse()
+
+    # --- token helpers ---
+    def _peek(self, k=0):
+        return self.toks[self.i + k]
+
+    def _next(self):
+        t = self.toks[self.i]
+        self.i += 1
+        return t
+
+    def _accept(self, kind, text=None):
+        t = self._peek()
+        if t[0] == kind and (text is None or t[1] == text):
+            self.i += 1
+            return True
+        return False
+
+    def _expect(self, kind, text=None):
+        if not self._accept(kind, text):
+            raise ValueError(f"fake_cosmos: expected {text or kind}, got {self._peek()[1]!r}")
+
+    # --- statement ---
+    def _parse(self):
+        self._expect("kw", "SELECT")
+        if self._accept("kw", "DISTINCT"):
+            self.distinct = True
+        if self._accept("kw", "TOP"):
+            t = self._next()
+            self.top = (lambda p, v=t[1]: int(v)) if t[0] == "lit" else (lambda p, n=t[1]: int(p[n]))
+        # paths are taken relative to the FROM alias (its name is not checked)
+        if self._accept("kw", "VALUE"):
+            if self._peek()[0] == "ident" and self._peek()[1].upper() == "COUNT" and self._peek(1)[1] == "(":
+                self.i += 2
+                self._expr()
+                self._expect("op", ")")
+                self.count = True
+            else:
+                self.value = self._expr()
+        elif self._accept("op", "*"):
+            self.columns = None
+        else:
+            self.columns = []
+            while True:
+                start = self.i
+                fn = self._expr()
+                if self._accept("kw", "AS"):
+                    name = self._next()[1]
+                else:
+                    name = self._path_name(start, self.i) or f"${len(self.columns) + 1}"
+                self.columns.append((str(name), fn))
+                if not self._accept("op", ","):
+                    break
+        self._expect("kw", "FROM")
+        self.alias = self._next()[1]
+        if self._accept("kw", "WHERE"):
+            self.where = self._expr()
+        if self._accept("kw", "ORDER"):
+            self._expect("kw", "BY")
+            while True:
+                fn = self._expr()
+                desc = False
+                if self._accept("kw", "DESC"):
+                    desc = True
+                else:
+                    self._accept("kw", "ASC")
+                self.order.append((fn, desc))
+                if not self._accept("op", ","):
+                    break
+        if self._accept("kw", "OFFSET"):
+            self.offset = self._scalar()
+            self._expect("kw", "LIMIT")
+            self.limit = self._scalar()
+        self._expect("end")
+
+    def _path_name(self, start: int, end: int) -> Optional[str]:
+        # c.a.b → "b", c["x"] → "x"; anything else has no implicit name
+        toks = self.toks[start:end]
+        if not toks or toks[0][0] != "ident" or ("op", "(") in toks:
+            return None
+        last = toks[-2] if toks[-1] == ("op", "]") else toks[-1]
+        return str(last[1]) if len(toks) > 1 else None
+
+    def _scalar(self):
+        t = self._next()
+        return (lambda p, v=t[1]: int(v)) if t[0] == "lit" else (lambda p, n=t[1]: int(p[n]))
+
+    # --- expressions (precedence: OR < AND < NOT < comparison < primary) ---
+    def _expr(self):
+        ops = [self._and()]
+        while self._accept("kw", "OR"):
+            ops.append(self._and())
+        if len(ops) == 1:
+            return ops[0]
+        return _in_set(ops) or _n_ary(ops, True)
+
+    def _and(self):
+        ops = [self._not()]
+        while self._accept("kw", "AND"):
+            ops.append(self._not())
+        return ops[0] if len(ops) == 1 else _n_ary(ops, False)
+
+    def _not(self):
+        if self._accept("kw", "NOT"):
+            inner = self._not()
+            return lambda d, p: (not v) if isinstance(v := inner(d, p), bool) else UNDEF
+        return self._comparison()
+
+    def _comparison(self):
+        left = self._primary()
+        t = self._peek()
+        if t[0] == "op" and t[1] in ("=", "!=", "<>", "<", ">", "<=", ">="):
+            self.i += 1
+            op = "!=" if t[1] == "<>" else t[1]
+            right = self._primary()
+            fn = lambda d, p: _cmp(op, left(d, p), right(d, p))
+            if op == "=" and hasattr(left, "path") and hasattr(right, "operand"):
+                fn.eq = (left.path, right.operand)
+            return fn
+        return left
+
+    def _primary(self):
+        kind, text = self._next()
+        if kind == "lit":
+            fn = lambda d, p, v=text: v
+            fn.operand = ("lit", text)
+            return fn
+        if kind == "param":
+            fn = lambda d, p, n=text: p.get(n, UNDEF)
+            fn.operand = ("param", text)
+            return fn
+        if kind == "kw" and text in ("TRUE", "FALSE", "NULL", "UNDEFINED"):
+            v = {"TRUE": True, "FALSE": False, "NULL": None, "UNDEFINED": UNDEF}[text]
+            return lambda d, p: v
+        if kind == "op" and text == "(":
+            inner = self._expr()
+            self._expect("op", ")")
+            return inner
+        if kind == "op" and text == "{":
+            items = []
+            while not self._accept("op", "}"):
+                key = self._next()[1]
+                self._expect("op", ":")
+                items.append((key, self._expr()))
+                self._accept("op", ",")
+            return lambda d, p: {k: v for k, f in items if (v := f(d, p)) is not UNDEF}
+        if kind == "ident" and self._peek() == ("op", "("):
+            name = text.upper()
+            if name == "IIF":
+                self.i += 1
+                cond = self._expr(); self._expect("op", ",")
+                a = self._expr(); self._expect("op", ",")
+                b = self._expr(); self._expect("op", ")")
+                return lambda d, p: a(d, p) if cond(d, p) is True else b(d, p)
+            fn = _FUNCS.get(name)
+            if fn is None:
+                raise ValueError(f"fake_cosmos: unsupported function {text}")
+            self.i += 1
+            args = []
+            while not self._accept("op", ")"):
+                args.append(self._expr())
+                self._accept("op", ",")
+            return lambda d, p: fn(*[a(d, p) for a in args])
+        if kind == "ident":
+            # alias.path.to["field"]
+            path: List[str] = []
+            while True:
+                if self._accept("op", "."):
+                    path.append(self._next()[1])
+                elif self._peek() == ("op", "["):
+                    self.i += 1
+                    path.append(self._next()[1])
+                    self._expect("op", "]")
+                else:
+                    break
+            fn = lambda d, p, path=tuple(path): _walk(d, path)
+            fn.path = tuple(path)
+            return fn
+        raise ValueError(f"fake_cosmos: unexpected {text!r}")
+
+    # --- execution ---
+    def partition_for(self, pk_parts: Tuple[str, ...], params: Dict[str, Any]):
+        """Partition key value pinned by `c.<pk> = …` at the top level of WHERE (the SDK's query plan does the same)."""
+        for g in getattr(self.where, "conjuncts", None) or ([self.where] if self.where else []):
+            eq = getattr(g, "eq", None)
+            if eq and eq[0] == pk_parts:
+                kind, v = eq[1]
+                v = v if kind == "lit" else params.get(v, UNDEF)
+                if isinstance(v, str):
+                    return v
+        return None
+
+    def run(self, docs: Iterable[Dict[str, Any]], params: Dict[str, Any]) -> Tuple[List[Any], int]:
+        """(result rows, documents scanned)."""
+        docs = list(docs)
+        rows = [d for d in docs if self.where is None or self.where(d, params) is True]
+        if self.count:
+            return [len(rows)], len(docs)
+        for fn, desc in reversed(self.order):
+            rows.sort(key=lambda d, fn=fn: _sort_key(fn(d, params)), reverse=desc)
+        if self.offset is not None:
+            off, lim = self.offset(params), self.limit(params)
+            rows = rows[off:off + lim]
+        if not self.distinct and self.top is not None:
+            rows = rows[:self.top(params)]
+        out = [r for r in (self._project(d, params) for d in rows) if r is not UNDEF]
+        if self.distinct:
+            seen, uniq = set(), []
+            for r in out:
+                k = json.dumps(r, sort_keys=True, default=str)
+                if k not in seen:
+                    seen.add(k)
+                    uniq.append(r)
+            out = uniq if self.top is None else uniq[:self.top(params)]
+        return out, len(docs)
+
+    def _project(self, d, params):
+        if self.value is not None:
+            return _clone(self.value(d, params))
+        if self.columns is None:
+            return _clone(d)
+        return {n: _clone(v) for n, f in self.columns if (v := f(d, params)) is not UNDEF}
+
+
+def _walk(d, path):
+    for k in path:
+        if isinstance(d, dict):
+            d = d.get(k, UNDEF)
+        elif isinstance(d, list) and isinstance(k, int):
+            d = d[k] if -len(d) <= k < len(d) else UNDEF
+        else:
+            return UNDEF
+    return d
+
+
+def _n_ary(ops: List[Callable], is_or: bool) -> Callable:
+    # OR: any True → True, all False → False, else undefined (AND mirrored)
+    win, lose = (True, False) if is_or else (False, True)
+
+    def fn(d, p):
+        undef = False
+        for g in ops:
+            v = g(d, p)
+            if v is win:
+                return win
+            if v is not lose:
+                undef = True
+        return UNDEF if undef else lose
+    return fn
+
+
+def _in_set(ops: List[Callable]) -> Optional[Callable]:
+    """`c.x=@id0 OR c.x=@id1 OR …` (one path, scalar operands) → one set lookup per doc."""
+    eqs = [getattr(g, "eq", None) for g in ops]
+    if not all(eqs) or len({path for path, _ in eqs}) != 1:
+        return None
+    path = eqs[0][0]
+    operands = [operand for _, operand in eqs]
+    generic = _n_ary(ops, True)
+    last = [None]   # (params dict, value set) of the latest run; swapped atomically
+
+    def fn(d, p):
+        c = last[0]
+        if c is None or c[0] is not p:
+            vals = [v if kind == "lit" else p.get(v, UNDEF) for kind, v in operands]
+            c = (p, frozenset(vals) if all(isinstance(v, str) for v in vals) else None)
+            last[0] = c
+        if c[1] is None:
+            return generic(d, p)
+        v = _walk(d, path)
+        if v is UNDEF:
+            return UNDEF
+        return isinstance(v, str) and v in c[1]
+    return fn
+
+
+_TYPE_RANK = {type(None): 1, bool: 2, int: 3, float: 3, str: 4}
+
+
+def _sort_key(v):
+    if v is UNDEF:
+        return (0, 0)
+    rank = _TYPE_RANK.get(type(v), 5)
+    return (rank, v if rank in (2, 3, 4) else 0)
+
+
+_compiled: Dict[str, _Query] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_sql(sql: str) -> _Query:
+    q = _compiled.get(sql)
+    if q is None:
+        q = _Query(sql)
+        with _compiled_lock:
+            _compiled[sql] = q
+    return q
+
+
+# ===== containers =====
+
+class _Connection:
+    """Stands in for client_connection; last_response_headers is per thread here."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def last_response_headers(self):
+        return getattr(self._local, "headers", {})
+
+    @last_response_headers.setter
+    def last_response_headers(self, h):
+        self._local.headers = h
+
+
+class _Pager:
+    def __init__(self, pages: Iterable[List[Any]]):
+        self._it = iter(pages)
+        self.continuation_token = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        page, self.continuation_token = next(self._it)
+        return iter(page)
+
+
+class _QueryIterable:
+    """Lazy like the SDK's ItemPaged: the query runs when iteration starts."""
+
+    def __init__(self, container: "FakeContainer", q: "_Query", params: Dict[str, Any], partition_key, page_size: int,
+                 excluded_locations=None):
+        self._c, self._q, self._params, self._pk = container, q, params, partition_key
+        self._size = max(1, page_size)
+        self._excluded = excluded_locations
+
+    def _pages(self, start: int):
+        pk = self._pk if self._pk is not None else self._q.partition_for(self._c._pk_parts, self._params)
+        rows, scanned = self._q.run(self._c._scope(pk), self._params)
+        n = len(rows)
+        first = True
+        pos = start
+        while first or pos < n:
+            self._c._cosmos.route(self._excluded)
+            self._c._cosmos.maybe_throttle()
+            page = rows[pos:pos + self._size]
+            # the scan cost is charged on the first page only
+            self._c._io(self._c.query_ru(scanned if first else 0, len(page)))
+            pos += len(page)
+            first = False
+            yield page, (str(pos) if pos < n else None)
+            if not page:
+                break
+
+    def by_page(self, continuation_token: Optional[str] = None):
+        return _Pager(self._pages(int(continuation_token or 0)))
+
+    def __iter__(self):
+        for page, _ in self._pages(0):
+            yield from page
+
+
+class _Store(dict):
+    """(pk, id) → doc, plus a per-partition index so partition-scoped queries don't scan everything."""
+
+    def __init__(self):
+        super().__init__()
+        self.by_pk: Dict[Any, Dict[str, Dict[str, Any]]] = {}
+
+    def __setitem__(self, key, doc):
+        super().__setitem__(key, doc)
+        self.by_pk.setdefault(key[0], {})[key[1]] = doc
+
+    def pop(self, key, default=None):
+        if key not in self:
+            return default
+        part = self.by_pk[key[0]]
+        del part[key[1]]
+        if not part:
+            del self.by_pk[key[0]]
+        return super().pop(key)
+
+    def partition(self, pk) -> List[Dict[str, Any]]:
+        return list(self.by_pk.get(pk, {}).values())
+
+
+_MISSING = object()
+
+
+class FakeContainer:
+    def __init__(self, name: str, cosmos: "FakeCosmos", pk_path: Optional[str] = None):
+        self.id = name
+        self._cosmos = cosmos
+        self.pk_path = pk_path or PK_PATHS.get(name, "/id")
+        self._pk_parts = tuple(p for p in self.pk_path.strip("/").split("/") if p)
+        self._docs = _Store()
+        self._lock = threading.RLock()
+        self.client_connection = cosmos.client_connection
+        self.calls: Dict[str, int] = {}
+
+    # ----- helpers -----
+    def __len__(self):
+        return len(self._docs)
+
+    def pk_of(self, doc: Dict[str, Any]):
+        v = _walk(doc, self._pk_parts)
+        return None if v is UNDEF else v
+
+    def _io(self, ru: float, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        self._cosmos.sleep()
+        h = {"x-ms-request-charge": f"{ru:.2f}", "x-ms-activity-id": uuid.uuid4().hex}
+        if extra:
+            h.update(extra)
+        self.client_connection.last_response_headers = h
+        return h
+
+    def _count(self, op: str, read_kwargs: Optional[Dict[str, Any]] = None) -> None:
+        self.calls[op] = self.calls.get(op, 0) + 1
+        self._cosmos.route((read_kwargs or {}).get("excluded_locations"))
+        if op != "query_items":   # queries are throttled per page
+            self._cosmos.maybe_throttle()
+
+    @staticmethod
+    def _hook(kwargs, headers, result):
+        hook = kwargs.get("response_hook")
+        if hook:
+            hook(headers, result)
+
+    def _stamp(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        doc["_etag"] = f'"{uuid.uuid4()}"'
+        doc["_ts"] = int(time.time())
+        doc.setdefault("_rid", uuid.uuid4().hex[:12])
+        doc["_self"] = f"dbs/x/colls/{self.id}/docs/{doc['_rid']}"
+        doc.setdefault("_attachments", "attachments/")
+        return doc
+
+    def _key(self, item, partition_key) -> Tuple[Any, str]:
+        item_id = item.get("id") if isinstance(item, dict) else item
+        if partition_key is None and isinstance(item, dict):
+            partition_key = self.pk_of(item)
+        return partition_key, item_id
+
+    def _not_found(self):
+        self._io(1.0)
+        raise cx.CosmosResourceNotFoundError(status_code=404, message="Entity with the specified id does not exist in the system.")
+
+    def _failed_precondition(self):
+        self._io(1.0)
+        raise cx.CosmosAccessConditionFailedError(status_code=412, message="Precondition failed")
+
+    @staticmethod
+    def _etag_ok(kwargs, current: Dict[str, Any]) -> bool:
+        etag = kwargs.get("etag")
+        cond = kwargs.get("match_condition")
+        ac = kwargs.get("access_condition")
+        if ac and (ac.get("type") or "").lower() == "ifmatch":
+            etag, cond = ac.get("condition"), MatchConditions.IfNotModified
+        return not (etag and cond == MatchConditions.IfNotModified and current.get("_etag") != etag)
+
+    # ----- seeding (no latency, no headers) -----
+    def seed(self, docs: Iterable[Dict[str, Any]]) -> int:
+        n = 0
+        with self._lock:
+            for d in docs:
+                d = self._stamp(_clone(d))
+                self._docs[(self.pk_of(d), d["id"])] = d
+                n += 1
+        return n
+
+    # ----- point operations -----
+    def read_item(self, item, partition_key, **kwargs):
+        self._count("read_item", kwargs)
+        with self._lock:
+            doc = self._docs.get(self._key(item, partition_key))
+            doc = _clone(doc) if doc is not None else None
+        if doc is None:
+            self._not_found()
+        inm = (kwargs.get("initial_headers") or {}).get("If-None-Match")
+        if kwargs.get("match_condition") == MatchConditions.IfModified:
+            inm = kwargs.get("etag")
+        if inm and inm == doc.get("_etag"):
+            self._io(1.0)
+            raise cx.CosmosHttpResponseError(status_code=304, message="Not Modified")
+        h = self._io(1.0, {"etag": doc["_etag"]})
+        self._hook(kwargs, h, doc)
+        return doc
+
+    def create_item(self, body, **kwargs):
+        self._count("create_item")
+        doc = self._stamp(_clone(body))
+        key = (self.pk_of(doc), doc["id"])
+        with self._lock:
+            if key in self._docs:
+                exists = True
+            else:
+                exists = False
+                self._docs[key] = doc
+        if exists:
+            self._io(1.0)
+            raise cx.CosmosResourceExistsError(status_code=409, message="Entity with the specified id already exists in the system.")
+        out = _clone(doc)
+        h = self._io(self._cosmos.write_ru(doc), {"etag": doc["_etag"]})
+        self._hook(kwargs, h, out)
+        return out
+
+    def upsert_item(self, body, **kwargs):
+        self._count("upsert_item")
+        doc = self._stamp(_clone(body))
+        with self._lock:
+            self._docs[(self.pk_of(doc), doc["id"])] = doc
+        out = _clone(doc)
+        h = self._io(self._cosmos.write_ru(doc), {"etag": doc["_etag"]})
+        self._hook(kwargs, h, out)
+        return out
+
+    def replace_item(self, item, body, **kwargs):
+        self._count("replace_item")
+        pk = kwargs.get("partition_key", self.pk_of(body))
+        key = (pk, item.get("id") if isinstance(item, dict) else item)
+        with self._lock:
+            current = self._docs.get(key)
+            ok = current is not None and self._etag_ok(kwargs, current)
+            if ok:
+                doc = self._stamp(_clone(body))
+                self._docs[key] = doc
+        if current is None:
+            self._not_found()
+        if not ok:
+            self._failed_precondition()
+        out = _clone(doc)
+        h = self._io(self._cosmos.write_ru(doc), {"etag": doc["_etag"]})
+        self._hook(kwargs, h, out)
+        return out
+
+    def patch_item(self, item, partition_key, patch_operations, **kwargs):
+        self._count("patch_item")
+        key = self._key(item, partition_key)
+        pred = kwargs.get("filter_predicate")
+        where = compile_sql("SELECT * " + pred).where if pred else None
+        with self._lock:
+            current = self._docs.get(key)
+            ok = (current is not None and self._etag_ok(kwargs, current)
+                  and (where is None or where(current, {}) is True))
+            if ok:
+                doc = _clone(current)
+                for op in patch_operations:
+                    _apply_patch(doc, op)
+                self._docs[key] = self._stamp(doc)
+        if current is None:
+            self._not_found()
+        if not ok:
+            self._failed_precondition()
+        out = _clone(doc)
+        h = self._io(self._cosmos.write_ru(doc), {"etag": doc["_etag"]})
+        self._hook(kwargs, h, out)
+        return out
+
+    def delete_item(self, item, partition_key, **kwargs):
+        self._count("delete_item")
+        with self._lock:
+            doc = self._docs.pop(self._key(item, partition_key), None)
+        if doc is None:
+            self._not_found()
+        h = self._io(self._cosmos.write_ru(doc))
+        self._hook(kwargs, h, None)
+
+    def execute_item_batch(self, batch_operations, partition_key, **kwargs):
+        """All-or-nothing over one partition; same tuple format as the SDK."""
+        self._count("execute_item_batch")
+        results = []
+        with self._lock:
+            undo: List[Tuple[Tuple[Any, str], Any]] = []
+            try:
+                for op in batch_operations:
+                    name, args = op[0], op[1]
+                    if name in ("patch", "delete"):
+                        undo.append(((partition_key, args[0]), self._docs.get((partition_key, args[0]), _MISSING)))
+                    elif name in ("upsert", "create", "replace"):
+                        undo.append(((partition_key, args[-1]["id"]),
+                                     self._docs.get((partition_key, args[-1]["id"]), _MISSING)))
+                    if name == "patch":
+                        doc = self._docs.get((partition_key, args[0]))
+                        if doc is None:
+                            raise cx.CosmosResourceNotFoundError(status_code=404, message="not found")
+                        doc = _clone(doc)
+                        for p in args[1]:
+                            _apply_patch(doc, p)
+                        self._docs[(partition_key, args[0])] = self._stamp(doc)
+                    elif name in ("upsert", "create", "replace"):
+                        body = args[-1]
+                        key = (partition_key, body["id"])
+                        if name == "create" and key in self._docs:
+                            raise cx.CosmosResourceExistsError(status_code=409, message="exists")
+                        if name == "replace" and key not in self._docs:
+                            raise cx.CosmosResourceNotFoundError(status_code=404, message="not found")
+                        self._docs[key] = self._stamp(_clone(body))
+                    elif name == "delete":
+                        if self._docs.pop((partition_key, args[0]), None) is None:
+                            raise cx.CosmosResourceNotFoundError(status_code=404, message="not found")
+                    elif name == "read":
+                        if (partition_key, args[0]) not in self._docs:
+                            raise cx.CosmosResourceNotFoundError(status_code=404, message="not found")
+                    else:
+                        raise ValueError(f"fake_cosmos: unsupported batch op {name}")
+                    results.append({"statusCode": 200})
+            except cx.CosmosHttpResponseError:
+                for key, prev in reversed(undo):
+                    if prev is _MISSING:
+                        self._docs.pop(key)
+                    else:
+                        self._docs[key] = prev
+                self._io(1.0)
+                raise
+        h = self._io(self._cosmos.write_ru({}) * max(1, len(results)))
+        self._hook(kwargs, h, results)
+        return results
+
+    # ----- queries -----
+    def query_items(self, query, parameters=None, partition_key=None, **kwargs):
+        self._count("query_items", kwargs)
+        if isinstance(query, dict):
+            parameters = query.get("parameters") or parameters
+            query = query.get("query", "")
+        q = compile_sql(query)
+        params = {p["name"]: p.get("value") for p in (parameters or [])}
+        return _QueryIterable(self, q, params, partition_key, kwargs.get("max_item_count") or DEFAULT_PAGE_SIZE,
+                              kwargs.get("excluded_locations"))
+
+    def _scope(self, partition_key) -> List[Dict[str, Any]]:
+        with self._lock:
+            if partition_key is not None:
+                return self._docs.partition(partition_key)
+            return list(self._docs.values())
+
+    def query_ru(self, scanned: int, returned: int) -> float:
+        return 2.5 + scanned * self._cosmos.ru_per_scanned + returned * 0.1
+
+
+def _apply_patch(doc: Dict[str, Any], op: Dict[str, Any]) -> None:
+    parts = [p for p in op["path"].split("/") if p]
+    parent = doc
+    for p in parts[:-1]:
+        parent = parent.setdefault(p, {})
+    leaf = parts[-1]
+    kind = op["op"]
+    if kind in ("set", "add", "replace"):
+        parent[leaf] = _clone(op.get("value"))
+    elif kind == "remove":
+        parent.pop(leaf, None)
+    elif kind == "incr":
+        parent[leaf] = (parent.get(leaf) or 0) + op.get("value", 1)
+    else:
+        raise ValueError(f"fake_cosmos: unsupported patch op {kind}")
+
+
+class FakeDatabase:
+    def __init__(self, cosmos: "FakeCosmos", name: str):
+        self._cosmos, self.id = cosmos, name
+
+    def get_container_client(self, name: str) -> FakeContainer:
+        return self._cosmos.container(self.id, name)
+
+
+class FakeCosmos:
+    """One fake account; containers are created on first use."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, ru_per_scanned: float = 0.02,
+                 seed: Optional[int] = None, throttle_rate: float = 0.0, retry_after_ms: int = 20,
+                 regions: Optional[Dict[str, float]] = None, tail_rate: float = 0.0, tail_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.regions = dict(regions or {})   # name → added latency (ms)
+        self.region_calls = {r: 0 for r in self.regions}
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self._tl = threading.local()
+        self.throttle_rate = throttle_rate
+        self.retry_after_ms = retry_after_ms
+        self.throttled = 0
+        self.jitter_ms = jitter_ms
+        self.ru_per_scanned = ru_per_scanned
+        self.client_connection = _Connection()
+        self._containers: Dict[Tuple[str, str], FakeContainer] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def route(self, excluded_locations=None) -> None:
+        """Region for this thread's next requests: the first not excluded (writes: always the first)."""
+        if self.regions:
+            first = next(iter(self.regions))
+            self._tl.region = next((r for r in self.regions if r not in (excluded_locations or ())), first)
+
+    def sleep(self) -> None:
+        d = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        region = getattr(self._tl, "region", None)
+        if region is not None:
+            d += self.regions[region]
+            with self._lock:
+                self.region_calls[region] += 1
+        if self.tail_rate and self._rng.random() < self.tail_rate:
+            d += self.tail_ms
+        if d > 0:
+            time.sleep(d / 1000.0)
+
+    def maybe_throttle(self) -> None:
+        if self.throttle_rate <= 0 or self._rng.random() >= self.throttle_rate:
+            return
+        self.throttled += 1
+        self.sleep()
+        h = {"x-ms-request-charge": "0.00", "x-ms-retry-after-ms": str(self.retry_after_ms)}
+        self.client_connection.last_response_headers = h
+        e = cx.CosmosHttpResponseError(status_code=429, message="Request rate is large.")
+        e.headers = h
+        raise e
+
+    @staticmethod
+    def write_ru(doc: Dict[str, Any]) -> float:
+        # ~5.7 RU for a 1 KB write, growing with size
+        return 5.7 + len(json.dumps(doc, default=str)) / 1024.0
+
+    def get_database_client(self, name: str) -> FakeDatabase:
+        return FakeDatabase(self, name)
+
+    def container(self, db: str, name: str, pk_path: Optional[str] = None) -> FakeContainer:
+        key = (db, name)
+        with self._lock:
+            c = self._containers.get(key)
+            if c is None:
+                c = self._containers[key] = FakeContainer(name, self, pk_path)
+            return c
+
+    def containers(self) -> Dict[Tuple[str, str], FakeContainer]:
+        return dict(self._containers)
+
+    def calls(self) -> Dict[str, Dict[str, int]]:
+        return {f"{db}/{name}": dict(c.calls) for (db, name), c in self._containers.items()}
+
+
+def install(cosmos: FakeCosmos) -> None:
+    """
+    Point both Cosmos client factories at `cosmos`. Must run before
+    function_app is imported (some handlers resolve containers at import).
+    """
+    from shared import cosmos_client, vegu_cosmos_client
+
+    cosmos_client.get_client = lambda: cosmos
+    cosmos_client.get_container.cache_clear()
+    vegu_cosmos_client._client = lambda: cosmos
+    vegu_cosmos_client._resolve_cosmos = lambda: (cosmos, cosmos.get_database_client(vegu_cosmos_client.VEGU_COSMOS_DB))
+    vegu_cosmos_client.get_container.cache_clear()
+    vegu_cosmos_client.institutions_container.cache_clear()
@@ -0,0 +1,392 @@
+# bench/load.py
+#
+# End-to-end load benchmark: the registered Function handlers are called
+# directly (no host, no HTTP), concurrently, against bench.fake_cosmos.
+# - the fake is installed before function_app is imported, so every handler,
+#   shared helper and instrumentation wrapper runs unmodified
+# - workers loop over scenarios (bench.scenarios) until --duration elapses;
+#   each route call is timed under "<scenario>:<step>"
+# - report: requests, req/s, p50/p95/p99/max (ms), errors (5xx or exception)
+#   and Cosmos RU per step from shared.metrics; --out writes JSON, --compare
+#   diffs against an earlier JSON (e.g. from the previous commit)
+#
+# Env set here unless already present: rate limits off, MINC_OTP_FIXED,
+# a throwaway MINC_SESSION_KEYS, MINC_BCRYPT_ROUNDS (see --bcrypt-rounds),
+# MINC_ADMIT_CAPACITY=32 (a host with 32 worker threads; the default follows
+# this machine's CPU count, which the bench's own threads do not model).
+#
+# Usage (from minc-vegu-backend/):
+#   python -m bench.load [--scenario all|login|typeahead|complaint_review|updates|triage]
+#                        [--workers 16] [--duration 20] [--warmup 3]
+#                        [--latency-ms 4] [--jitter-ms 1] [--scale 1]
+#                        [--profile small|medium|large|xl]   (bench.datagen instead of the fixture)
+#                        [--throttle-rate 0.05]   (share of Cosmos requests answered 429)
+#                        [--regions "West Europe=0,North Europe=6"] [--tail-rate 0.03 --tail-ms 80]
+#                        (two simulated regions + slow outliers; add MINC_HEDGE=1 for hedged reads)
+#                        [--backoff 1]   (clients wait out Retry-After on 429/503, capped)
+#                        [--out results.json] [--compare baseline.json]
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import inspect
+import argparse
+import platform
+import threading
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+
+def _env_defaults(bcrypt_rounds: int) -> None:
+    os.environ.setdefault("MINC_RATE_LIMIT", "0")
+    os.environ.setdefault("MINC_OTP_FIXED", "24680")
+    os.environ.setdefault("MINC_SESSION_KEYS", "bench:" + os.urandom(16).hex())
+    os.environ.setdefault("MINC_BCRYPT_ROUNDS", str(bcrypt_rounds))
+    os.environ.setdefault("MINC_IDENT_FILTER_POLL_S", "3600")
+    os.environ.setdefault("MINC_ADMIT_CAPACITY", "32")
+
+
+class _Out:
+    """Stand-in for func.Out[...] output bindings (queue outbox)."""
+
+    def __init__(self):
+        self.value = None
+
+    def set(self, v):
+        self.value = v
+
+    def get(self):
+        return self.value
+
+
+class Router:
+    """route template → (methods, user function) from the app's registrations."""
+
+    def __init__(self, app):
+        self.routes: Dict[str, Tuple[set, Any]] = {}
+        for fn in app.get_functions():
+            trig = fn.get_trigger()
+            route = getattr(trig, "route", None)
+            if route is None:
+                continue
+            methods = {str(getattr(m, "value", m)).upper() for m in (getattr(trig, "methods", None) or [])}
+            self.routes[route] = (methods, fn.get_user_function())
+
+    def handler(self, route: str, method: str):
+        methods, fn = self.routes[route]
+        if methods and method.upper() not in methods:
+            raise ValueError(f"{method} not allowed on {route}")
+        return fn
+
+
+class Recorder:
+    """Per-step latency samples; each worker thread appends to its own lists."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._all: List[Dict[str, Dict[str, list]]] = []
+        self._lock = threading.Lock()
+        self.recording = False
+
+    def _mine(self) -> Dict[str, Dict[str, list]]:
+        d = getattr(self._local, "d", None)
+        if d is None:
+            d = self._local.d = {}
+            with self._lock:
+                self._all.append(d)
+        return d
+
+    def add(self, step: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        s = self._mine().setdefault(step, {"lat": [], "errors": [0]})
+        s["lat"].append(seconds)
+        if not ok:
+            s["errors"][0] += 1
+
+    def merged(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            parts = list(self._all)
+        for d in parts:
+            for step, s in d.items():
+                m = out.setdefault(step, {"lat": [], "errors": 0})
+                m["lat"].extend(s["lat"])
+                m["errors"] += s["errors"][0]
+        return out
+
+
+class Session:
+    """What a scenario sees: call(step, method, route, ...) → (status, json body | None)."""
+
+    backoff = 0.0   # seconds; honor Retry-After up to this (--backoff)
+
+    def __init__(self, scenario: str, router: Router, recorder: Recorder, ids, rng: random.Random, fixed_otp: str):
+        import azure.functions as func
+        self._func = func
+        self.scenario, self.router, self.recorder = scenario, router, recorder
+        self.ids, self.rng, self.fixed_otp = ids, rng, fixed_otp
+        self.ip = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+    def call(self, step: str, method: str, route: str, params: Optional[Dict[str, str]] = None,
+             route_params: Optional[Dict[str, str]] = None, json: Any = None) -> Tuple[int, Any]:
+        fn = self.router.handler(route, method)
+        path = route
+        for k, v in (route_params or {}).items():
+            path = path.replace("{" + k + "}", v)
+        body = b"" if json is None else _dumps(json)
+        req = self._func.HttpRequest(
+            method=method, url=f"http://localhost/api/{path}" + (("?" + urlencode(params)) if params else ""),
+            headers={"content-type": "application/json", "x-forwarded-for": self.ip, "accept-encoding": "gzip"},
+            params=params or {}, route_params=route_params or {}, body=body,
+        )
+        extra = {name: _Out() for name in _output_args(fn)}
+        t0 = time.perf_counter()
+        try:
+            resp = fn(req, **extra)
+            status = resp.status_code
+        except Exception:
+            self.recorder.add(f"{self.scenario}:{step}", time.perf_counter() - t0, False)
+            return 599, None
+        self.recorder.add(f"{self.scenario}:{step}", time.perf_counter() - t0, status < 500)
+        if self.backoff and status in (429, 503):
+            # a well-behaved client: wait as told (capped) before its next call
+            try:
+                time.sleep(min(self.backoff, float(resp.headers.get("Retry-After") or 0)))
+            except (TypeError, ValueError):
+                pass
+        return status, _loads(resp)
+
+
+_out_args_cache: Dict[Any, List[str]] = {}
+
+
+def _output_args(fn) -> List[str]:
+    names = _out_args_cache.get(fn)
+    if names is None:
+        params = list(inspect.signature(fn).parameters)
+        names = _out_args_cache[fn] = [p for p in params if p != "req"]
+    return names
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj).encode()
+
+
+def _loads(resp) -> Any:
+    body = resp.get_body()
+    if (resp.headers.get("Content-Encoding") or "") == "gzip":
+        import gzip
+        body = gzip.decompress(body)
+    elif (resp.headers.get("Content-Encoding") or "") == "br":
+        import brotli
+        body = brotli.decompress(body)
+    try:
+        return json.loads(body or b"null")
+    except ValueError:
+        return None
+
+
+def _pct(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    # nearest rank
+    k = min(len(sorted_vals) - 1, max(0, math.ceil(p / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def _ru_by_route() -> Dict[str, Dict[str, float]]:
+    from shared import metrics
+    out: Dict[str, Dict[str, float]] = {}
+    for (name, labels), v in metrics.snapshot().items():
+        if name == "minc_http_request_units":
+            route = dict(labels).get("route", "-")
+            count = sum(v[:-1])
+            out[route] = {"requests": count, "ru_per_request": (v[-1] / count) if count else 0.0}
+    return out
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or "?"
+    except Exception:
+        return "?"
+
+
+def summarize(merged: Dict[str, Dict[str, Any]], seconds: float) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for step in sorted(merged):
+        lat = sorted(merged[step]["lat"])
+        n = len(lat)
+        out[step] = {
+            "requests": n,
+            "rps": n / seconds if seconds else 0.0,
+            "p50_ms": _pct(lat, 50) * 1000,
+            "p95_ms": _pct(lat, 95) * 1000,
+            "p99_ms": _pct(lat, 99) * 1000,
+            "max_ms": (lat[-1] * 1000) if lat else 0.0,
+            "errors": merged[step]["errors"],
+        }
+    return out
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    cfg = result["config"]
+    print(f"rev {result['rev']}  scenario={cfg['scenario']} workers={cfg['workers']} "
+          f"duration={cfg['duration']}s latency={cfg['latency_ms']}±{cfg['jitter_ms']}ms scale={cfg['scale']}"
+          + (f" throttle={cfg['throttle_rate']:g} ({result.get('throttled', 0)} × 429)" if cfg.get("throttle_rate") else "")
+          + (f" regions={result.get('region_calls')} hedge={int(cfg.get('hedge', False))}" if cfg.get("regions") else "")
+          + (f" tail={cfg['tail_rate']:g}×{cfg['tail_ms']:g}ms" if cfg.get("tail_rate") else ""))
+    hdr = f"{'step':<36}{'reqs':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'err':>6}"
+    if baseline:
+        hdr += f"{'Δp99':>9}{'Δreq/s':>9}"
+    print(hdr)
+    base_steps = (baseline or {}).get("steps", {})
+    for step, s in result["steps"].items():
+        line = (f"{step:<36}{s['requests']:>8}{s['rps']:>9.1f}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}"
+                f"{s['p99_ms']:>9.1f}{s['max_ms']:>9.1f}{s['errors']:>6}")
+        b = base_steps.get(step)
+        if b:
+            dp = (s["p99_ms"] - b["p99_ms"]) / b["p99_ms"] * 100 if b["p99_ms"] else 0.0
+            dr = (s["rps"] - b["rps"]) / b["rps"] * 100 if b["rps"] else 0.0
+            line += f"{dp:>+8.0f}%{dr:>+8.0f}%"
+        print(line)
+    t = result["total"]
+    print(f"{'TOTAL':<36}{t['requests']:>8}{t['rps']:>9.1f}{t['p50_ms']:>9.1f}{t['p95_ms']:>9.1f}"
+          f"{t['p99_ms']:>9.1f}{t['max_ms']:>9.1f}{t['errors']:>6}")
+    if result.get("ru"):
+        print("\nRU per request (shared.metrics)")
+        for route, r in sorted(result["ru"].items()):
+            print(f"  {route:<40}{r['ru_per_request']:>8.1f}")
+
+
+def _parse_regions(spec: Optional[str]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if part.strip():
+            name, _, ms = part.partition("=")
+            out[name.strip()] = float(ms or 0)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="End-to-end load benchmark against an in-memory Cosmos.")
+    ap.add_argument("--scenario", default="all")
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20.0)
+    ap.add_argument("--warmup", type=float, default=3.0)
+    ap.add_argument("--latency-ms", type=float, default=4.0)
+    ap.add_argument("--jitter-ms", type=float, default=1.0)
+    ap.add_argument("--scale", type=float, default=1)
+    ap.add_argument("--bcrypt-rounds", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--profile", help="seed with bench.datagen at this profile (--scale multiplies it)")
+    ap.add_argument("--throttle-rate", type=float, default=0.0)
+    ap.add_argument("--regions", help='simulated regions, "name=added_ms,…"; the first is the write region')
+    ap.add_argument("--tail-rate", type=float, default=0.0)
+    ap.add_argument("--tail-ms", type=float, default=0.0)
+    ap.add_argument("--backoff", type=float, default=0.0, help="honor Retry-After on 429/503, up to this many seconds")
+    ap.add_argument("--out")
+    ap.add_argument("--compare")
+    args = ap.parse_args(argv)
+
+    _env_defaults(args.bcrypt_rounds)
+    regions = _parse_regions(args.regions)
+    if regions:
+        # read regions in the order given, as the app would be configured
+        os.environ.setdefault("MINC_COSMOS_PREFERRED_REGIONS", ",".join(regions))
+    from bench.fake_cosmos import FakeCosmos, install
+    from bench import scenarios
+
+    cosmos = FakeCosmos(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed,
+                        regions=regions, tail_rate=args.tail_rate, tail_ms=args.tail_ms)
+    install(cosmos)
+    t0 = time.perf_counter()
+    if args.profile:
+        from bench import datagen
+        counts = datagen.counts_for(args.profile, args.scale)
+        datagen.load_into(cosmos, counts, seed=args.seed, bcrypt_rounds=int(os.environ["MINC_BCRYPT_ROUNDS"]))
+        ids = datagen.id_pools(counts)
+    else:
+        ids = scenarios.seed_fixture(cosmos, scale=max(1, int(args.scale)), seed=args.seed,
+                                     bcrypt_rounds=int(os.environ["MINC_BCRYPT_ROUNDS"]))
+    print(f"seeded in {time.perf_counter() - t0:.1f}s: "
+          + ", ".join(f"{name}={len(c)}" for (_, name), c in cosmos.containers().items()), file=sys.stderr)
+    cosmos.throttle_rate = args.throttle_rate   # seeding is never throttled
+
+    import function_app
+    router = Router(function_app.app)
+
+    if args.scenario == "all":
+        mix = scenarios.DEFAULT_MIX
+    else:
+        if args.scenario not in scenarios.SCENARIOS:
+            ap.error(f"unknown scenario {args.scenario} (choose from all, {', '.join(scenarios.SCENARIOS)})")
+        mix = {args.scenario: 1}
+    names = list(mix)
+    weights = [mix[n] for n in names]
+
+    recorder = Recorder()
+    Session.backoff = args.backoff
+    stop = threading.Event()
+    fixed_otp = os.environ["MINC_OTP_FIXED"]
+
+    def worker(i: int):
+        rng = random.Random(args.seed * 1000 + i)
+        while not stop.is_set():
+            name = rng.choices(names, weights)[0]
+            s = Session(name, router, recorder, ids, rng, fixed_otp)
+            scenarios.SCENARIOS[name](s)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.workers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.warmup)
+    from shared import metrics
+    metrics.reset()   # RU per route without the warm-up
+    recorder.recording = True
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for t in threads:
+        t.join(timeout=30)
+
+    merged = recorder.merged()
+    all_lat = {"lat": [x for s in merged.values() for x in s["lat"]],
+               "errors": sum(s["errors"] for s in merged.values())}
+    result = {
+        "rev": _git_rev(),
+        "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {"scenario": args.scenario, "workers": args.workers, "duration": args.duration,
+                   "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "scale": args.scale,
+                   "profile": args.profile, "bcrypt_rounds": int(os.environ["MINC_BCRYPT_ROUNDS"]), "seed": args.seed,
+                   "throttle_rate": args.throttle_rate, "regions": regions, "tail_rate": args.tail_rate,
+                   "tail_ms": args.tail_ms, "hedge": os.getenv("MINC_HEDGE", "0") == "1",
+                   "backoff": args.backoff, "admission": os.getenv("MINC_ADMIT", "1") != "0"},
+        "steps": summarize(merged, elapsed),
+        "total": summarize({"total": all_lat}, elapsed)["total"],
+        "ru": _ru_by_route(),
+        "cosmos_calls": cosmos.calls(),
+        "throttled": cosmos.throttled,
+        "region_calls": cosmos.region_calls,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# bench/scenarios.py
+#
+# Scenario suite for bench.load: a small seeded fixture plus one function per
+# user journey. A scenario receives a Session and calls routes through it;
+# every call is timed under "<scenario>:<step>".
+#   login             init → password → OTP send → OTP verify (MINC_OTP_FIXED)
+#   typeahead         responders / institutions / users / complaints search
+#                     with 1–3 token prefixes, as the FE search boxes send them
+#   complaint_review  complaints search → complaint → messages → reveal user → user
+#   updates           user read + update (etag), responder update, institution update
+#   triage            several reviewers on the same few complaints at once: the FE's
+#                     complaint / messages / reveal calls, each fired twice (not in "all")
+#
+# The fixture is deliberately small (seconds to build); use bench.datagen for
+# production-like volumes.
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+import bcrypt
+
+from bench.datagen import BENCH_PASSWORD
+COUNTRIES = ("US", "CA", "GB", "IN")
+FIRST = ("Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances", "Ken", "Margaret", "Tim")
+LAST = ("Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen", "Thompson", "Hamilton", "Berners")
+WORDS = ("harassment", "report", "campus", "safety", "urgent", "follow", "incident", "library",
+         "parking", "dorm", "threat", "message", "photo", "night", "class")
+THREAT_LEVELS = ("low", "medium", "high", "critical")
+THREAT_STATUS = ("open", "in_review", "resolved")
+
+
+def _iso(dt: datetime) -> str:
+    return dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def seed_fixture(cosmos, scale: int = 1, seed: int = 7, bcrypt_rounds: int = 12) -> Dict[str, List[str]]:
+    """
+    Fill the fake with `scale` × (50 institutions, 500 responders, 1000 users,
+    500 complaints, ~4000 messages, 200 MinC users). Returns id pools for the scenarios.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    vegu, minc = "vegu3-main", "minc"
+    ids: Dict[str, List[str]] = {"institutions": [], "responders": [], "users": [], "complaints": [], "minc": []}
+
+    insts = []
+    for i in range(50 * scale):
+        vg = f"VGI{i:06d}"
+        insts.append({
+            "id": vg, "vg_id": vg, "type": "institution", "country": COUNTRIES[i % len(COUNTRIES)],
+            "name": f"{rng.choice(LAST)} {rng.choice(('University', 'College', 'Institute'))} {i}",
+            "city": rng.choice(("Austin", "Toronto", "Leeds", "Pune", "Denver")),
+            "complaint_email": f"safety{i}@example.edu", "status": "active",
+            "plan_type": rng.choice(("basic", "pro")), "institution_type": "university",
+            "institution_category": "public", "created_at": _iso(now - timedelta(days=400)),
+            "updated_at": _iso(now - timedelta(days=rng.randint(0, 300))),
+        })
+        ids["institutions"].append(vg)
+    cosmos.container(vegu, "institutions").seed(insts)
+
+    responders = []
+    for i in range(500 * scale):
+        inst = insts[i % len(insts)]
+        vg = f"VGR{i:06d}"
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        d = {"id": vg, "vg_id": vg, "institution_id": inst["vg_id"], "institution_name": inst["name"],
+             "email": f"{first}.{last}{i}@example.edu".lower(), "status": "active", "country": inst["country"]}
+        if i % 3:
+            d.update(firstName=first, middleName="", lastName=last)
+        else:
+            d.update(first_name=first, middle_name="", last_name=last)
+        responders.append(d)
+        ids["responders"].append(vg)
+    cosmos.container(vegu, "responders").seed(responders)
+
+    users = []
+    for i in range(1000 * scale):
+        vg = f"VGU{i:06d}"
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        users.append({"id": vg, "vg_id": vg, "type": "user_profile", "first_name": first, "middle_name": "",
+                      "last_name": last, "email": f"{first}{i}@mail.example".lower(), "status": "active",
+                      "institution_name": insts[i % len(insts)]["name"], "timezone": "UTC"})
+        ids["users"].append(vg)
+    cosmos.container(vegu, "user-profiles").seed(users)
+
+    complaints, messages, crypt = [], [], []
+    for i in range(500 * scale):
+        inst = insts[rng.randrange(len(insts))]
+        vg = f"VGC{i:06d}"
+        created = now - timedelta(days=rng.randint(0, 120), minutes=rng.randint(0, 1440))
+        subject = " ".join(rng.sample(WORDS, 3))
+        complaints.append({"id": vg, "vg_id": vg, "type": "complaint", "institution_id": inst["vg_id"],
+                           "institutionId": inst["vg_id"], "institution_name": inst["name"],
+                           "subject": subject, "display_subject": subject.title(),
+                           "threat_level": rng.choice(THREAT_LEVELS), "threat_status": rng.choice(THREAT_STATUS),
+                           "created_at": _iso(created), "last_updated": _iso(created + timedelta(hours=6))})
+        crypt.append({"id": f"map-{vg}", "complaint_vg_id": vg, "user_vg_id": rng.choice(ids["users"])})
+        # heavy-ish tail: most threads short, a few long
+        for j in range(min(200, int(rng.paretovariate(1.3) * 3))):
+            messages.append({"id": f"{vg}-m{j:04d}", "complaint_vg_id": vg,
+                             "sender_type": rng.choice(("user", "responder")), "message_type": "text",
+                             "content": " ".join(rng.choices(WORDS, k=12)),
+                             "timestamp": _iso(created + timedelta(minutes=5 * j))})
+        ids["complaints"].append(vg)
+    cosmos.container(vegu, "complaints").seed(complaints)
+    cosmos.container(vegu, "messages").seed(messages)
+    cosmos.container(vegu, "vgcrypt").seed(crypt)
+
+    pw_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds=bcrypt_rounds)).decode()
+    minc_users = []
+    for i in range(200 * scale):
+        mid = f"MM25A{i:05d}"
+        minc_users.append({"id": mid, "mincId": mid, "email": f"admin{i}@minc.example", "domain": "minc.example",
+                           "status": "active", "roles": ["admin"], "passwordHash": pw_hash,
+                           "failedLoginCount": 0, "firstName": rng.choice(FIRST)})
+        ids["minc"].append(mid)
+    cosmos.container(minc, "minc_users").seed(minc_users)
+    return ids
+
+
+# ===== scenarios =====
+
+def _prefix(rng: random.Random, word: str) -> str:
+    return word[: rng.randint(2, max(2, len(word)))].lower()
+
+
+def login(s) -> None:
+    i = s.rng.randrange(len(s.ids["minc"]))
+    ident = s.ids["minc"][i] if s.rng.random() < 0.5 else f"admin{i}@minc.example"
+    email = f"admin{i}@minc.example"
+    _, init = s.call("init", "POST", "minc-login-init", json={"identifier": ident})
+    flow = (init or {}).get("flowId")
+    s.call("password", "POST", "minc-login-password",
+           json={"identifier": ident, "password": BENCH_PASSWORD, "flowId": flow})
+    s.call("otp_send", "POST", "minc-send-email-otp", json={"email": email, "flowId": flow})
+    s.call("otp_verify", "POST", "minc-verify-email-otp",
+           json={"email": email, "otp": s.fixed_otp, "flowId": flow})
+
+
+def typeahead(s) -> None:
+    rng = s.rng
+    words = [rng.choice(FIRST), rng.choice(LAST), rng.choice(WORDS)]
+    q = " ".join(_prefix(rng, w) for w in words[: rng.randint(1, 3)])
+    s.call("responders", "GET", "vegu-responders-search", params={"q": q.split()[0]})
+    s.call("institutions", "GET", "vegu-institutions-search", params={"q": q})
+    s.call("users", "GET", "vegu-users-search", params={"q": q})
+    s.call("complaints", "GET", "vegu-complaints-search", params={"q": _prefix(rng, rng.choice(WORDS))})
+
+
+def complaint_review(s) -> None:
+    rng = s.rng
+    _, found = s.call("search", "GET", "vegu-complaints-search", params={"q": rng.choice(WORDS), "limit": "20"})
+    items = (found or {}).get("items") or []
+    vg = items[0]["vg_id"] if items else rng.choice(s.ids["complaints"])
+    s.call("complaint", "GET", "vegu-complaints/{vg_id}", route_params={"vg_id": vg})
+    s.call("messages", "GET", "vegu-complaint-messages", params={"complaint_vg_id": vg})
+    _, who = s.call("reveal", "GET", "vegu/reveal-user/{complaint_vg_id}", route_params={"complaint_vg_id": vg})
+    user = (who or {}).get("user_vg_id")
+    if user:
+        s.call("user", "GET", "vegu-users/{vg_id}", route_params={"vg_id": user})
+
+
+def updates(s) -> None:
+    rng = s.rng
+    user = rng.choice(s.ids["users"])
+    _, got = s.call("user_get", "GET", "vegu-users/{vg_id}", route_params={"vg_id": user})
+    etag = (got or {}).get("etag") or ""
+    s.call("user_update", "POST", "vegu-users-update",
+           json={"vg_id": user, "etag": etag, "patch": {"admin_notes": f"bench {rng.random():.6f}"}})
+    s.call("responder_update", "POST", "vegu-responders-update",
+           json={"vg_id": rng.choice(s.ids["responders"]),
+                 "patch": {"department": "Safety", "admin_notes": f"bench {rng.random():.6f}"}})
+    s.call("institution_update", "POST", "vegu-institutions-update",
+           json={"vg_id": rng.choice(s.ids["institutions"]), "patch": {"comment": f"bench {rng.random():.6f}"}})
+
+
+TRIAGE_HOT = 5   # complaints everyone is looking at
+
+
+def triage(s) -> None:
+    vg = s.rng.choice(s.ids["complaints"][:TRIAGE_HOT])
+    for _ in range(2):   # the duplicate requests the FE sends on open
+        s.call("complaint", "GET", "vegu-complaints/{vg_id}", route_params={"vg_id": vg})
+        s.call("messages", "GET", "vegu-complaint-messages", params={"complaint_vg_id": vg})
+        s.call("reveal", "GET", "vegu/reveal-user/{complaint_vg_id}", route_params={"complaint_vg_id": vg})
+
+
+SCENARIOS: Dict[str, Callable[[Any], None]] = {
+    "login": login,
+    "typeahead": typeahead,
+    "complaint_review": complaint_review,
+    "updates": updates,
+    "triage": triage,
+}
+
+# default mix when running "all": mostly reads, like the admin console
+DEFAULT_MIX = {"typeahead": 5, "complaint_review": 3, "updates": 1, "login": 1}
@@ -0,0 +1,42 @@
+# minc_audit_log/__init__.py
+# Route: GET /api/minc-audit-log/{subject_id}?limit=25&continuation=<token>
+# Pages newest-first through the append-only audit trail of one subject
+# (MinC user id, responder vg_id, institution vg_id, VEGU user vg_id).
+
+import logging
+import azure.functions as func
+from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session
+from shared.auth import http_auth_level
+from shared.audit_log import list_events
+
+
+@app.function_name(name="minc_audit_log")
+@app.route(route="minc-audit-log/{subject_id}", methods=["GET"], auth_level=http_auth_level())
+@instrument_route("minc-audit-log/{subject_id}")
+def run(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
+    subject_id = (req.route_params.get("subject_id") or "").strip()
+    if not subject_id:
+        return json_response({"success": False, "error": "Missing subject_id"}, 400)
+
+    try:
+        limit = int(req.params.get("limit") or 25)
+    except ValueError:
+        limit = 25
+    continuation = req.params.get("continuation") or None
+
+    try:
+        items, token = list_events(subject_id, limit=limit, continuation=continuation)
+        return json_response({"success": True, "items": items, "continuation": token}, req=req)
+    except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
+        logging.exception("minc_audit_log failed")
+        return json_response({"success": False, "error": "server_error"}, 500)
@@ -0,0 +1,67 @@
+# minc_email_outbox_worker/__init__.py
+# Queue trigger: drains the email outbox written by minc_send_email_otp.
+# The host fetches messages in batches (host.json extensions.queues.batchSize)
+# and runs them concurrently on the shared pooled transport.
+
+import json
+import logging
+import azure.functions as func
+from function_app import app
+from shared.instrumentation import instrument_route
+from shared.email_outbox import (
+    OUTBOX_QUEUE,
+    OUTBOX_POISON_QUEUE,
+    OUTBOX_CONNECTION,
+    MAX_ATTEMPTS,
+    dead_letter_record,
+    malformed,
+    send_now,
+    note_retry,
+    note_dead_letter,
+    RetryableSendError,
+    PermanentSendError,
+)
+
+@app.function_name(name="minc_email_outbox_worker")
+@app.queue_trigger(arg_name="msg", queue_name=OUTBOX_QUEUE, connection=OUTBOX_CONNECTION)
+@app.queue_output(arg_name="dead", queue_name=OUTBOX_POISON_QUEUE, connection=OUTBOX_CONNECTION)
+@instrument_route("queue:minc-email-outbox")
+def run(msg: func.QueueMessage, dead: func.Out[str]) -> None:
+    raw = msg.get_body().decode("utf-8", "ignore")
+    try:
+        job = json.loads(raw)
+    except ValueError:
+        job = None
+    problem = "unparseable job" if job is None else malformed(job)
+    if problem:
+        # never retried: it would fail the same way every time
+        note_dead_letter(job if isinstance(job, dict) else None, problem)
+        if isinstance(job, dict):
+            dead.set(json.dumps(dead_letter_record(job, problem, msg.dequeue_count)))
+        else:
+            # the raw body may hold an OTP: keep only its size
+            dead.set(json.dumps({"raw_length": len(raw), "reason": problem,
+                                 "dequeue_count": msg.dequeue_count}))
+        return
+
+    try:
+        send_now(job)
+    except PermanentSendError as e:
+        note_dead_letter(job, str(e))
+        dead.set(json.dumps(dead_letter_record(job, str(e), msg.dequeue_count)))
+    except Exception as e:
+        # RetryableSendError or anything unexpected: retry, except on the last
+        # attempt, where the redacted job is dead-lettered here rather than the
+        # host moving the plaintext message to the poison queue
+        if isinstance(e, RetryableSendError):
+            reason = str(e)
+        else:
+            logging.exception("[OUTBOX] unexpected failure id=%s", job.get("id"))
+            reason = f"unexpected {type(e).__name__}"
+        if (msg.dequeue_count or 0) >= MAX_ATTEMPTS:
+            note_dead_letter(job, f"{reason} (attempt {msg.dequeue_count}, giving up)")
+            dead.set(json.dumps(dead_letter_record(job, reason, msg.dequeue_count)))
+            return
+        # re-raise → host makes the message visible again
+        note_retry(job, f"{reason} (attempt {msg.dequeue_count})")
+        raise
@@ -1,11 +1,18 @@
 import azure.functions as func
 from function_app import app   # <-- import the single app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared import health as deep_health
 
 @app.function_name(name="minc_health")
 @app.route(route="health", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+@instrument_route("health")
 def health(req: func.HttpRequest) -> func.HttpResponse:
-    return func.HttpResponse(
-        status_code=200,
-        mimetype="application/json",
-        body='{"status":"ok","service":"minc-vegu-backend"}'
-    )
+    body = {"status": "ok", "service": "minc-vegu-backend"}
+    status_code = 200
+    if req.params.get("deep") == "1":
+        # anonymous: status and reasons only; the full report is /api/health-details
+        report, status = deep_health.deep()
+        body.update(deep_health.summary(report))
+        status_code = deep_health.STATUS_CODES[status]
+    return json_response(body, status_code)
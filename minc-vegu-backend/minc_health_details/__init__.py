@@ -0,0 +1,21 @@
+# minc_health_details/__init__.py
+# Route: GET /api/health-details  (function key)
+# Full deep health report: probes, circuits, regions, admission, in-flight
+# requests per route, pools and caches (shared/health.py). Same status code as
+# /api/health?deep=1.
+
+import azure.functions as func
+from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared import identifier_filter, health as deep_health
+
+@app.function_name(name="minc_health_details")
+@app.route(route="health-details", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_route("health-details")
+def health_details(req: func.HttpRequest) -> func.HttpResponse:
+    report, status = deep_health.deep()
+    body = {"service": "minc-vegu-backend", **report}
+    # in-process caches/filters of this instance
+    body["identifierFilter"] = identifier_filter.stats()
+    return json_response(body, deep_health.STATUS_CODES[status])
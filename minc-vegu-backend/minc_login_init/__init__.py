@@ -1,27 +1,23 @@
 # minc_login_init/__init__.py
-import json
 import logging
 from datetime import datetime, timezone
 from azure.functions import AuthLevel
 
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route, read_all
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
 
 from shared.auth import (
     http_auth_level,
     classify_identifier,
     is_locked,
-    reset_failures,
+    unlock_expired,
 )
 from shared.cosmos_client import users_container
-
-
-def _json(obj, status=200):
-    return func.HttpResponse(
-        body=json.dumps(obj),
-        status_code=status,
-        mimetype="application/json",
-    )
+from shared.rate_limit import check_request, check_identifier
+from shared import login_flow, identifier_filter
 
 
 def _account_status(u: dict) -> str:
@@ -42,17 +38,28 @@ def _lock_expired(u: dict) -> bool:
 
 @app.function_name(name="minc_login_init")
 @app.route(route="minc-login-init", methods=["POST"], auth_level=http_auth_level())
+@instrument_route("minc-login-init")
 def run(req: func.HttpRequest) -> func.HttpResponse:
+    limited = check_request(req, "minc-login-init")
+    if limited:
+        return limited
     try:
         try:
             body = req.get_json()
         except ValueError:
-            return _json({"error": "Invalid JSON."}, 400)
+            return json_response({"error": "Invalid JSON."}, 400)
 
         ident = (body or {}).get("identifier", "")
         cls = classify_identifier(ident)
         if cls["kind"] in ("empty", "invalid"):
-            return _json({"error": "Enter a valid MINC ID or Email address."}, 400)
+            return json_response({"error": "Enter a valid MINC ID or Email address."}, 400)
+        limited = check_identifier("minc-login-init", cls["normalized"])
+        if limited:
+            return limited
+
+        # Definitely unknown identifier → same 404, no Cosmos query
+        if not identifier_filter.might_exist(cls["normalized"]):
+            return json_response({"error": "MinC user not found."}, 404)
 
         cont = users_container()
         if cls["kind"] == "minc":
@@ -62,43 +69,41 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
             query = "SELECT TOP 1 * FROM c WHERE c.email = @em"
             params = [{"name": "@em", "value": cls["normalized"]}]
 
-        items = list(cont.query_items(
+        items = read_all(cont.query_items(
             query=query,
             parameters=params,
             enable_cross_partition_query=True
         ))
         if not items:
-            return _json({"error": "MinC user not found."}, 404)
+            identifier_filter.note_false_positive()
+            return json_response({"error": "MinC user not found."}, 404)
 
         user = items[0]
 
         # 1) If locked, try auto-unlock when past lockoutUntil
         if _account_status(user) == "locked":
             if _lock_expired(user):
-                reset_failures(user)
-                user["status"] = "active"
-                note = f'[{datetime.now(timezone.utc).isoformat()}] Auto-unlock at init after lockout expiry.'
-                user["adminNotes"] = ((user.get("adminNotes") or "") + ("\n" if user.get("adminNotes") else "") + note).strip()
-                cont.replace_item(user, user)
+                user = unlock_expired(cont, user, "Auto-unlock at init after lockout expiry.")
             else:
                 # still locked
                 _, until_iso = is_locked(user)
-                return _json(
+                return json_response(
                     {"error": "Account locked", "lockoutUntil": until_iso, "reason": "locked"},
                     403,
                 )
 
         # 2) Only allow active
         if _account_status(user) != "active":
-            return _json(
+            return json_response(
                 {"error": "Account is not active. Contact MinC support.", "reason": "not_active"},
                 403,
             )
 
-        # Success payload for step 2
-        return _json(
+        # Success payload for step 2 (flowId lets later steps skip the lookup)
+        return json_response(
             {
                 "success": True,
+                "flowId": login_flow.start(user),
                 "mincId": user.get("mincId"),
                 "email": user.get("email"),
                 "displayName": user.get("displayName") or user.get("firstName"),
@@ -109,6 +114,9 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
             200,
         )
 
-    except Exception:
+    except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         logging.exception("minc-login-init failed")
-        return _json({"error": "Server error during sign-in."}, 500)
+        return json_response({"error": "Server error during sign-in."}, 500)
@@ -1,115 +1,129 @@
 # minc_login_password/__init__.py
 # V1.1
 
-import json
 import logging
-from datetime import datetime, timezone
 
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route, read_all
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
 from shared.auth import (
     http_auth_level,
     classify_identifier,
     verify_password,
-    mark_failure,
-    reset_failures,
+    upgrade_hash_if_needed,
+    record_failure,
+    clear_failures,
+    unlock_expired,
     attempts_left,
     is_locked,
     account_status,
     lock_expired,
-    MAX_ATTEMPTS,
-    LOCKOUT_HOURS,
 )
 
 from shared.cosmos_client import users_container
+from shared.password_pool import PasswordPoolBusy
+from shared import login_flow, identifier_filter
+from shared.rate_limit import check_request, check_identifier
 
-def _json(obj, status=200):
-    return func.HttpResponse(
-        body=json.dumps(obj),
-        status_code=status,
-        mimetype="application/json"
-    )
 
 @app.function_name(name="minc_login_password")
 @app.route(route="minc-login-password", methods=["POST"], auth_level=http_auth_level())
+@instrument_route("minc-login-password")
 def run(req: func.HttpRequest) -> func.HttpResponse:
+    limited = check_request(req, "minc-login-password")
+    if limited:
+        return limited
     try:
         try:
             body = req.get_json()
         except ValueError:
-            return _json({"error": "Invalid JSON."}, 400)
+            return json_response({"error": "Invalid JSON."}, 400)
 
         ident = (body or {}).get("identifier", "")
         password = (body or {}).get("password", "")
         cls = classify_identifier(ident)
         if cls["kind"] in ("empty", "invalid"):
-            return _json({"error": "Enter a valid MINC ID or Email address."}, 400)
+            return json_response({"error": "Enter a valid MINC ID or Email address."}, 400)
+        limited = check_identifier("minc-login-password", cls["normalized"])
+        if limited:
+            return limited
         if not password:
-            return _json({"error": "Password is required."}, 400)
+            return json_response({"error": "Password is required."}, 400)
 
         cont = users_container()
-        if cls["kind"] == "minc":
-            query = "SELECT TOP 1 * FROM c WHERE c.mincId = @id"
-            params = [{"name": "@id", "value": cls["normalized"]}]
-        else:
-            query = "SELECT TOP 1 * FROM c WHERE c.email = @em"
-            params = [{"name": "@em", "value": cls["normalized"]}]
+        flow_id = (body or {}).get("flowId")
+        # Reuse the user resolved at init (ETag-revalidated point read)
+        user = login_flow.resolve(flow_id, cont, identifier=cls["normalized"])
+        if user is None:
+            if not identifier_filter.might_exist(cls["normalized"]):
+                return json_response({"error": "MinC user not found."}, 404)
+            if cls["kind"] == "minc":
+                query = "SELECT TOP 1 * FROM c WHERE c.mincId = @id"
+                params = [{"name": "@id", "value": cls["normalized"]}]
+            else:
+                query = "SELECT TOP 1 * FROM c WHERE c.email = @em"
+                params = [{"name": "@em", "value": cls["normalized"]}]
 
-        items = list(cont.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        if not items:
-            # same generic message as init to avoid info leak
-            return _json({"error": "MinC user not found."}, 404)
+            items = read_all(cont.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+            if not items:
+                identifier_filter.note_false_positive()
+                # same generic message as init to avoid info leak
+                return json_response({"error": "MinC user not found."}, 404)
 
-        user = items[0]
+            user = items[0]
 
          # 1) Locked? auto-unlock if expired, else block
         if account_status(user) == "locked":
             if lock_expired(user):
-                reset_failures(user)
-                user["status"] = "active"
-                note = f'[{datetime.now(timezone.utc).isoformat()}] Auto-unlock at password step after lockout expiry.'
-                user["adminNotes"] = ((user.get("adminNotes") or "") + ("\n" if user.get("adminNotes") else "") + note)
-                cont.replace_item(user, user)
+                user = unlock_expired(cont, user, "Auto-unlock at password step after lockout expiry.")
+                login_flow.update(flow_id, user)
             else:
                 _, until_iso = is_locked(user)
-                return _json({"error": "Account locked", "lockoutUntil": until_iso, "reason": "locked"}, 403)
+                return json_response({"error": "Account locked", "lockoutUntil": until_iso, "reason": "locked"}, 403)
 
         # 2) Only allow active accounts
         if account_status(user) != "active":
-            return _json({"error": f"Account  is not active. Contact MinC support.", "reason": "not_active"}, 403)
+            return json_response({"error": f"Account  is not active. Contact MinC support.", "reason": "not_active"}, 403)
 
         # 3) Verify password
-        if not verify_password(password, user):
-            user = mark_failure(user)
-            fails = int(user.get("failedLoginCount", 0))
-            if fails >= MAX_ATTEMPTS:
-                # newly locked
-                until_iso = user.get("lockoutUntil")
-                user["status"] = "locked"
-                note = f'[{datetime.now(timezone.utc).isoformat()}] Account auto-locked after {fails} failed attempts. lockoutUntil={until_iso}'
-                user["adminNotes"] = ((user.get("adminNotes") or "") + ("\n" if user.get("adminNotes") else "") + note)
-                cont.replace_item(user, user)
-                return _json({"error": "Account locked", "lockoutUntil": until_iso, "reason": "locked"}, 403)
-
-            cont.replace_item(user, user)
+        try:
+            password_ok = verify_password(password, user)
+        except PasswordPoolBusy:
+            # shed load instead of queueing more CPU work on this instance
+            resp = json_response({"error": "Server busy. Please retry.", "reason": "busy"}, 503)
+            resp.headers["Retry-After"] = "1"
+            return resp
+
+        if not password_ok:
+            user, _ = record_failure(cont, user)
+            login_flow.update(flow_id, user)
+            if account_status(user) == "locked":
+                _, until_iso = is_locked(user)
+                return json_response({"error": "Account locked", "lockoutUntil": until_iso, "reason": "locked"}, 403)
+
             remaining = attempts_left(user)
             # return both keys for FE compatibility
-            return _json(
+            return json_response(
                 {"error": "Incorrect password.", "attemptsLeft": remaining, "attempts_left": remaining},
                 401
             )
 
-        # 4) Success — clear failures; ensure status active
-        reset_failures(user)
-        user["status"] = "active"
-        cont.replace_item(user, user)
+        # 4) Success — clear failures only if there is anything to clear (no no-op writes)
+        user = clear_failures(cont, user)
+        login_flow.update(flow_id, user)
+        upgrade_hash_if_needed(password, user)
 
-        return _json({
+        return json_response({
             "success": True,
             "mincId": user.get("mincId"),
             "email": user.get("email"),
         }, 200)
 
-    except Exception:
+    except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         logging.exception("minc-login-password failed")
-        return _json({"error": "Server error during password verification."}, 500)
+        return json_response({"error": "Server error during password verification."}, 500)
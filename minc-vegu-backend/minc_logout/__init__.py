@@ -0,0 +1,26 @@
+# minc_logout/__init__.py
+# Route: POST /api/minc-logout  (Authorization: Bearer <session token>)
+# Adds the token's jti to the revocation list; the token stops validating.
+
+import azure.functions as func
+from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.auth import http_auth_level
+from shared import session_tokens
+
+
+@app.function_name(name="minc_logout")
+@app.route(route="minc-logout", methods=["POST"], auth_level=http_auth_level())
+@instrument_route("minc-logout")
+def run(req: func.HttpRequest) -> func.HttpResponse:
+    token = session_tokens.bearer_token(req)
+    if not token:
+        return json_response({"success": True})
+    try:
+        claims = session_tokens.verify(token)
+    except session_tokens.SessionError:
+        # already invalid / expired — nothing to revoke
+        return json_response({"success": True})
+    session_tokens.revoke(claims)
+    return json_response({"success": True})
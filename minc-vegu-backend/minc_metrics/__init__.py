@@ -0,0 +1,95 @@
+# minc_metrics/__init__.py
+# Route: GET /api/metrics — Prometheus text exposition for this instance.
+# Cosmos RU/latency/items/retries and request latency come from
+# shared.instrumentation; the collectors below export the stats dicts the
+# other shared modules already keep.
+
+import azure.functions as func
+from function_app import app
+from shared import metrics, identifier_filter, slow_queries, resilience, admission
+from shared.email_outbox import DELIVERY_STATS, LATENCY_BUCKETS_MS
+from shared.password_pool import POOL_STATS, queue_depth
+from shared.login_flow import FLOW_STATS
+from shared.write_behind import login_bookkeeping
+from shared.instrumentation import in_flight
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _email_outbox():
+    help_text = "Email delivery latency, enqueue to provider accept (ms)."
+    fam = "minc_email_delivery_latency_ms"
+    cum = 0
+    buckets = DELIVERY_STATS["latency_ms_buckets"]
+    for le, c in zip(LATENCY_BUCKETS_MS, buckets):
+        cum += c
+        yield (f"{fam}_bucket", "histogram", help_text, {"le": str(le)}, cum, fam)
+    cum += buckets[-1]
+    yield (f"{fam}_bucket", "histogram", help_text, {"le": "+Inf"}, cum, fam)
+    yield (f"{fam}_sum", "histogram", help_text, {}, DELIVERY_STATS["latency_ms_sum"], fam)
+    yield (f"{fam}_count", "histogram", help_text, {}, cum, fam)
+    for k in ("sent", "retried", "dead_lettered"):
+        yield ("minc_email_outbox_total", "counter", "Outbox jobs by outcome.", {"outcome": k}, DELIVERY_STATS[k])
+
+
+def _password_pool():
+    for k in ("submitted", "completed", "rejected", "timeouts", "rehash_scheduled"):
+        yield ("minc_bcrypt_total", "counter", "bcrypt pool events.", {"event": k}, POOL_STATS[k])
+    yield ("minc_bcrypt_busy_seconds_total", "counter", "Worker time spent in bcrypt.", {}, POOL_STATS["busy_seconds"])
+    yield ("minc_bcrypt_in_flight", "gauge", "Checks submitted and not finished.", {}, POOL_STATS["in_flight"])
+    yield ("minc_bcrypt_queue_depth", "gauge", "Checks waiting for a worker.", {}, queue_depth())
+
+
+def _login_flow():
+    for k, v in FLOW_STATS.items():
+        yield ("minc_login_flow_total", "counter", "Login-flow cache events.", {"event": k}, v)
+
+
+def _write_behind():
+    for k, v in login_bookkeeping.stats.items():
+        yield ("minc_write_behind_total", "counter", "Write-behind buffer events.", {"buffer": login_bookkeeping.name, "event": k}, v)
+    yield ("minc_write_behind_pending", "gauge", "Keys waiting to be flushed.", {"buffer": login_bookkeeping.name}, login_bookkeeping.pending())
+
+
+def _identifier_filter():
+    s = identifier_filter.stats()
+    for k in ("checks", "definite_miss", "maybe", "false_positives"):
+        yield ("minc_ident_filter_total", "counter", "Identifier Bloom filter lookups.", {"result": k}, s[k])
+    yield ("minc_ident_filter_bytes", "gauge", "Bloom filter bit array size.", {}, s["bytes"])
+    yield ("minc_ident_filter_entries", "gauge", "Identifiers in the filter.", {}, s["entries"])
+    yield ("minc_ident_filter_observed_fp", "gauge", "Share of unknown identifiers that passed the filter.", {}, s["observed_fp"])
+
+
+def _slow_queries():
+    for k, v in slow_queries.SLOWQ_STATS.items():
+        yield ("minc_slowq_total", "counter", "Slow-query recorder events.", {"event": k}, v)
+
+
+def _in_flight():
+    for route, n in in_flight().items():
+        yield ("minc_http_in_flight", "gauge", "Requests currently being handled, by route.", {"route": route}, n)
+
+
+_CIRCUIT_STATE = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _circuits():
+    for name, b in resilience.breakers().items():
+        yield ("minc_circuit_state", "gauge", "Container circuit: 0 closed, 1 half-open, 2 open.",
+               {"container": name}, _CIRCUIT_STATE[b["state"]])
+
+
+def _admission():
+    for cls, c in admission.snapshot()["classes"].items():
+        yield ("minc_admission_in_flight", "gauge", "Admitted requests running, by priority class.", {"class": cls}, c["inFlight"])
+        yield ("minc_admission_waiting", "gauge", "Requests queued for admission, by priority class.", {"class": cls}, c["waiting"])
+
+
+for _c in (_in_flight, _admission, _circuits, _email_outbox, _password_pool, _login_flow, _write_behind, _identifier_filter, _slow_queries):
+    metrics.register_collector(_c)
+
+
+@app.function_name(name="minc_metrics")
+@app.route(route="metrics", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+def run(req: func.HttpRequest) -> func.HttpResponse:
+    return func.HttpResponse(metrics.render_prometheus(), status_code=200, mimetype=PROMETHEUS_MIMETYPE)
@@ -1,27 +1,39 @@
-import json, azure.functions as func, logging
+import azure.functions as func, logging
 from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
 from shared.auth import http_auth_level
+from shared.rate_limit import check_request, check_identifier
 from shared.email_otp import send_email_otp
+from shared.email_outbox import OUTBOX_QUEUE, OUTBOX_CONNECTION
 
-def _json(obj, status=200):
-    return func.HttpResponse(json.dumps(obj), status_code=status, mimetype="application/json")
 
 @app.function_name(name="minc_send_email_otp")
 @app.route(route="minc-send-email-otp", methods=["POST"], auth_level=http_auth_level())
-def run(req: func.HttpRequest) -> func.HttpResponse:
+@app.queue_output(arg_name="outbox", queue_name=OUTBOX_QUEUE, connection=OUTBOX_CONNECTION)
+@instrument_route("minc-send-email-otp")
+def run(req: func.HttpRequest, outbox: func.Out[str]) -> func.HttpResponse:
+    limited = check_request(req, "minc-send-email-otp")
+    if limited:
+        return limited
     try:
         body = req.get_json()
     except ValueError:
-        return _json({"success": False, "error": "Invalid JSON."}, 400)
+        return json_response({"success": False, "error": "Invalid JSON."}, 400)
 
     email = (body or {}).get("email","").strip().lower()
     context = (body or {}).get("context","minc_login")
+    flow_id = (body or {}).get("flowId")
 
     if not email:
-        return _json({"success": False, "error": "Email not provided."}, 400)
+        return json_response({"success": False, "error": "Email not provided."}, 400)
 
-    ok, reason = send_email_otp(email=email, context=context)
+    limited = check_identifier("minc-send-email-otp", email)
+    if limited:
+        return limited
+
+    ok, reason = send_email_otp(email=email, context=context, outbox=outbox, flow_id=flow_id)
     if ok:
-        return _json({"success": True})
+        return json_response({"success": True})
     logging.warning(f"[OTP] send failed: {reason}")
-    return _json({"success": False, "error": reason or "Failed to send OTP."}, 400)
+    return json_response({"success": False, "error": reason or "Failed to send OTP."}, 400)
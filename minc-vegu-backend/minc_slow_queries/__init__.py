@@ -0,0 +1,36 @@
+# minc_slow_queries/__init__.py
+# Route: GET /api/minc-slow-queries?limit=50&container=<name>&route=<route>
+# Newest-first view of this instance's slow-query ring buffer (shared.slow_queries):
+# template, parameter shape, RU/latency and — for sampled entries — the re-run's
+# query metrics and index utilization.
+
+import azure.functions as func
+from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.session_tokens import require_session
+from shared import slow_queries
+
+
+@app.function_name(name="minc_slow_queries")
+@app.route(route="minc-slow-queries", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_route("minc-slow-queries")
+def run(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
+    try:
+        limit = min(int(req.params.get("limit") or 50), 500)
+    except ValueError:
+        limit = 50
+    items = slow_queries.recent(
+        limit=limit,
+        container=req.params.get("container") or None,
+        route=req.params.get("route") or None,
+    )
+    return json_response({
+        "success": True,
+        "items": items,
+        "thresholds": slow_queries.thresholds(),
+        "stats": dict(slow_queries.SLOWQ_STATS),
+    }, req=req)
@@ -1,55 +1,76 @@
 # minc_verify_email_otp/__init__.py
-import json
 import azure.functions as func
 import logging
 from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
 from datetime import datetime, timezone
-from shared.auth import http_auth_level
+from shared.auth import http_auth_level, find_identity
+from shared.cosmos_client import users_container, users_partition_key
+from shared import session_tokens, login_flow
+from shared.rate_limit import check_request, check_identifier
 from shared.email_otp import verify_email_otp   # <-- change this import
-from shared.cosmos_client import users_container
+from shared.write_behind import queue_user_fields
 
-def _json(obj, status=200):
-    return func.HttpResponse(json.dumps(obj), status_code=status, mimetype="application/json")
 
 @app.function_name(name="minc_verify_email_otp")
 @app.route(route="minc-verify-email-otp", methods=["POST"], auth_level=http_auth_level())
+@instrument_route("minc-verify-email-otp")
 def run(req: func.HttpRequest) -> func.HttpResponse:
+    limited = check_request(req, "minc-verify-email-otp")
+    if limited:
+        return limited
     try:
         body = req.get_json()
     except ValueError:
-        return _json({"success": False, "error": "Invalid JSON."}, 400)
+        return json_response({"success": False, "error": "Invalid JSON."}, 400)
 
     email   = (body or {}).get("email", "").strip().lower()
     otp     = (body or {}).get("otp", "").strip()
     context = (body or {}).get("context", "minc_login")
+    flow_id = (body or {}).get("flowId")
 
     if not email or not otp:
-        return _json({"success": False, "error": "Email and OTP are required."}, 400)
+        return json_response({"success": False, "error": "Email and OTP are required."}, 400)
+
+    limited = check_identifier("minc-verify-email-otp", email)
+    if limited:
+        return limited
 
     ok, reason = verify_email_otp(email=email, otp=otp, context=context)
     if ok:
         # Post-OTP success → this is the true login point.
-        try:
-            cont = users_container()
-            items = list(cont.query_items(
-                query="SELECT TOP 1 * FROM c WHERE c.email = @em",
-                parameters=[{"name": "@em", "value": email}],
-                enable_cross_partition_query=True
-            ))
-            if items:
-                user = items[0]
-                user["lastLoginAt"] = datetime.now(timezone.utc).isoformat()
-                # OTP confirms identity → clear counters/lock if any lingered
-                user["failedLoginCount"] = 0
-                user["lastFailedAt"] = None
-                user["lockoutUntil"] = None
-                cont.replace_item(user, user)
-            else:
+        out = {"success": True}
+        # Identity from the login flow when this instance still has it
+        ident = login_flow.peek(flow_id, email)
+        login_flow.finish(flow_id)
+        if session_tokens.enabled():
+            # Session token: projected identity lookup (only on a flow miss), then signed claims
+            ident = ident or find_identity(users_container(), email)
+            if not ident:
                 logging.warning(f"[OTP] success but user not found for email={email}")
-        except Exception as e:
-            # Best-effort: do not block login if the write fails
-            logging.exception(f"[OTP] lastLoginAt update failed: {e}")
-        return _json({"success": True})
+                return json_response({"success": False, "error": "MinC user not found."}, 404)
+            token, exp = session_tokens.issue(
+                sub=ident.get("mincId") or ident["id"],
+                roles=ident.get("roles") or [],
+                uid=ident["id"],
+                email=email,
+            )
+            out.update({"token": token, "expiresAt": exp})
+
+        # Bookkeeping is write-behind: queued, coalesced, flushed in batches.
+        # OTP confirms identity → clear counters/lock if any lingered
+        fields = {
+            "lastLoginAt": datetime.now(timezone.utc).isoformat(),
+            "failedLoginCount": 0,
+            "lastFailedAt": None,
+            "lockoutUntil": None,
+        }
+        if ident:
+            queue_user_fields(fields, user_id=ident["id"], pk=users_partition_key(ident))
+        else:
+            queue_user_fields(fields, email=email)
+        return json_response(out)
         
     logging.warning(f"[OTP] verify failed: {reason}")
-    return _json({"success": False, "error": reason or "OTP verification failed."}, 400)
+    return json_response({"success": False, "error": reason or "OTP verification failed."}, 400)
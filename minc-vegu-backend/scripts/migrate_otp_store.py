@@ -0,0 +1,102 @@
+# scripts/migrate_otp_store.py
+#
+# One-off migration: legacy minc_otp_log (random ids, no expiry) → minc_otp
+# (PK /email, id == context, per-item ttl).
+#
+# Only the newest still-valid code per (email, context) is carried over, with
+# its remaining lifetime as ttl. With --history every legacy row is also copied
+# (without the code itself) into MINC_OTP_HISTORY_CONTAINER.
+#
+# Usage (from minc-vegu-backend/, with COSMOS_URI / COSMOS_KEY / COSMOS_DB set):
+#   python -m scripts.migrate_otp_store --dry-run
+#   python -m scripts.migrate_otp_store [--legacy minc_otp_log] [--history]
+
+import argparse
+import logging
+from datetime import datetime, timezone
+
+from shared.cosmos_client import get_container
+from shared.email_otp import (
+    COSMOS_DB,
+    OTP_STORE_CONTAINER,
+    OTP_HISTORY_CONTAINER,
+    OTP_HISTORY_TTL_DAYS,
+    OTP_TTL_GRACE_S,
+    otp_doc_id,
+)
+
+
+def _parse(ts):
+    try:
+        dt = datetime.fromisoformat((ts or "").replace("Z", "+00:00"))
+    except Exception:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Migrate legacy OTP log into the point-read OTP store.")
+    ap.add_argument("--legacy", default="minc_otp_log", help="legacy container name")
+    ap.add_argument("--history", action="store_true", help="copy legacy rows into the history container")
+    ap.add_argument("--dry-run", action="store_true", help="scan and report only")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.history and not OTP_HISTORY_CONTAINER:
+        ap.error("--history needs MINC_OTP_HISTORY_CONTAINER to be set")
+
+    legacy = get_container(COSMOS_DB, args.legacy)
+    store = get_container(COSMOS_DB, OTP_STORE_CONTAINER)
+    history = get_container(COSMOS_DB, OTP_HISTORY_CONTAINER) if args.history else None
+
+    now = datetime.now(timezone.utc)
+    latest = {}
+    scanned = copied = 0
+    q = "SELECT c.id, c.email, c.otp, c.type, c.context, c.created_at, c.expires_at FROM c"
+    for row in legacy.query_items(query=q, enable_cross_partition_query=True):
+        scanned += 1
+        email = (row.get("email") or "").lower()
+        if not email:
+            continue
+        key = (email, row.get("context") or "minc_login")
+        prev = latest.get(key)
+        if prev is None or (row.get("created_at") or "") > (prev.get("created_at") or ""):
+            latest[key] = row
+        if history is not None and not args.dry_run:
+            history.upsert_item({
+                "id": row["id"],
+                "email": email,
+                "context": key[1],
+                "event": "sent",
+                "reason": None,
+                "ts": row.get("created_at"),
+                "ttl": OTP_HISTORY_TTL_DAYS * 86400,
+                "migrated": True,
+            })
+            copied += 1
+
+    live = 0
+    for (email, context), row in latest.items():
+        exp = _parse(row.get("expires_at"))
+        if not exp or exp <= now:
+            continue
+        live += 1
+        if args.dry_run:
+            continue
+        store.upsert_item({
+            "id": otp_doc_id(context),
+            "email": email,
+            "otp": row.get("otp"),
+            "type": row.get("type") or "email",
+            "context": context,
+            "created_at": row.get("created_at"),
+            "expires_at": row.get("expires_at"),
+            "ttl": int((exp - now).total_seconds()) + OTP_TTL_GRACE_S,
+        })
+
+    logging.info("scanned=%d pairs=%d live_migrated=%d history_copied=%d dry_run=%s",
+                 scanned, len(latest), live, copied, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# shared/admission.py v1.0
+#
+# Admission control for the instrumented HTTP handlers, so a burst of
+# expensive calls cannot take every worker thread while cheap reads queue
+# behind them. Checked by shared.instrumentation.instrument_route before the
+# handler runs; handlers need no changes.
+# - every route belongs to a priority class: auth > point (single-document
+#   reads / writes) > search > bulk (bulk updates, exports). Unlisted routes
+#   are "point"; queue-triggered functions and the liveness routes
+#   (MINC_ADMIT_EXEMPT) are never limited
+# - a class is admitted while
+#     requests in flight on this instance < MINC_ADMIT_CAPACITY × share
+#     requests of the class in flight      < limit        (0 = no limit)
+#     requests of the route in flight      < its MINC_ADMIT_ROUTE_LIMITS entry
+#     no request of a higher class is waiting (unless that class is at its limit)
+#   so lower classes leave headroom to higher ones (shares shrink by priority)
+# - otherwise the request waits up to queue_ms (at most `queue` waiters per
+#   class; a waiter holds a worker thread, so keep both small for the heavy
+#   classes), then is refused: 429 + Retry-After when its own route is at its
+#   limit, 503 + Retry-After when the class or the instance is saturated.
+#   queue_ms=0 refuses at once
+#
+# Env:
+#   MINC_ADMIT                 0 disables admission control (default 1)
+#   MINC_ADMIT_CAPACITY        concurrent requests per instance, default the
+#                              worker's thread count: PYTHON_THREADPOOL_THREAD_COUNT,
+#                              else ThreadPoolExecutor's min(32, cpus + 4)
+#   MINC_ADMIT_EXEMPT          routes never limited, default "health,health-details"
+#   MINC_ADMIT_AUTH / _POINT / _SEARCH / _BULK
+#                              per-class overrides, e.g. "limit=8,share=0.5,queue_ms=200,queue=2"
+#                              defaults: auth    limit=16 share=1.0 queue_ms=2000 queue=16
+#                                        point   limit=0  share=0.9 queue_ms=1000 queue=16
+#                                        search  limit=12 share=0.6 queue_ms=250  queue=4
+#                                        bulk    limit=2  share=0.3 queue_ms=0    queue=0
+#   MINC_ADMIT_ROUTES          extra route → class pairs, e.g. "minc-slow-queries=bulk"
+#   MINC_ADMIT_ROUTE_LIMITS    per-route concurrency, default "vegu-complaints-search=6"
+#   MINC_ADMIT_RETRY_AFTER_S   Retry-After on refusals, default 1
+
+import os
+import time
+import threading
+from typing import Any, Dict, Optional
+
+import azure.functions as func
+
+from . import metrics
+from .http_response import json_response
+
+ADMIT_ENABLED  = os.getenv("MINC_ADMIT", "1") != "0"
+
+
+def _default_capacity() -> int:
+    """Threads the Python worker runs handlers on (its executor's default when unset)."""
+    n = os.getenv("PYTHON_THREADPOOL_THREAD_COUNT")
+    if n and n.isdigit() and int(n) > 0:
+        return int(n)
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+ADMIT_CAPACITY = int(os.getenv("MINC_ADMIT_CAPACITY") or _default_capacity())
+ADMIT_RETRY_AFTER_S = int(os.getenv("MINC_ADMIT_RETRY_AFTER_S", 1))
+# liveness must answer under load: a busy instance is not a dead one
+EXEMPT_ROUTES = frozenset(r.strip() for r in os.getenv("MINC_ADMIT_EXEMPT", "health,health-details").split(",") if r.strip())
+
+# highest priority first
+CLASS_ORDER = ("auth", "point", "search", "bulk")
+
+_CLASS_DEFAULTS: Dict[str, Dict[str, float]] = {
+    "auth":   {"limit": 16, "share": 1.0, "queue_ms": 2000, "queue": 16},
+    "point":  {"limit": 0,  "share": 0.9, "queue_ms": 1000, "queue": 16},
+    "search": {"limit": 12, "share": 0.6, "queue_ms": 250,  "queue": 4},
+    "bulk":   {"limit": 2,  "share": 0.3, "queue_ms": 0,    "queue": 0},
+}
+
+ROUTE_CLASS: Dict[str, str] = {
+    "minc-login-init": "auth",
+    "minc-login-password": "auth",
+    "minc-send-email-otp": "auth",
+    "minc-verify-email-otp": "auth",
+    "minc-logout": "auth",
+    "vegu-complaints-search": "search",
+    "vegu-users-search": "search",
+    "vegu-institutions-search": "search",
+    "vegu-responders-search": "search",
+    "vegu-users-bulk-update": "bulk",
+    "vegu-responders-bulk-update": "bulk",
+}
+
+
+def _pairs(raw: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for part in (raw or "").split(","):
+        k, sep, v = part.partition("=")
+        if sep and k.strip():
+            out[k.strip()] = v.strip()
+    return out
+
+
+def _class_config(name: str) -> Dict[str, float]:
+    cfg = dict(_CLASS_DEFAULTS[name])
+    for k, v in _pairs(os.getenv(f"MINC_ADMIT_{name.upper()}", "")).items():
+        if k in cfg:
+            try:
+                cfg[k] = float(v)
+            except ValueError:
+                pass
+    cfg["slots"] = max(1, int(ADMIT_CAPACITY * cfg["share"]))
+    return cfg
+
+
+CLASSES: Dict[str, Dict[str, float]] = {name: _class_config(name) for name in CLASS_ORDER}
+ROUTE_CLASS.update({r: c for r, c in _pairs(os.getenv("MINC_ADMIT_ROUTES", "")).items() if c in CLASSES})
+ROUTE_LIMITS: Dict[str, int] = {r: int(n) for r, n in
+                                _pairs(os.getenv("MINC_ADMIT_ROUTE_LIMITS", "vegu-complaints-search=6")).items()
+                                if n.isdigit() and int(n) > 0}
+
+metrics.counter("minc_admission_total", "Admission decisions by route, class and outcome.")
+metrics.histogram("minc_admission_wait_seconds", "Time queued before admission, by class.")
+
+_cv = threading.Condition()
+_total = [0]
+_by_class: Dict[str, int] = {c: 0 for c in CLASS_ORDER}
+_waiting: Dict[str, int] = {c: 0 for c in CLASS_ORDER}
+_by_route: Dict[str, int] = {}
+
+
+def class_of(route: str) -> str:
+    return ROUTE_CLASS.get(route, "point")
+
+
+def _blocked(route: str, cls: str) -> Optional[str]:
+    """Why `route` cannot start now (None: it can). Caller holds _cv."""
+    cfg = CLASSES[cls]
+    limit = ROUTE_LIMITS.get(route)
+    if limit and _by_route.get(route, 0) >= limit:
+        return "route"
+    if cfg["limit"] and _by_class[cls] >= cfg["limit"]:
+        return "class"
+    if _total[0] >= cfg["slots"]:
+        return "capacity"
+    for higher in CLASS_ORDER[:CLASS_ORDER.index(cls)]:
+        # waiters of a class at its own limit would not get this slot anyway
+        h = CLASSES[higher]
+        if _waiting[higher] and not (h["limit"] and _by_class[higher] >= h["limit"]):
+            return "priority"
+    return None
+
+
+def _take(route: str, cls: str) -> None:
+    _total[0] += 1
+    _by_class[cls] += 1
+    _by_route[route] = _by_route.get(route, 0) + 1
+
+
+def _refuse(route: str, cls: str, reason: str) -> func.HttpResponse:
+    metrics.inc("minc_admission_total", {"route": route, "class": cls, "outcome": f"rejected_{reason}"})
+    status = 429 if reason == "route" else 503
+    return json_response({"success": False, "error": "busy", "reason": reason, "class": cls,
+                          "retryAfterS": ADMIT_RETRY_AFTER_S}, status,
+                         headers={"Retry-After": str(ADMIT_RETRY_AFTER_S)})
+
+
+def _limited(route: str) -> bool:
+    return ADMIT_ENABLED and not route.startswith("queue:") and route not in EXEMPT_ROUTES
+
+
+def admit(route: str) -> Optional[func.HttpResponse]:
+    """None when the request may run (release(route) afterwards), else the refusal to send."""
+    if not _limited(route):
+        return None
+    cls = class_of(route)
+    reason = _wait_for_slot(route, cls)
+    return None if reason is None else _refuse(route, cls, reason)
+
+
+def _wait_for_slot(route: str, cls: str) -> Optional[str]:
+    """Takes a slot and returns None, or returns why none was free in time."""
+    cfg = CLASSES[cls]
+    with _cv:
+        reason = _blocked(route, cls)
+        if reason is None:
+            _take(route, cls)
+            metrics.inc("minc_admission_total", {"route": route, "class": cls, "outcome": "admitted"})
+            return None
+        if cfg["queue_ms"] <= 0 or _waiting[cls] >= cfg["queue"]:
+            return reason
+        t0 = time.monotonic()
+        deadline = t0 + cfg["queue_ms"] / 1000.0
+        _waiting[cls] += 1
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return reason
+                _cv.wait(remaining)
+                reason = _blocked(route, cls)
+                if reason is None:
+                    _take(route, cls)
+                    metrics.inc("minc_admission_total", {"route": route, "class": cls, "outcome": "queued"})
+                    metrics.observe("minc_admission_wait_seconds", time.monotonic() - t0, {"class": cls})
+                    return None
+        finally:
+            _waiting[cls] -= 1
+            _cv.notify_all()   # lower classes may have been held back by this waiter
+
+
+def release(route: str) -> None:
+    if not _limited(route):
+        return
+    cls = class_of(route)
+    with _cv:
+        _total[0] -= 1
+        _by_class[cls] -= 1
+        _by_route[route] = _by_route.get(route, 1) - 1
+        _cv.notify_all()
+
+
+def snapshot() -> Dict[str, Any]:
+    """In flight / waiting per class, for /api/metrics and the deep health check."""
+    with _cv:
+        return {"enabled": ADMIT_ENABLED, "capacity": ADMIT_CAPACITY, "inFlight": _total[0],
+                "classes": {c: {"inFlight": _by_class[c], "waiting": _waiting[c],
+                                "limit": int(CLASSES[c]["limit"]), "slots": int(CLASSES[c]["slots"])}
+                            for c in CLASS_ORDER}}
@@ -0,0 +1,82 @@
+# shared/audit_log.py v1.0
+#
+# Append-only audit trail (replaces ever-growing adminNotes strings).
+# Container: COSMOS_AUDIT_CONTAINER (default 'minc_audit_log'), DB: COSMOS_DB
+# PK: /subject_id  — one partition per user / responder / institution
+# Retention: per-item `ttl` (container needs Time to Live = On, default -1)
+
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from .cosmos_client import audit_container
+
+AUDIT_TTL_DAYS = int(os.getenv("MINC_AUDIT_TTL_DAYS", 365))
+AUDIT_PAGE_MAX = 100
+
+
+def record_event(
+    subject_id: str,
+    subject_type: str,
+    action: str,
+    message: str = "",
+    details: Optional[Dict[str, Any]] = None,
+    actor: Optional[str] = None,
+) -> bool:
+    """
+    Best-effort insert of one audit event. Never raises: an audit hiccup must
+    not fail the login / update that triggered it.
+    """
+    if not subject_id:
+        return False
+    now = datetime.now(timezone.utc)
+    doc = {
+        # time-prefixed id keeps ids unique and roughly ordered inside a partition
+        "id": f"{now.strftime('%Y%m%dT%H%M%S%f')}-{uuid4().hex[:8]}",
+        "subject_id": subject_id,
+        "subject_type": subject_type,
+        "action": action,
+        "message": message,
+        "details": details or {},
+        "actor": actor or "system",
+        "ts": now.isoformat(),
+    }
+    if AUDIT_TTL_DAYS > 0:
+        doc["ttl"] = AUDIT_TTL_DAYS * 86400
+    try:
+        audit_container().create_item(doc)
+        return True
+    except Exception:
+        logging.exception("[AUDIT] record_event failed subject=%s action=%s", subject_id, action)
+        return False
+
+
+def changed_fields(before: Dict[str, Any], patch: Dict[str, Any], skip=("updated_at",)) -> Dict[str, Any]:
+    """{field: {"from": old, "to": new}} for patch keys whose value actually changes."""
+    out = {}
+    for k, v in patch.items():
+        if k in skip or before.get(k) == v:
+            continue
+        out[k] = {"from": before.get(k), "to": v}
+    return out
+
+
+def list_events(subject_id: str, limit: int = 25, continuation: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Newest-first page of events for one subject (single-partition query).
+    Returns (items, continuation_token|None).
+    """
+    limit = max(1, min(int(limit or 25), AUDIT_PAGE_MAX))
+    q = ("SELECT c.id, c.subject_id, c.subject_type, c.action, c.message, c.details, c.actor, c.ts "
+         "FROM c WHERE c.subject_id=@s ORDER BY c.ts DESC")
+    pager = audit_container().query_items(
+        query=q,
+        parameters=[{"name": "@s", "value": subject_id}],
+        partition_key=subject_id,
+        max_item_count=limit,
+    ).by_page(continuation)
+    for page in pager:
+        return list(page), pager.continuation_token
+    return [], None
@@ -1,9 +1,14 @@
 # shared/auth.py
 import os
 import re
-import bcrypt
 from datetime import datetime, timedelta, timezone
 import azure.functions as func
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from .cosmos_client import users_partition_key, users_pk_select
+from .instrumentation import read_all
+from .audit_log import record_event
+from .password_pool import check_password, needs_rehash, schedule_rehash
+from .write_behind import queue_user_fields
 
 # === Identifier validation (case-insensitive) ===
 MINC_RE  = re.compile(r"^MM\d{2}[A-Z]\d{5}$", re.IGNORECASE)
@@ -99,10 +104,93 @@ def reset_failures(user: dict) -> dict:
     return user
 
 def verify_password(plain: str, user: dict) -> bool:
+    """bcrypt runs on the bounded pool; may raise password_pool.PasswordPoolBusy."""
     ph = user.get("passwordHash")
     if ph:
-        try:
-            return bcrypt.checkpw(plain.encode("utf-8"), ph.encode("utf-8"))
-        except Exception:
-            pass
+        return check_password(plain, ph)
     return False
+
+def upgrade_hash_if_needed(plain: str, user: dict) -> bool:
+    """After a successful check: move the stored hash to the target cost (background)."""
+    ph = user.get("passwordHash")
+    if not ph or not needs_rehash(ph) or not user.get("id"):
+        return False
+    uid, pk = user["id"], users_partition_key(user)
+    return schedule_rehash(plain, lambda new_hash: queue_user_fields(
+        {"passwordHash": new_hash}, user_id=uid, pk=pk))
+
+
+def find_identity(cont, email: str):
+    """Projected lookup of what a session needs (id, pk, mincId, roles) — not the whole doc."""
+    q = f"SELECT TOP 1 c.id, c.mincId, c.email, c.roles, c.status, {users_pk_select()} FROM c WHERE c.email = @em"
+    rows = read_all(cont.query_items(query=q, parameters=[{"name": "@em", "value": email}],
+                                 enable_cross_partition_query=True))
+    return rows[0] if rows else None
+
+# --- Atomic persistence (server-side patch; no full-document replace) ---
+_NOT_LOCKED = "FROM c WHERE NOT IS_DEFINED(c.status) OR IS_NULL(c.status) OR LOWER(c.status) != 'locked'"
+_IS_LOCKED  = "FROM c WHERE LOWER(c.status) = 'locked'"
+
+def _audit(user: dict, action: str, message: str, **details):
+    record_event(user.get("mincId") or user.get("id"), "minc_user", action, message, details)
+
+def record_failure(cont, user: dict):
+    """
+    Count one failed attempt with a server-side `incr`, so concurrent bad
+    passwords never lose increments. The attempt that reaches MAX_ATTEMPTS
+    locks the account with a conditional patch (only if not already locked).
+    Returns (user_after, newly_locked).
+    """
+    pk = users_partition_key(user)
+    now = datetime.now(timezone.utc)
+    user = cont.patch_item(item=user["id"], partition_key=pk, patch_operations=[
+        {"op": "incr", "path": "/failedLoginCount", "value": 1},
+        {"op": "set",  "path": "/lastFailedAt", "value": now.isoformat()},
+    ])
+    fails = _get_int(user, "failedLoginCount")
+    if fails < MAX_ATTEMPTS or account_status(user) == "locked":
+        return user, False
+
+    until_iso = (now + timedelta(hours=LOCKOUT_HOURS)).isoformat()
+    try:
+        user = cont.patch_item(item=user["id"], partition_key=pk, filter_predicate=_NOT_LOCKED, patch_operations=[
+            {"op": "set", "path": "/status", "value": "locked"},
+            {"op": "set", "path": "/lockoutUntil", "value": until_iso},
+        ])
+        _audit(user, "auto_lock", f"Account auto-locked after {fails} failed attempts.",
+               failedLoginCount=fails, lockoutUntil=until_iso)
+        return user, True
+    except CosmosHttpResponseError as e:
+        if e.status_code != 412:
+            raise
+        # A concurrent attempt locked it first; report the stored lock
+        return cont.read_item(item=user["id"], partition_key=pk), False
+
+def unlock_expired(cont, user: dict, note: str) -> dict:
+    """Auto-unlock after lockout expiry. Conditional, so concurrent steps unlock once."""
+    pk = users_partition_key(user)
+    try:
+        unlocked = cont.patch_item(item=user["id"], partition_key=pk, filter_predicate=_IS_LOCKED, patch_operations=[
+            {"op": "set", "path": "/status", "value": "active"},
+            {"op": "set", "path": "/failedLoginCount", "value": 0},
+            {"op": "set", "path": "/lockoutUntil", "value": None},
+        ])
+        _audit(user, "auto_unlock", note, lockoutUntil=user.get("lockoutUntil"))
+        return unlocked
+    except CosmosHttpResponseError as e:
+        if e.status_code != 412:
+            raise
+        return cont.read_item(item=user["id"], partition_key=pk)
+
+def clear_failures(cont, user: dict) -> dict:
+    """Reset counters on success; skips the write entirely when nothing changed."""
+    ops = []
+    if _get_int(user, "failedLoginCount") != 0:
+        ops.append({"op": "set", "path": "/failedLoginCount", "value": 0})
+    if user.get("lockoutUntil") is not None:
+        ops.append({"op": "set", "path": "/lockoutUntil", "value": None})
+    if account_status(user) != "active":
+        ops.append({"op": "set", "path": "/status", "value": "active"})
+    if not ops:
+        return user
+    return cont.patch_item(item=user["id"], partition_key=users_partition_key(user), patch_operations=ops)
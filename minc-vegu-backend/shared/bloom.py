@@ -0,0 +1,47 @@
+# shared/bloom.py v1.0
+#
+# Plain Bloom filter (bytearray bitset, double hashing over one blake2b digest).
+# Sized from (capacity, fp_rate):
+#   m = -n·ln(p) / ln(2)²  bits,  k = (m/n)·ln(2)  hash functions
+# No false negatives; false positives at ~fp_rate while len <= capacity.
+
+import math
+import hashlib
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        self.capacity = max(1, int(capacity))
+        self.fp_rate = min(max(fp_rate, 1e-9), 0.5)
+        self.m = max(64, int(math.ceil(-self.capacity * math.log(self.fp_rate) / (math.log(2) ** 2))))
+        self.k = max(1, int(round(self.m / self.capacity * math.log(2))))
+        self._bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def expected_fp_rate(self) -> float:
+        """Theoretical FP rate at the current fill: (1 - e^(-k·n/m))^k."""
+        return (1.0 - math.exp(-self.k * self.count / self.m)) ** self.k
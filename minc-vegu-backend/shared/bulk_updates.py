@@ -0,0 +1,184 @@
+# shared/bulk_updates.py v1.0
+#
+# Bulk status updates for responders / users.
+# - vg_ids are grouped by partition key (responders: institution_id, users: id)
+# - each partition group runs as one or more transactional batches of patch ops
+#   (no read → merge → replace round trips)
+# - groups run with bounded concurrency; every requested vg_id gets a result row
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+try:
+    # azure-cosmos >= 4.5 (transactional batch support)
+    from azure.cosmos.exceptions import CosmosBatchOperationError
+except Exception:
+    CosmosBatchOperationError = None
+
+from .vegu_cosmos_client import get_responders_container, get_user_container
+from .audit_log import record_event
+from .instrumentation import read_all, submit_in_context
+
+# Cosmos transactional batches are capped at 100 operations per partition key
+BATCH_MAX_OPS    = 100
+BULK_MAX_ITEMS   = int(os.getenv("VEGU_BULK_MAX_ITEMS", 1000))
+BULK_CONCURRENCY = int(os.getenv("VEGU_BULK_CONCURRENCY", 8))
+
+
+def _chunks(seq: List[Any], n: int):
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def _now_z() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _patch_ops(patch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"op": "set", "path": f"/{k}", "value": v} for k, v in patch.items()]
+
+
+def clean_vg_ids(raw: Any) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Return (unique vg_ids in request order, error)."""
+    if not isinstance(raw, list) or not raw:
+        return None, "vg_ids must be a non-empty list"
+    seen, out = set(), []
+    for v in raw:
+        if not isinstance(v, str) or not v.strip():
+            return None, "vg_ids must contain non-empty strings"
+        v = v.strip()
+        if v not in seen:
+            seen.add(v)
+            out.append(v)
+    if len(out) > BULK_MAX_ITEMS:
+        return None, f"Too many vg_ids (max {BULK_MAX_ITEMS})."
+    return out, None
+
+
+def _run_batch(container, pk: str, ids: List[Tuple[str, str]], ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Execute one transactional batch: `ids` is [(vg_id, doc_id)] inside partition `pk`.
+    The batch is all-or-nothing, so a failure marks every item in it.
+    """
+    batch = [("patch", (doc_id, ops)) for _, doc_id in ids]
+    try:
+        container.execute_item_batch(batch_operations=batch, partition_key=pk)
+        return [{"vg_id": vg, "success": True, "status": 200} for vg, _ in ids]
+    except Exception as e:
+        if CosmosBatchOperationError is not None and isinstance(e, CosmosBatchOperationError):
+            failed = getattr(e, "error_index", None)
+            responses = getattr(e, "operation_responses", None) or []
+            out = []
+            for i, (vg, _) in enumerate(ids):
+                code = (responses[i] or {}).get("statusCode") if i < len(responses) else None
+                if i == failed:
+                    error = "not_found" if code == 404 else f"cosmos_error:{code}"
+                    out.append({"vg_id": vg, "success": False, "status": code or 500, "error": error})
+                else:
+                    # rolled back because another op in the same batch failed
+                    out.append({"vg_id": vg, "success": False, "status": 424, "error": "batch_aborted"})
+            return out
+        if isinstance(e, CosmosHttpResponseError):
+            logging.warning("bulk batch failed pk=%s status=%s", pk, e.status_code)
+            return [{"vg_id": vg, "success": False, "status": e.status_code or 500,
+                     "error": f"cosmos_error:{e.status_code}"} for vg, _ in ids]
+        logging.exception("bulk batch failed pk=%s", pk)
+        return [{"vg_id": vg, "success": False, "status": 500, "error": "server_error"} for vg, _ in ids]
+
+
+def _execute(container, groups: Dict[str, List[Tuple[str, str]]], patch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ops = _patch_ops(patch)
+    jobs = [(pk, chunk) for pk, members in groups.items() for chunk in _chunks(members, BATCH_MAX_OPS)]
+    if not jobs:
+        return []
+    workers = max(1, min(BULK_CONCURRENCY, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # keep the request's route/RU accounting in the worker threads
+        futures = [submit_in_context(pool, _run_batch, container, pk, chunk, ops) for pk, chunk in jobs]
+        results: List[Dict[str, Any]] = []
+        for f in futures:
+            results.extend(f.result())
+    return results
+
+
+def _audit(subject_type: str, results: List[Dict[str, Any]], patch: Dict[str, Any], actor: Optional[str]) -> None:
+    """One audit event per updated record (best-effort, same bounded concurrency)."""
+    done = [r["vg_id"] for r in results if r.get("success")]
+    if not done:
+        return
+    details = {k: {"to": v} for k, v in patch.items() if k != "updated_at"}
+    with ThreadPoolExecutor(max_workers=max(1, min(BULK_CONCURRENCY, len(done)))) as pool:
+        for f in [submit_in_context(pool, record_event, vg, subject_type, "bulk_updated",
+                                    "Bulk update via MinC.", details, actor=actor) for vg in done]:
+            f.result()
+
+
+def _ordered(vg_ids: List[str], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    by_id = {r["vg_id"]: r for r in results}
+    return [by_id.get(v) or {"vg_id": v, "success": False, "status": 404, "error": "not_found"} for v in vg_ids]
+
+
+# ----- responders (PK /institution_id) -----
+
+def responder_ids_for_institution(institution_id: str) -> List[str]:
+    """All responder vg_ids inside one institution partition (single-partition query)."""
+    c = get_responders_container()
+    q = "SELECT c.id, c.vg_id FROM c WHERE c.institution_id=@pk"
+    rows = c.query_items(query=q, parameters=[{"name": "@pk", "value": institution_id}],
+                         partition_key=institution_id)
+    return [r.get("vg_id") or r.get("id") for r in rows if r.get("vg_id") or r.get("id")]
+
+
+def bulk_update_responders(vg_ids: List[str], patch: Dict[str, Any], actor: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Apply `patch` to each responder. One projected cross-partition query resolves
+    (id, institution_id) for all vg_ids; writes are per-partition batches.
+    """
+    c = get_responders_container()
+    q = ("SELECT c.id, c.vg_id, c.institution_id FROM c "
+         "WHERE ARRAY_CONTAINS(@ids, c.vg_id) OR ARRAY_CONTAINS(@ids, c.id)")
+    rows = read_all(c.query_items(query=q, parameters=[{"name": "@ids", "value": vg_ids}],
+                              enable_cross_partition_query=True))
+
+    wanted = set(vg_ids)
+    groups: Dict[str, List[Tuple[str, str]]] = {}
+    missing_pk: List[Dict[str, Any]] = []
+    seen = set()
+    for r in rows:
+        vg = r.get("vg_id") if r.get("vg_id") in wanted else r.get("id")
+        if vg in seen:
+            continue
+        seen.add(vg)
+        pk = r.get("institution_id")
+        if not pk:
+            missing_pk.append({"vg_id": vg, "success": False, "status": 422,
+                               "error": "Responder missing partition key (institution_id)"})
+            continue
+        groups.setdefault(pk, []).append((vg, r["id"]))
+
+    stamped = dict(patch, updated_at=_now_z())
+    results = _execute(c, groups, stamped)
+    _audit("responder", results, stamped, actor)
+    return _ordered(vg_ids, results + missing_pk)
+
+
+# ----- users (PK /id, value == vg_id) -----
+
+def bulk_update_users(vg_ids: List[str], patch: Dict[str, Any], actor: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Users are partitioned by their own id, so every vg_id is its own batch."""
+    c = get_user_container()
+    groups = {vg: [(vg, vg)] for vg in vg_ids}
+    stamped = dict(patch, updated_at=_now_z())
+    results = _execute(c, groups, stamped)
+    _audit("vegu_user", results, stamped, actor)
+    return _ordered(vg_ids, results)
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    ok = sum(1 for r in results if r.get("success"))
+    return {"total": len(results), "succeeded": ok, "failed": len(results) - ok}
@@ -2,26 +2,34 @@
 import os
 from functools import lru_cache
 from azure.cosmos import CosmosClient
+from .config import PARTITION_KEY
+from . import regions, resilience
+from .instrumentation import instrument
 
 COSMOS_URI_ENV = "COSMOS_URI"
 COSMOS_KEY_ENV = "COSMOS_KEY"
 COSMOS_DB_ENV = "COSMOS_DB"
 COSMOS_USERS_CONTAINER_ENV = "COSMOS_USERS_CONTAINER"
 COSMOS_OTP_CONTAINER_ENV = "COSMOS_OTP_CONTAINER"
+COSMOS_USERS_PK_ENV = "COSMOS_USERS_PK_PATH"
+COSMOS_AUDIT_CONTAINER_ENV = "COSMOS_AUDIT_CONTAINER"
 
 DEFAULT_DB = "minc"
 DEFAULT_USERS_CONTAINER = "minc_users"
 DEFAULT_OTP_CONTAINER = "minc_otp_log"
+DEFAULT_AUDIT_CONTAINER = "minc_audit_log"
 
 @lru_cache(maxsize=1)
 def get_client() -> CosmosClient:
     uri = os.getenv(COSMOS_URI_ENV)
     key = os.getenv(COSMOS_KEY_ENV)
-    return CosmosClient(uri, credential=key)
+    return CosmosClient(uri, credential=key, **resilience.sdk_retry_kwargs(), **regions.client_kwargs())
 
+@lru_cache(maxsize=64)
 def get_container(db_name: str, container_name: str):
+    # one (instrumented) proxy per container; RU/latency go to shared.metrics
     db = get_client().get_database_client(os.getenv(COSMOS_DB_ENV, db_name))
-    return db.get_container_client(container_name)
+    return instrument(db.get_container_client(container_name), container_name)
 
 def users_container():
     return get_container(os.getenv(COSMOS_DB_ENV, DEFAULT_DB),
@@ -30,3 +38,20 @@ def users_container():
 def otp_container():
     return get_container(os.getenv(COSMOS_DB_ENV, DEFAULT_DB),
                          os.getenv(COSMOS_OTP_CONTAINER_ENV, DEFAULT_OTP_CONTAINER))
+
+def audit_container():
+    return get_container(os.getenv(COSMOS_DB_ENV, DEFAULT_DB),
+                         os.getenv(COSMOS_AUDIT_CONTAINER_ENV, DEFAULT_AUDIT_CONTAINER))
+
+def users_pk_select(alias: str = "c") -> str:
+    """Projection of the minc_users partition key path, e.g. 'c.domain'."""
+    path = os.getenv(COSMOS_USERS_PK_ENV, PARTITION_KEY)
+    return alias + "." + path.strip("/").replace("/", ".")
+
+def users_partition_key(user: dict):
+    """Partition key value of a minc_users doc (path from config, e.g. /domain)."""
+    path = os.getenv(COSMOS_USERS_PK_ENV, PARTITION_KEY)
+    val = user
+    for part in path.strip("/").split("/"):
+        val = val.get(part) if isinstance(val, dict) else None
+    return val
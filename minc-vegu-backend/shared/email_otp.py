@@ -1,19 +1,23 @@
 # shared/email_otp.py
 import os, logging, random
-import sendgrid
 
-from python_http_client import exceptions as sg_exc
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from .cosmos_client import get_container, users_container
+from .instrumentation import read_all
+from . import login_flow, identifier_filter
+from .email_outbox import build_job, enqueue, send_now, RetryableSendError, PermanentSendError
 
 COSMOS_DB = os.getenv("COSMOS_DB", "minc")
-OTP_CONTAINER = os.getenv("MINC_OTP_CONTAINER", "minc_otp_log")  # <-- you named it this
-SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
-OTP_FROM_EMAIL = os.getenv("OTP_FROM_EMAIL", "otp@mihirmobile.com")
-OTP_FROM_NAME  = os.getenv("OTP_FROM_NAME", "MinC OTP Service")
+# OTP store: PK /email, id == context → the live code is a single point read.
+# Container must have Time to Live = On (default -1); each doc carries its own ttl.
+OTP_STORE_CONTAINER = os.getenv("MINC_OTP_STORE_CONTAINER", "minc_otp")
+# Optional attempt history (sent / verified / failed); disabled when unset
+OTP_HISTORY_CONTAINER = os.getenv("MINC_OTP_HISTORY_CONTAINER", "")
+OTP_TTL_MINUTES = int(os.getenv("MINC_OTP_TTL_MINUTES", 5))
+OTP_TTL_GRACE_S = 60   # Cosmos TTL purge is lazy; expires_at is still checked in code
+OTP_HISTORY_TTL_DAYS = int(os.getenv("MINC_OTP_HISTORY_TTL_DAYS", 30))
 
 # Optional fixed OTP for local/dev (leave empty in prod)
 FIXED_OTP = os.getenv("MINC_OTP_FIXED", "")
@@ -24,120 +28,135 @@ def _otp(n=5):
     lo, hi = 10**(n-1), 10**n - 1
     return str(random.randint(lo, hi))
 
-def _email_exists(email: str) -> bool:
+def otp_doc_id(context: str) -> str:
+    """Cosmos ids may not contain / \\ ? # — keep the context readable otherwise."""
+    ctx = (context or "default").strip()
+    return "".join("_" if ch in "/\\?#" else ch for ch in ctx)
+
+def _history(email: str, context: str, event: str, reason: str | None = None) -> None:
+    if not OTP_HISTORY_CONTAINER:
+        return
+    try:
+        get_container(COSMOS_DB, OTP_HISTORY_CONTAINER).create_item({
+            "id": str(uuid4()),
+            "email": email,
+            "context": context,
+            "event": event,
+            "reason": reason,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "ttl": OTP_HISTORY_TTL_DAYS * 86400,
+        })
+    except Exception:
+        logging.exception("[OTP] history write failed")
+
+def _email_exists(email: str, flow_id: str | None = None) -> bool:
+    # the login flow already resolved this user at init → no query
+    if login_flow.peek(flow_id, email) is not None:
+        return True
+    # Bloom pre-check: definite miss → no cross-partition query
+    if not identifier_filter.might_exist(email.lower()):
+        return False
     # match the same container used by login
     container = users_container()
     q = "SELECT TOP 1 c.id FROM c WHERE c.email = @e"
-    rows = list(container.query_items(
+    rows = read_all(container.query_items(
         query=q,
         parameters=[{"name":"@e","value":email}],
         enable_cross_partition_query=True
     ))
+    if not rows:
+        identifier_filter.note_false_positive()
     return len(rows) > 0
 
-def send_email_otp(email: str, context: str = "minc_login") -> tuple[bool, str | None]:
+def send_email_otp(email: str, context: str = "minc_login", outbox=None,
+                   flow_id: str | None = None) -> tuple[bool, str | None]:
     """
     Returns (ok, reason). On success, reason is None.
     Context 'minc_login' requires the user to exist.
+    With `outbox` (queue output binding) the email is only enqueued; the
+    outbox worker delivers it. Without it the email is sent inline.
     """
     try:
-        if context == "minc_login" and not _email_exists(email):
+        if context == "minc_login" and not _email_exists(email, flow_id):
             return (False, "Email not found for login.")
 
         code = _otp(5)
         now = datetime.now(timezone.utc)
-        expires = now + timedelta(minutes=5)
+        expires = now + timedelta(minutes=OTP_TTL_MINUTES)
 
-        # Store OTP record first (lets us test even if email fails)
-        otp_container = get_container(COSMOS_DB, OTP_CONTAINER)
+        # Store OTP record first (lets us test even if email fails).
+        # Upsert replaces any previous code for the same (email, context).
+        otp_container = get_container(COSMOS_DB, OTP_STORE_CONTAINER)
         doc = {
-            "id": str(uuid4()),
+            "id": otp_doc_id(context),
             "email": email.lower(),
             "otp": code,
             "type": "email",
             "context": context,
             "created_at": now.isoformat(),
             "expires_at": expires.isoformat(),
+            "ttl": OTP_TTL_MINUTES * 60 + OTP_TTL_GRACE_S,
         }
-        otp_container.create_item(doc)
+        otp_container.upsert_item(doc)
+        _history(doc["email"], context, "sent")
 
         if FIXED_OTP:
             logging.info("[OTP] Using FIXED_OTP=%s (no email sent).", code)
             return (True, None)
 
-        if not SENDGRID_API_KEY:
-            return (False, "SENDGRID_API_KEY not set.")
-
-        msg = Mail(
-            from_email=Email(OTP_FROM_EMAIL, OTP_FROM_NAME),
-            to_emails=email,
+        job = build_job(
+            to=email,
             subject="Your MinC Email OTP",
-            plain_text_content=(
+            text=(
                 f"Your 5-digit OTP is: {code}\n\n"
-                "It will expire in 5 minutes.\n"
+                f"It will expire in {OTP_TTL_MINUTES} minutes.\n"
                 f"Generated at: {now.strftime('%Y-%m-%d %H:%M:%S %Z')} UTC\n"
             ),
+            kind="otp",
         )
+        if outbox is not None:
+            enqueue(outbox, job)
+            return (True, None)
 
         try:
-            sg = sendgrid.SendGridAPIClient(api_key=SENDGRID_API_KEY)
-            resp = sg.send(msg)  # type: ignore
-            status = getattr(resp, "status_code", None)
-            body_b = getattr(resp, "body", b"")
-            body = body_b.decode("utf-8", "ignore") if isinstance(body_b, (bytes, bytearray)) else str(body_b)
-            headers = dict(getattr(resp, "headers", {}) or {})
-
-            logging.info("[OTP] SendGrid status=%s", status)
-            if status in (200, 202):
-                return (True, None)
-
-            # Log a concise, explicit reason
-            logging.error("[OTP] SendGrid non-2xx. status=%s body=%s headers=%s",
-                          status, body[:500], {k: headers[k] for k in list(headers)[:6]})
-            return (False, f"SendGrid status {status}: {body[:200]}")
-        except sg_exc.HTTPError as e:
-            # This captures 403/401/etc with the API’s JSON error details
-            status = getattr(e, "status_code", 0)
-            body_b = getattr(e, "body", b"")
-            body = body_b.decode("utf-8", "ignore") if isinstance(body_b, (bytes, bytearray)) else str(body_b)
-            logging.error("[OTP] SendGrid HTTPError %s body=%s", status, body[:1000])
-            # surface a short reason to the caller
-            return (False, f"SendGrid {status}: {body[:200]}")
+            send_now(job)
+            return (True, None)
+        except (RetryableSendError, PermanentSendError) as e:
+            logging.error("[OTP] inline send failed: %s", e)
+            return (False, str(e))
 
     except Exception as e:
         logging.exception("[OTP] send_email_otp failed")
         return (False, str(e))
 
 def verify_email_otp(email: str, otp: str, context: str = "minc_login") -> tuple[bool, str | None]:
-    """Return (ok, reason). Looks up latest OTP for the email."""
+    """Return (ok, reason). Point-reads the live OTP for (email, context)."""
     try:
-        otp_container = get_container(COSMOS_DB, OTP_CONTAINER)
-        q = "SELECT TOP 1 * FROM c WHERE c.email=@e ORDER BY c.created_at DESC"
-        rows = list(otp_container.query_items(
-            query=q,
-            parameters=[{"name":"@e","value":email.lower()}],
-            enable_cross_partition_query=True
-        ))
-        if not rows:
-            return (False, "No OTP found.")
-
-        item = rows[0]
-        if (item.get("context") or "") != context:
-            return (False, f"OTP was not generated for {context} context.")
-
-        if (item.get("otp") or "") != otp:
-            return (False, "Incorrect OTP.")
-
-        exp = item.get("expires_at")
-        if exp:
-            try:
-                exp_dt = datetime.fromisoformat(exp.replace("Z","")).replace(tzinfo=timezone.utc)
-                if datetime.now(timezone.utc) > exp_dt:
-                    return (False, "OTP has expired.")
-            except Exception:
-                pass
-
-        return (True, None)
+        email = email.lower()
+        ok, reason = _check_otp(email, otp, context)
+        _history(email, context, "verified" if ok else "failed", reason)
+        return (ok, reason)
     except Exception as e:
         logging.exception("[OTP] verify_email_otp failed")
         return (False, str(e))
+
+def _check_otp(email: str, otp: str, context: str) -> tuple[bool, str | None]:
+    otp_container = get_container(COSMOS_DB, OTP_STORE_CONTAINER)
+    try:
+        item = otp_container.read_item(item=otp_doc_id(context), partition_key=email)
+    except CosmosResourceNotFoundError:
+        return (False, "No OTP found.")
+
+    if (item.get("otp") or "") != otp:
+        return (False, "Incorrect OTP.")
+
+    exp = item.get("expires_at")
+    if exp:
+        try:
+            exp_dt = datetime.fromisoformat(exp.replace("Z","")).replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) > exp_dt:
+                return (False, "OTP has expired.")
+        except Exception:
+            pass
+
+    return (True, None)
@@ -0,0 +1,203 @@
+# shared/email_outbox.py v1.0
+#
+# Email outbox: HTTP handlers enqueue a job (Storage queue output binding) and
+# return; the queue-triggered worker (minc_email_outbox_worker) delivers it.
+#
+# - Retries: a retryable failure (network, 429, 5xx) raises, so the Functions
+#   host re-delivers the message (host.json queues.maxDequeueCount); after the
+#   last attempt the host moves it to '<queue>-poison' (dead letter).
+# - Permanent failures (other 4xx) are dead-lettered right away by the worker;
+#   so is the last retryable attempt (MINC_EMAIL_MAX_ATTEMPTS, keep it equal to
+#   maxDequeueCount), whatever the error, so the host never moves the job to the
+#   poison queue itself. Jobs that are not JSON objects with REQUIRED_FIELDS are
+#   dead-lettered on first sight.
+# - Dead letters are redacted (dead_letter_record): the body holds the OTP in
+#   plaintext and the poison queue keeps messages indefinitely; recipient,
+#   kind, subject and id are kept for follow-up.
+# - Transports (MINC_EMAIL_TRANSPORT):
+#     sendgrid  v3 REST over one pooled keep-alive HTTP session per process;
+#               SENDGRID_API_BASE can point at a local HTTP sink for tests
+#     smtp      plain SMTP (MINC_SMTP_HOST / MINC_SMTP_PORT), e.g. a local
+#               MailHog / aiosmtpd sink
+# - Delivery latency (enqueued → accepted by provider) is kept in DELIVERY_STATS.
+
+import os
+import json
+import time
+import logging
+import smtplib
+import threading
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import tracing
+
+OUTBOX_QUEUE        = os.getenv("MINC_EMAIL_OUTBOX_QUEUE", "minc-email-outbox")
+OUTBOX_POISON_QUEUE = f"{OUTBOX_QUEUE}-poison"
+OUTBOX_CONNECTION   = "AzureWebJobsStorage"   # app setting name, not the value
+
+EMAIL_TRANSPORT   = (os.getenv("MINC_EMAIL_TRANSPORT") or "sendgrid").strip().lower()
+SENDGRID_API_KEY  = os.getenv("SENDGRID_API_KEY")
+SENDGRID_API_BASE = os.getenv("SENDGRID_API_BASE", "https://api.sendgrid.com").rstrip("/")
+SMTP_HOST = os.getenv("MINC_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("MINC_SMTP_PORT", 1025))
+SEND_TIMEOUT_S = float(os.getenv("MINC_EMAIL_SEND_TIMEOUT_S", 10))
+MAX_ATTEMPTS   = int(os.getenv("MINC_EMAIL_MAX_ATTEMPTS", 5))   # host.json queues.maxDequeueCount
+OTP_FROM_EMAIL = os.getenv("OTP_FROM_EMAIL", "otp@mihirmobile.com")
+OTP_FROM_NAME  = os.getenv("OTP_FROM_NAME", "MinC OTP Service")
+
+# latency buckets in ms (upper bounds); exported by the metrics layer
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+DELIVERY_STATS: Dict[str, Any] = {
+    "sent": 0, "retried": 0, "dead_lettered": 0,
+    "latency_ms_sum": 0.0,
+    "latency_ms_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+}
+_stats_lock = threading.Lock()
+
+
+class RetryableSendError(Exception):
+    """Transient provider failure; raise out of the trigger so the host retries."""
+
+
+class PermanentSendError(Exception):
+    """The provider rejected the message; retrying will not help."""
+
+
+def build_job(to: str, subject: str, text: str, kind: str = "generic") -> Dict[str, Any]:
+    return {
+        "id": str(uuid4()),
+        "kind": kind,
+        "to": to,
+        "from_email": OTP_FROM_EMAIL,
+        "from_name": OTP_FROM_NAME,
+        "subject": subject,
+        "text": text,
+        "enqueued_at": time.time(),
+    }
+
+
+def enqueue(outbox, job: Dict[str, Any]) -> None:
+    """`outbox` is the func.Out[str] queue output binding of the calling function."""
+    outbox.set(json.dumps(job))
+
+
+# message content never goes to the poison queue
+REDACTED_FIELDS = ("text", "html")
+# what the transports read; build_job always sets them
+REQUIRED_FIELDS = ("to", "from_email", "from_name", "subject", "text")
+
+
+def malformed(job: Any) -> Optional[str]:
+    """Why `job` cannot be sent (None: it has the shape build_job produces)."""
+    if not isinstance(job, dict):
+        return f"job is {type(job).__name__}, not an object"
+    missing = [k for k in REQUIRED_FIELDS if not isinstance(job.get(k), str)]
+    return f"job missing {', '.join(missing)}" if missing else None
+
+
+def dead_letter_record(job: Dict[str, Any], reason: str, attempts: int) -> Dict[str, Any]:
+    """What the worker writes to the poison queue: the job without its content."""
+    record = {k: v for k, v in job.items() if k not in REDACTED_FIELDS}
+    record.update(reason=reason, dequeue_count=attempts, redacted=[k for k in REDACTED_FIELDS if k in job])
+    return record
+
+
+# ----- transports -----
+
+@lru_cache(maxsize=1)
+def _http_session() -> requests.Session:
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return s
+
+
+def _send_sendgrid(job: Dict[str, Any]) -> None:
+    if not SENDGRID_API_KEY:
+        raise PermanentSendError("SENDGRID_API_KEY not set.")
+    payload = {
+        "personalizations": [{"to": [{"email": job["to"]}]}],
+        "from": {"email": job["from_email"], "name": job["from_name"]},
+        "subject": job["subject"],
+        "content": [{"type": "text/plain", "value": job["text"]}],
+    }
+    try:
+        resp = _http_session().post(
+            f"{SENDGRID_API_BASE}/v3/mail/send",
+            json=payload,
+            headers={"Authorization": f"Bearer {SENDGRID_API_KEY}"},
+            timeout=SEND_TIMEOUT_S,
+        )
+    except requests.RequestException as e:
+        raise RetryableSendError(f"SendGrid transport error: {e}") from e
+
+    if resp.status_code in (200, 202):
+        return
+    body = (resp.text or "")[:200]
+    if resp.status_code == 429 or resp.status_code >= 500:
+        raise RetryableSendError(f"SendGrid status {resp.status_code}: {body}")
+    raise PermanentSendError(f"SendGrid status {resp.status_code}: {body}")
+
+
+def _send_smtp(job: Dict[str, Any]) -> None:
+    msg = EmailMessage()
+    msg["From"] = f'{job["from_name"]} <{job["from_email"]}>'
+    msg["To"] = job["to"]
+    msg["Subject"] = job["subject"]
+    msg.set_content(job["text"])
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SEND_TIMEOUT_S) as smtp:
+            smtp.send_message(msg)
+    except smtplib.SMTPRecipientsRefused as e:
+        # every recipient refused: one code per address
+        codes = [code for code, _ in e.recipients.values()]
+        if codes and all(500 <= c < 600 for c in codes):
+            raise PermanentSendError(f"SMTP recipients refused {codes}") from e
+        raise RetryableSendError(f"SMTP recipients refused {codes}") from e
+    except smtplib.SMTPResponseException as e:
+        if 400 <= e.smtp_code < 500:
+            raise RetryableSendError(f"SMTP {e.smtp_code}") from e
+        raise PermanentSendError(f"SMTP {e.smtp_code}") from e
+    except (OSError, smtplib.SMTPException) as e:
+        raise RetryableSendError(f"SMTP transport error: {e}") from e
+
+
+def send_now(job: Dict[str, Any]) -> None:
+    """Deliver one job synchronously. Raises RetryableSendError / PermanentSendError."""
+    with tracing.span(f"email.send {EMAIL_TRANSPORT}", {"minc.email.kind": job.get("kind") or "generic"}):
+        if EMAIL_TRANSPORT == "smtp":
+            _send_smtp(job)
+        else:
+            _send_sendgrid(job)
+    _record_delivery(job)
+
+
+# ----- stats -----
+
+def _record_delivery(job: Dict[str, Any]) -> None:
+    enq = job.get("enqueued_at")
+    latency_ms = max(0.0, (time.time() - float(enq)) * 1000.0) if enq else 0.0
+    idx = next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= b), len(LATENCY_BUCKETS_MS))
+    with _stats_lock:
+        DELIVERY_STATS["sent"] += 1
+        DELIVERY_STATS["latency_ms_sum"] += latency_ms
+        DELIVERY_STATS["latency_ms_buckets"][idx] += 1
+    logging.info("[OUTBOX] delivered id=%s kind=%s latency_ms=%.0f", job.get("id"), job.get("kind"), latency_ms)
+
+
+def note_retry(job: Optional[Dict[str, Any]], reason: str) -> None:
+    with _stats_lock:
+        DELIVERY_STATS["retried"] += 1
+    logging.warning("[OUTBOX] retryable failure id=%s: %s", (job or {}).get("id"), reason)
+
+
+def note_dead_letter(job: Optional[Dict[str, Any]], reason: str) -> None:
+    with _stats_lock:
+        DELIVERY_STATS["dead_lettered"] += 1
+    logging.error("[OUTBOX] dead-lettered id=%s: %s", (job or {}).get("id"), reason)
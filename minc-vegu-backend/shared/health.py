@@ -0,0 +1,208 @@
+# shared/health.py v1.0
+#
+# Deep health check: is this instance worth routing to?
+#   GET /api/health?deep=1          anonymous: status, reasons and warnings only
+#   GET /api/health-details         function key: the full report below
+# - dependency latency: one point read per Cosmos container of an id that
+#   does not exist (a 404 costs ~1 RU and proves the partition is reachable),
+#   run in parallel, bounded by MINC_HEALTH_PROBE_TIMEOUT_S
+# - results are cached MINC_HEALTH_TTL_S seconds; while one probe round runs,
+#   concurrent callers get the previous result instead of piling on
+# - saturation: requests in flight (shared.instrumentation), bcrypt pool queue
+#   depth, write-behind backlog, cache hit rates, and the share of Cosmos calls
+#   throttled (429) or failed over the recent window; any container circuit
+#   not closed (shared.resilience)
+# - status: "degraded" (503, the load balancer drains us) only for signals local
+#   to this instance: requests in flight, bcrypt queue depth; "down" (503) when
+#   no required container answers from here. Shared-dependency problems (a
+#   container failing or slow, account-wide 429 / error rates, open circuits)
+#   and the optional containers (audit, best-effort) are listed as warnings
+#   with status "warn" (200): every instance sees them, and draining all of
+#   them would turn a partial outage into a full one
+#
+# Env:
+#   MINC_HEALTH_TTL_S             probe cache lifetime, default 5
+#   MINC_HEALTH_PROBE_TIMEOUT_S   wait per probe round, default 2
+#   MINC_HEALTH_PROBE_MS          slowest probe allowed, default 250
+#   MINC_HEALTH_WINDOW_S          window for 429/error rates, default 60 (max 60)
+#   MINC_HEALTH_MIN_OPS           rates are judged only above this many calls, default 20
+#   MINC_HEALTH_THROTTLE_RATE     throttled share of Cosmos calls, default 0.05
+#   MINC_HEALTH_ERROR_RATE        failed share of Cosmos calls, default 0.05
+#   MINC_HEALTH_MAX_IN_FLIGHT     requests in flight on this instance, default 64
+#   MINC_HEALTH_BCRYPT_QUEUE      bcrypt checks waiting, default 3/4 of MINC_BCRYPT_MAX_QUEUE
+#   MINC_HEALTH_DEGRADED_STATUS   HTTP status for "degraded", default 503 (so the
+#                                 load balancer drains us); "down" is always 503,
+#                                 "warn" always 200
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from azure.cosmos import exceptions as cosmos_exceptions
+
+from . import admission, cosmos_client, vegu_cosmos_client, identifier_filter, regions, resilience
+from .instrumentation import in_flight, recent_cosmos
+from .login_flow import FLOW_STATS
+from .password_pool import BCRYPT_MAX_QUEUE, queue_depth
+from .write_behind import login_bookkeeping
+
+HEALTH_TTL_S          = float(os.getenv("MINC_HEALTH_TTL_S", 5))
+HEALTH_PROBE_TIMEOUT  = float(os.getenv("MINC_HEALTH_PROBE_TIMEOUT_S", 2))
+HEALTH_PROBE_MS       = float(os.getenv("MINC_HEALTH_PROBE_MS", 250))
+HEALTH_WINDOW_S       = int(os.getenv("MINC_HEALTH_WINDOW_S", 60))
+HEALTH_MIN_OPS        = int(os.getenv("MINC_HEALTH_MIN_OPS", 20))
+HEALTH_THROTTLE_RATE  = float(os.getenv("MINC_HEALTH_THROTTLE_RATE", 0.05))
+HEALTH_ERROR_RATE     = float(os.getenv("MINC_HEALTH_ERROR_RATE", 0.05))
+HEALTH_MAX_IN_FLIGHT  = int(os.getenv("MINC_HEALTH_MAX_IN_FLIGHT", 64))
+HEALTH_BCRYPT_QUEUE   = int(os.getenv("MINC_HEALTH_BCRYPT_QUEUE", max(1, BCRYPT_MAX_QUEUE * 3 // 4)))
+HEALTH_DEGRADED_STATUS = int(os.getenv("MINC_HEALTH_DEGRADED_STATUS", 503))
+
+STATUS_CODES = {"ok": 200, "warn": 200, "degraded": HEALTH_DEGRADED_STATUS, "down": 503}
+
+PROBE_ID = "__minc_health__"
+
+# (label, getter) — getters return the instrumented proxies; probes use the raw
+# container so health traffic does not show up in per-route RU
+PROBES: List[Tuple[str, Callable[[], Any]]] = [
+    ("minc/users", cosmos_client.users_container),
+    ("minc/otp", cosmos_client.otp_container),
+    ("minc/audit", cosmos_client.audit_container),
+    ("vegu/institutions", vegu_cosmos_client.institutions_container),
+    ("vegu/responders", vegu_cosmos_client.get_responders_container),
+    ("vegu/users", vegu_cosmos_client.get_user_container),
+    ("vegu/complaints", vegu_cosmos_client.get_complaints_container),
+    ("vegu/messages", vegu_cosmos_client.get_messages_container),
+    ("vegu/vgcrypt", lambda: vegu_cosmos_client.get_container(os.getenv("VEGU_CRYPT_CONTAINER", "vgcrypt"))),
+]
+# best-effort containers: never count toward "down"
+OPTIONAL_PROBES = frozenset({"minc/audit"})
+
+_pool = ThreadPoolExecutor(max_workers=len(PROBES), thread_name_prefix="minc-health")
+_probe_lock = threading.Lock()
+_cached: Dict[str, Any] = {"at": 0.0, "result": None}
+
+
+def _probe_one(getter: Callable[[], Any]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        c = getter()
+        getattr(c, "unwrapped", c).read_item(item=PROBE_ID, partition_key=PROBE_ID)
+        ok, status = True, 200
+    except cosmos_exceptions.CosmosResourceNotFoundError:
+        ok, status = True, 404   # expected: the container answered
+    except cosmos_exceptions.CosmosHttpResponseError as e:
+        ok, status = False, getattr(e, "status_code", None) or 0
+    except Exception as e:
+        logging.warning("[HEALTH] probe failed: %s", e)
+        ok, status = False, 0
+    return {"ok": ok, "status": status, "ms": round((time.perf_counter() - t0) * 1000.0, 1)}
+
+
+def _probe_all() -> Dict[str, Dict[str, Any]]:
+    futures = {label: _pool.submit(_probe_one, getter) for label, getter in PROBES}
+    wait(futures.values(), timeout=HEALTH_PROBE_TIMEOUT)
+    out: Dict[str, Dict[str, Any]] = {}
+    for label, fut in futures.items():
+        if fut.done():
+            out[label] = fut.result()
+        else:
+            out[label] = {"ok": False, "status": None, "ms": None, "error": "timeout"}
+    return out
+
+
+def probes() -> Tuple[Dict[str, Dict[str, Any]], float]:
+    """(per-container probe results, age in seconds) — cached for HEALTH_TTL_S."""
+    now = time.monotonic()
+    result, at = _cached["result"], _cached["at"]
+    if result is not None and now - at < HEALTH_TTL_S:
+        return result, now - at
+    if not _probe_lock.acquire(blocking=result is None):
+        return result, now - at   # a round is running; stale beats piling on
+    try:
+        if _cached["result"] is not None and time.monotonic() - _cached["at"] < HEALTH_TTL_S:
+            return _cached["result"], time.monotonic() - _cached["at"]
+        result = _probe_all()
+        _cached.update(result=result, at=time.monotonic())
+        return result, 0.0
+    finally:
+        _probe_lock.release()
+
+
+def _ratio(num: float, den: float) -> Optional[float]:
+    return round(num / den, 4) if den else None
+
+
+def cache_rates() -> Dict[str, Any]:
+    flows = FLOW_STATS["hits"] + FLOW_STATS["misses"]
+    f = identifier_filter.stats()
+    return {
+        "loginFlow": {"hitRate": _ratio(FLOW_STATS["hits"], flows), "lookups": flows},
+        # share of identifier checks answered without a Cosmos read
+        "identifierFilter": {"hitRate": _ratio(f["definite_miss"], f["checks"]), "lookups": f["checks"]},
+    }
+
+
+def deep() -> Tuple[Dict[str, Any], str]:
+    """Full report and its status ("ok" | "warn" | "degraded" | "down")."""
+    results, age = probes()
+    reasons: List[str] = []    # this instance: drain it
+    warnings: List[str] = []   # shared dependencies: report, keep serving
+
+    answered = [label for label, r in results.items() if r["ok"] and label not in OPTIONAL_PROBES]
+    for label, r in results.items():
+        optional = " (optional)" if label in OPTIONAL_PROBES else ""
+        if not r["ok"]:
+            warnings.append(f"{label}{optional}: " + (r.get("error") or f"status {r['status']}"))
+        elif r["ms"] is not None and r["ms"] > HEALTH_PROBE_MS:
+            warnings.append(f"{label}{optional}: probe {r['ms']}ms > {HEALTH_PROBE_MS:g}ms")
+
+    window = recent_cosmos(HEALTH_WINDOW_S)
+    if window["ops"] >= HEALTH_MIN_OPS:
+        if window["throttleRate"] > HEALTH_THROTTLE_RATE:
+            warnings.append(f"cosmos 429 rate {window['throttleRate']:.1%} > {HEALTH_THROTTLE_RATE:.1%}")
+        if window["errorRate"] > HEALTH_ERROR_RATE:
+            warnings.append(f"cosmos error rate {window['errorRate']:.1%} > {HEALTH_ERROR_RATE:.1%}")
+
+    circuits = resilience.breakers()
+    for name, b in circuits.items():
+        if b["state"] != "closed":
+            warnings.append(f"circuit {name} {b['state']}")
+
+    requests = in_flight()
+    total_in_flight = sum(requests.values())
+    if total_in_flight > HEALTH_MAX_IN_FLIGHT:
+        reasons.append(f"{total_in_flight} requests in flight > {HEALTH_MAX_IN_FLIGHT}")
+
+    bcrypt_waiting = queue_depth()
+    if bcrypt_waiting >= HEALTH_BCRYPT_QUEUE:
+        reasons.append(f"bcrypt queue {bcrypt_waiting} >= {HEALTH_BCRYPT_QUEUE}")
+
+    if not answered:
+        status = "down"
+        reasons.insert(0, "no required container answered from this instance")
+    else:
+        status = "degraded" if reasons else ("warn" if warnings else "ok")
+    report = {
+        "status": status,
+        "reasons": reasons,
+        "warnings": warnings,
+        "cosmos": {"probes": results, "probeAgeS": round(age, 1), "recent": window, "circuits": circuits,
+                   "regions": {"preferred": regions.PREFERRED_REGIONS, "consistency": regions.CONSISTENCY,
+                               "hedging": regions.HEDGE_ENABLED, "hedgeDelayMs": regions.delays()}},
+        "inFlight": {"total": total_in_flight, "byRoute": requests, "admission": admission.snapshot()},
+        "pools": {"bcryptQueue": bcrypt_waiting, "writeBehindPending": login_bookkeeping.pending()},
+        "caches": cache_rates(),
+        "thresholds": {
+            "probeMs": HEALTH_PROBE_MS, "throttleRate": HEALTH_THROTTLE_RATE, "errorRate": HEALTH_ERROR_RATE,
+            "minOps": HEALTH_MIN_OPS, "maxInFlight": HEALTH_MAX_IN_FLIGHT, "bcryptQueue": HEALTH_BCRYPT_QUEUE,
+        },
+    }
+    return report, status
+
+
+def summary(report: Dict[str, Any]) -> Dict[str, Any]:
+    """What the anonymous endpoint may show: status and why, no internals."""
+    return {k: report[k] for k in ("status", "reasons", "warnings")}
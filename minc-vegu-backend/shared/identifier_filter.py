@@ -0,0 +1,163 @@
+# shared/identifier_filter.py v1.0
+#
+# Bloom filter over every known minc_users email and mincId, so unknown
+# identifiers (typos, enumeration) are answered without a cross-partition query.
+# - built in the background on first use from a projected scan (email, mincId)
+# - topped up every MINC_IDENT_FILTER_POLL_S from docs with a newer _ts
+#   (new users, changed emails) and on add()
+# - rebuilt from scratch every MINC_IDENT_FILTER_REBUILD_S (drops deleted ids,
+#   re-sizes for growth)
+# - until the first build finishes every identifier is "maybe" → old query path
+#
+# Env:
+#   MINC_IDENT_FILTER=0            disable (always "maybe")
+#   MINC_IDENT_FILTER_FP           target false-positive rate, default 0.01
+#   MINC_IDENT_FILTER_POLL_S       incremental refresh, default 60
+#   MINC_IDENT_FILTER_REBUILD_S    full rebuild, default 3600
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from .bloom import BloomFilter
+from .cosmos_client import users_container
+
+FILTER_ENABLED   = os.getenv("MINC_IDENT_FILTER", "1") != "0"
+FILTER_FP        = float(os.getenv("MINC_IDENT_FILTER_FP", 0.01))
+FILTER_POLL_S    = float(os.getenv("MINC_IDENT_FILTER_POLL_S", 60))
+FILTER_REBUILD_S = float(os.getenv("MINC_IDENT_FILTER_REBUILD_S", 3600))
+HEADROOM         = 1.5   # capacity = entries × HEADROOM, room for adds between rebuilds
+
+_lock = threading.Lock()
+_bloom: Optional[BloomFilter] = None
+_since_ts = 0            # highest _ts folded into the current filter
+_built_at = 0.0
+_thread = None
+FILTER_STATS: Dict[str, Any] = {
+    "builds": 0, "build_ms": 0, "build_failures": 0, "refreshes": 0, "added": 0,
+    "checks": 0, "definite_miss": 0, "maybe": 0, "false_positives": 0,
+}
+
+
+def _keys(row: Dict[str, Any]):
+    if row.get("email"):
+        yield str(row["email"]).strip().lower()
+    if row.get("mincId"):
+        yield str(row["mincId"]).strip().upper()
+
+
+def _scan(since_ts: int = 0):
+    q = "SELECT c.email, c.mincId, c._ts FROM c"
+    params = []
+    if since_ts:
+        q += " WHERE c._ts >= @since"
+        params = [{"name": "@since", "value": since_ts}]
+    return users_container().query_items(query=q, parameters=params, enable_cross_partition_query=True)
+
+
+def rebuild() -> None:
+    global _bloom, _since_ts, _built_at
+    t0 = time.perf_counter()
+    rows = list(_scan())
+    bloom = BloomFilter(max(1024, int(len(rows) * 2 * HEADROOM)), FILTER_FP)
+    max_ts = 0
+    for r in rows:
+        for key in _keys(r):
+            bloom.add(key)
+        max_ts = max(max_ts, int(r.get("_ts") or 0))
+    with _lock:
+        _bloom, _since_ts, _built_at = bloom, max_ts, time.time()
+        FILTER_STATS["builds"] += 1
+        FILTER_STATS["build_ms"] = int((time.perf_counter() - t0) * 1000)
+    logging.info("[IDENT-FILTER] built: %d users, %d bytes, k=%d", len(rows), bloom.nbytes, bloom.k)
+
+
+def _refresh() -> None:
+    global _since_ts
+    bloom = _bloom
+    if bloom is None:
+        return
+    # >= on the last _ts: same-second writes are re-read, adding twice is harmless
+    max_ts = _since_ts
+    for r in _scan(_since_ts):
+        for key in _keys(r):
+            bloom.add(key)
+        max_ts = max(max_ts, int(r.get("_ts") or 0))
+    with _lock:
+        _since_ts = max_ts
+        FILTER_STATS["refreshes"] += 1
+
+
+def _loop() -> None:
+    while True:
+        try:
+            bloom = _bloom
+            if bloom is None or time.time() - _built_at >= FILTER_REBUILD_S or len(bloom) > bloom.capacity:
+                rebuild()
+            else:
+                _refresh()
+        except Exception:
+            FILTER_STATS["build_failures"] += 1
+            logging.exception("[IDENT-FILTER] build/refresh failed")
+        time.sleep(FILTER_POLL_S)
+
+
+def _ensure_started() -> None:
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        with _lock:
+            if _thread is None or not _thread.is_alive():
+                _thread = threading.Thread(target=_loop, name="ident-filter", daemon=True)
+                _thread.start()
+
+
+def might_exist(identifier: str) -> bool:
+    """False only when the identifier is definitely not a known email / mincId."""
+    if not FILTER_ENABLED or not identifier:
+        return True
+    _ensure_started()
+    bloom = _bloom
+    if bloom is None:
+        return True
+    hit = identifier in bloom
+    with _lock:
+        FILTER_STATS["checks"] += 1
+        FILTER_STATS["maybe" if hit else "definite_miss"] += 1
+    return hit
+
+
+def note_false_positive() -> None:
+    """Caller queried after a 'maybe' and found nothing."""
+    with _lock:
+        FILTER_STATS["false_positives"] += 1
+
+
+def add(identifier: str) -> None:
+    """Register a newly created identifier (normalized: email lower, mincId upper)."""
+    bloom = _bloom
+    if bloom is not None and identifier:
+        bloom.add(identifier)
+        with _lock:
+            FILTER_STATS["added"] += 1
+
+
+def stats() -> Dict[str, Any]:
+    bloom = _bloom
+    out = dict(FILTER_STATS)
+    negatives = out["definite_miss"] + out["false_positives"]
+    out.update({
+        "enabled": FILTER_ENABLED,
+        "ready": bloom is not None,
+        "entries": len(bloom) if bloom else 0,
+        "capacity": bloom.capacity if bloom else 0,
+        "bytes": bloom.nbytes if bloom else 0,
+        "hashes": bloom.k if bloom else 0,
+        "target_fp": FILTER_FP,
+        "expected_fp": round(bloom.expected_fp_rate(), 6) if bloom else None,
+        # share of unknown identifiers that still reached Cosmos
+        "observed_fp": round(out["false_positives"] / negatives, 6) if negatives else None,
+        "age_s": int(time.time() - _built_at) if bloom else None,
+    })
+    return out
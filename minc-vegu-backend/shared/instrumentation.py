@@ -0,0 +1,448 @@
+# shared/instrumentation.py v1.0
+#
+# RU / latency / item-count / retry accounting for every Cosmos container call,
+# aggregated by route and query template (shared.metrics).
+# - instrument_route("route") goes directly above a handler's `def` (under the
+#   @app.* decorators): sets the current route, times the request, sums its RU
+# - InstrumentedContainer wraps a ContainerProxy; the container getters in
+#   cosmos_client / vegu_cosmos_client return it, so handlers need no changes
+# - point operations read x-ms-request-charge from response_hook; queries read
+#   it per page from client_connection.last_response_headers (shared by all
+#   threads of one client, so a page's charge can occasionally be attributed to
+#   a concurrent query — good enough for "which handler costs the most")
+# - also kept for the deep health check: requests in flight per route and a
+#   per-second ring of Cosmos calls / throttled (429) calls / errors over the
+#   last WINDOW_S seconds
+# - every call goes through shared.resilience (retry on 429/503 honoring
+#   x-ms-retry-after-ms, per-container circuit breaker); each attempt is recorded.
+#   A throttling error escaping a handler is answered 503 + Retry-After
+# - identical point reads, and queries read with read_all(), in flight at the
+#   same time share one Cosmos call (shared.single_flight); writes start a new
+#   generation. Plain iteration stays lazy, so a caller that stops early only
+#   fetches the pages it reads
+# - instrument_route admits the request first (shared.admission: per-class /
+#   per-route concurrency, priority auth > point > search > bulk)
+# - on the read-only routes, slow point reads and read_all() queries are hedged
+#   to a second region (shared.regions, MINC_HEDGE=1)
+# - with MINC_TRACING=1 every handler call is a span and every Cosmos call a
+#   child span carrying its RU (shared.tracing)
+
+import re
+import time
+import functools
+import threading
+import contextvars
+from typing import Any, Callable, Dict, Optional
+
+from . import admission, metrics, regions, resilience, single_flight, tracing
+
+MAX_TEMPLATES = 200
+WINDOW_S = 60
+
+_route: contextvars.ContextVar = contextvars.ContextVar("minc_route", default="-")
+_request_ru: contextvars.ContextVar = contextvars.ContextVar("minc_request_ru", default=None)
+
+metrics.histogram("minc_http_request_duration_seconds", "Handler latency by route.")
+metrics.histogram("minc_http_request_units", "Cosmos RU consumed per request, by route.", metrics.RU_BUCKETS)
+metrics.counter("minc_http_requests_total", "Requests by route and status.")
+metrics.histogram("minc_cosmos_duration_seconds", "Cosmos operation latency.")
+metrics.histogram("minc_cosmos_request_units", "RU charge per Cosmos operation.", metrics.RU_BUCKETS)
+metrics.histogram("minc_cosmos_items", "Items returned per Cosmos query.", metrics.COUNT_BUCKETS)
+metrics.counter("minc_cosmos_request_units_total", "Total RU by route, container, operation and query template.")
+metrics.counter("minc_cosmos_retries_total", "SDK throttle retries (429) observed.")
+metrics.counter("minc_cosmos_errors_total", "Cosmos operations that raised, by status code.")
+
+
+def current_route() -> str:
+    return _route.get()
+
+
+def request_ru() -> float:
+    """RU charged so far to the current request (0 outside instrument_route)."""
+    acc = _request_ru.get()
+    return acc[0] if acc is not None else 0.0
+
+
+# ----- query templates -----
+
+_templates: Dict[str, str] = {}
+_templates_lock = threading.Lock()
+_WS = re.compile(r"\s+")
+_STR = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUM = re.compile(r"(?<![\w@.])\d+(?:\.\d+)?\b")
+_PARAM_N = re.compile(r"(@[A-Za-z_]+)\d+\b")
+# a parenthesized group with up to three levels of nesting: (CONTAINS(LOWER(c.x), @t#) OR …)
+_P1 = r"\([^()]*\)"
+_P2 = r"\((?:[^()]|" + _P1 + r")*\)"
+_P3 = r"\((?:[^()]|" + _P2 + r")*\)"
+_REPEAT = re.compile(r"(" + _P3 + r")(?:\s+(?:AND|OR)\s+\1)+", re.IGNORECASE)
+_REPEAT_EQ = re.compile(r"([\w.]+\s*=\s*@\w+#)(?:\s+OR\s+\1)+", re.IGNORECASE)   # c.vg_id=@id# OR …
+
+
+def query_template(sql: str) -> str:
+    """Normalized SQL: literals → ?, @t3 → @t#, repeated per-token groups collapsed."""
+    cached = _templates.get(sql)
+    if cached is not None:
+        return cached
+    t = _WS.sub(" ", sql or "").strip()
+    t = _STR.sub("?", t)
+    t = _NUM.sub("?", t)
+    t = _PARAM_N.sub(r"\1#", t)
+    t = _REPEAT.sub(r"\1 …", t)
+    t = _REPEAT_EQ.sub(r"\1 …", t)
+    with _templates_lock:
+        if len(_templates) >= MAX_TEMPLATES:
+            return "other"
+        _templates[sql] = t
+    return t
+
+
+# ----- recording -----
+
+def _charge(headers) -> float:
+    try:
+        return float((headers or {}).get("x-ms-request-charge") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _retries(headers) -> int:
+    try:
+        return int((headers or {}).get("x-ms-throttle-retry-count") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+# ----- recent window + in-flight (shared.health) -----
+
+_win = [[0, 0, 0, 0] for _ in range(WINDOW_S)]   # per second: [epoch second, ops, throttled, errors]
+_win_lock = threading.Lock()
+_in_flight: Dict[str, int] = {}
+_in_flight_lock = threading.Lock()
+
+
+def _tick(throttled: bool, error: bool) -> None:
+    sec = int(time.time())
+    slot = _win[sec % WINDOW_S]
+    with _win_lock:
+        if slot[0] != sec:
+            slot[:] = [sec, 0, 0, 0]
+        slot[1] += 1
+        slot[2] += throttled
+        slot[3] += error
+
+
+def recent_cosmos(window_s: int = WINDOW_S) -> Dict[str, Any]:
+    """Cosmos calls over the last window_s seconds (≤ WINDOW_S): ops, throttled, errors and rates."""
+    window_s = max(1, min(WINDOW_S, int(window_s)))
+    since = int(time.time()) - window_s
+    ops = throttled = errors = 0
+    with _win_lock:
+        for sec, o, t, e in _win:
+            if sec > since:
+                ops, throttled, errors = ops + o, throttled + t, errors + e
+    return {"windowS": window_s, "ops": ops, "throttled": throttled, "errors": errors,
+            "throttleRate": round(throttled / ops, 4) if ops else 0.0,
+            "errorRate": round(errors / ops, 4) if ops else 0.0}
+
+
+def in_flight() -> Dict[str, int]:
+    """Requests currently inside an instrumented handler, by route."""
+    with _in_flight_lock:
+        return {r: n for r, n in _in_flight.items() if n}
+
+
+def _enter(route: str, n: int) -> None:
+    with _in_flight_lock:
+        _in_flight[route] = _in_flight.get(route, 0) + n
+
+
+def record(container: str, op: str, seconds: float, ru: float, items: Optional[int] = None,
+           retries: int = 0, query: str = "", status: Optional[int] = None,
+           ctx: Optional[Dict[str, Any]] = None) -> None:
+    labels = {"route": _route.get(), "container": container, "op": op, "query": query}
+    metrics.observe("minc_cosmos_duration_seconds", seconds, labels)
+    metrics.observe("minc_cosmos_request_units", ru, labels)
+    metrics.inc("minc_cosmos_request_units_total", labels, ru)
+    if items is not None:
+        metrics.observe("minc_cosmos_items", items, labels)
+    if retries:
+        metrics.inc("minc_cosmos_retries_total", {"container": container, "op": op}, retries)
+    if status is not None:
+        metrics.inc("minc_cosmos_errors_total", {"container": container, "op": op, "status": str(status)})
+    # 404/409/412 are answers, not failures; 0 = no response (network, timeout)
+    _tick(bool(retries) or status == 429, status is not None and (status == 0 or status == 408 or status >= 500))
+    acc = _request_ru.get()
+    if acc is not None:
+        acc[0] += ru
+    if tracing.TRACING_ENABLED:
+        tracing.record_span(f"cosmos {op}", seconds, {
+            "db.system": "cosmosdb", "db.operation.name": op, "db.collection.name": container,
+            "db.cosmosdb.request_charge": ru, "db.cosmosdb.item_count": items,
+            "db.cosmosdb.retries": retries or None, "db.cosmosdb.status_code": status,
+            "db.query.text": query or None,   # normalized template, no values
+        }, error=f"status {status}" if status is not None and status != 404 else None)
+    for hook in _observers:
+        try:
+            hook(container, op, seconds, ru, items, query, ctx)
+        except Exception:
+            pass   # an observer must never fail the Cosmos call it watches
+
+
+# fn(container, op, seconds, ru, items, query_template, ctx) — e.g. the slow-query log.
+# ctx is None for point operations; for queries it holds the raw SQL, parameters,
+# query kwargs and the unwrapped ContainerProxy (to re-run it).
+_observers = []
+
+
+def add_observer(fn: Callable) -> None:
+    _observers.append(fn)
+
+
+# ----- container wrapper -----
+
+_POINT_OPS = ("read_item", "create_item", "upsert_item", "replace_item", "patch_item",
+              "delete_item", "execute_item_batch")
+
+
+# calls made with anything else (etags, hooks, tokens, metrics flags) are never coalesced
+_SF_READ_KWARGS = frozenset(("item", "partition_key"))
+_SF_QUERY_KWARGS = frozenset(("query", "parameters", "enable_cross_partition_query", "partition_key",
+                              "max_item_count"))
+
+
+class _Pages:
+    """
+    by_page() iterator that records each page as it is fetched. A page that
+    fails is retried under shared.resilience from the last continuation token
+    (a fresh pager, since a failed SDK pager cannot be resumed).
+    """
+
+    def __init__(self, owner: "InstrumentedContainer", factory: Callable, continuation_token,
+                 template: str, ctx: Dict[str, Any], per_page: bool = True):
+        self._owner, self._factory, self._template, self._ctx = owner, factory, template, ctx
+        self._per_page = per_page
+        self._pages = None   # created on the first fetch, inside the retry policy
+        self.continuation_token = continuation_token
+
+    def __iter__(self):
+        return self
+
+    def _fetch(self):
+        if self._pages is None:
+            self._pages = self._factory().by_page(self.continuation_token)
+        t0 = time.perf_counter()
+        try:
+            page = list(next(self._pages))
+        except StopIteration:
+            raise
+        except Exception as e:
+            self._pages = None
+            self._owner._error("query_items", t0, e, self._template)
+            raise
+        self.continuation_token = getattr(self._pages, "continuation_token", None)
+        if self._per_page:
+            h = self._owner._last_headers()
+            record(self._owner.container_name, "query_items", time.perf_counter() - t0, _charge(h),
+                   len(page), _retries(h), self._template, ctx=self._ctx)
+        return page
+
+    def __next__(self):
+        return iter(resilience.run(self._owner.container_name, "query_items", self._fetch))
+
+    def __getattr__(self, name):
+        return getattr(self._pages, name)
+
+
+class _Query:
+    """Lazy query result: iterating it records RU / items / latency for the whole query."""
+
+    def __init__(self, owner: "InstrumentedContainer", factory: Callable, template: str, ctx: Dict[str, Any]):
+        self._owner, self._factory, self._template, self._ctx = owner, factory, template, ctx
+        self._paged = None
+
+    def __iter__(self):
+        return self._stream()
+
+    def read_all(self) -> list:
+        """Every item; shared by identical queries in flight (shared.single_flight), hedged on read routes."""
+        read = self._read_hedged if self._hedgeable() else (lambda: list(self._stream()))
+        return single_flight.do(self._flight_key(), read)
+
+    def _hedgeable(self) -> bool:
+        return regions.should_hedge(_route.get()) and "excluded_locations" not in self._ctx["kwargs"]
+
+    def _read_hedged(self):
+        other = _Query(self._owner, functools.partial(self._factory, **regions.hedge_kwargs()),
+                       self._template, self._ctx)
+        return regions.hedged(self._owner.container_name, "query_items",
+                              lambda: list(self._stream()), lambda: list(other._stream()))
+
+    def _flight_key(self):
+        kwargs = self._ctx["kwargs"]
+        if not single_flight.SF_ENABLED or not set(kwargs) <= _SF_QUERY_KWARGS:
+            return None
+        rest = {k: v for k, v in kwargs.items() if k not in ("query", "parameters")}
+        return single_flight.key(self._owner.container_name, "query_items",
+                                 self._ctx["sql"], self._ctx["parameters"], rest)
+
+    def _stream(self):
+        t0 = time.perf_counter()
+        ru, n, retries, failed = 0.0, 0, 0, False
+        try:
+            for page in _Pages(self._owner, self._factory, None, self._template, self._ctx, per_page=False):
+                ru += _charge(self._owner._last_headers())
+                retries += _retries(self._owner._last_headers())
+                for item in page:
+                    n += 1
+                    yield item
+        except Exception:
+            failed = True   # the failing attempts were recorded by _Pages
+            raise
+        finally:
+            # also runs when the caller stops early (next(iter(...)), TOP 1 loops);
+            # a failed attempt was already recorded with its status
+            if not failed or n:
+                record(self._owner.container_name, "query_items", time.perf_counter() - t0, ru, n,
+                       retries, self._template, ctx=self._ctx)
+
+    def by_page(self, continuation_token=None):
+        return _Pages(self._owner, self._factory, continuation_token, self._template, self._ctx)
+
+    def __getattr__(self, name):
+        if self._paged is None:
+            self._paged = self._factory()
+        return getattr(self._paged, name)
+
+
+def read_all(query_iterable) -> list:
+    """list(query_items(...)) for callers that want every row: coalesced / hedged when instrumented."""
+    if isinstance(query_iterable, _Query):
+        return query_iterable.read_all()
+    return list(query_iterable)
+
+
+class InstrumentedContainer:
+    def __init__(self, container, name: Optional[str] = None):
+        self._c = container
+        self.container_name = name or getattr(container, "id", "?")
+
+    def __getattr__(self, name):
+        attr = getattr(self._c, name)
+        if name in _POINT_OPS:
+            return functools.partial(self._point, name, attr)
+        return attr
+
+    @property
+    def unwrapped(self):
+        return self._c
+
+    def _last_headers(self):
+        try:
+            return self._c.client_connection.last_response_headers
+        except Exception:
+            return {}
+
+    def _error(self, op: str, t0: float, e: Exception, template: str = "") -> None:
+        h = getattr(e, "headers", None) or {}
+        record(self.container_name, op, time.perf_counter() - t0, _charge(h), None, _retries(h),
+               template, status=getattr(e, "status_code", None) or 0)
+
+    def _point(self, op: str, fn: Callable, *args, **kwargs):
+        seen: Dict[str, Any] = {}
+        user_hook = kwargs.get("response_hook")
+
+        def hook(headers, result):
+            seen["h"] = headers
+            if user_hook:
+                user_hook(headers, result)
+
+        k = None
+        if op == "read_item" and not user_hook and set(kwargs) <= _SF_READ_KWARGS:
+            k = single_flight.key(self.container_name, op, args, kwargs)
+        kwargs["response_hook"] = hook
+        hedge = (op == "read_item" and "excluded_locations" not in kwargs
+                 and regions.should_hedge(_route.get()))
+
+        def attempt():
+            seen.pop("h", None)
+            t0 = time.perf_counter()
+            try:
+                if hedge:
+                    result = regions.hedged(self.container_name, op, lambda: fn(*args, **kwargs),
+                                            lambda: fn(*args, **kwargs, **regions.hedge_kwargs()))
+                else:
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                self._error(op, t0, e)
+                raise
+            h = seen.get("h") or self._last_headers()
+            items = len(result) if op == "execute_item_batch" and isinstance(result, list) else None
+            record(self.container_name, op, time.perf_counter() - t0, _charge(h), items, _retries(h))
+            return result
+
+        if op == "read_item":
+            return single_flight.do(k, lambda: resilience.run(self.container_name, op, attempt))
+        try:
+            return resilience.run(self.container_name, op, attempt)
+        finally:
+            single_flight.bump(self.container_name)   # even a failed write may have landed
+
+    def query_items(self, query, *args, **kwargs):
+        if isinstance(query, str):
+            sql, params = query, kwargs.get("parameters") or (args[0] if args else None)
+        else:
+            sql, params = (query or {}).get("query", ""), (query or {}).get("parameters")
+        ctx = {"sql": sql, "parameters": params, "kwargs": kwargs, "container": self._c}
+        return _Query(self, lambda **extra: self._c.query_items(query, *args, **kwargs, **extra),
+                      query_template(sql), ctx)
+
+
+def instrument(container, name: Optional[str] = None):
+    if container is None or isinstance(container, InstrumentedContainer):
+        return container
+    return InstrumentedContainer(container, name)
+
+
+# ----- route decorator -----
+
+def instrument_route(route: str):
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tok_r = _route.set(route)
+            tok_ru = _request_ru.set([0.0])
+            t0 = time.perf_counter()
+            status = "exception"
+            _enter(route, 1)
+            with tracing.request_span(route, args[0] if args else kwargs.get("req")) as sp:
+                try:
+                    resp = admission.admit(route)   # None: admitted; else the 429/503 to send
+                    if resp is None:
+                        try:
+                            resp = fn(*args, **kwargs)
+                        except Exception as e:
+                            resp = resilience.unavailable_response(e)
+                            if resp is None:
+                                raise
+                        finally:
+                            admission.release(route)
+                    status = str(getattr(resp, "status_code", 200) or 200)
+                    return resp
+                finally:
+                    _enter(route, -1)
+                    ru = _request_ru.get()[0]
+                    metrics.observe("minc_http_request_duration_seconds", time.perf_counter() - t0, {"route": route})
+                    metrics.observe("minc_http_request_units", ru, {"route": route})
+                    metrics.inc("minc_http_requests_total", {"route": route, "status": status})
+                    sp.set_attribute("http.response.status_code", int(status) if status.isdigit() else status)
+                    sp.set_attribute("minc.request_units", ru)
+                    _request_ru.reset(tok_ru)
+                    _route.reset(tok_r)
+        return wrapper
+    return deco
+
+
+def submit_in_context(pool, fn: Callable, *args, **kwargs):
+    """pool.submit that keeps the current route / RU accumulator in the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,118 @@
+# shared/login_flow.py v1.0
+#
+# Short-lived login-flow context shared by init → password → OTP send → OTP verify.
+# - minc-login-init resolves the user once and returns a `flowId`
+# - later steps pass flowId back; the cached doc is revalidated with a
+#   conditional point read (If-None-Match: <etag>) instead of another
+#   cross-partition query. 304 → reuse cache; 200 → fresh doc replaces it.
+# - in-process only (per instance); a miss simply falls back to the old query
+#
+# Env: MINC_LOGIN_FLOW_TTL_S (default 300), MINC_LOGIN_FLOW_MAX (default 10000)
+
+import os
+import time
+import secrets
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from .cosmos_client import users_partition_key
+
+FLOW_TTL_S = int(os.getenv("MINC_LOGIN_FLOW_TTL_S", 300))
+FLOW_MAX   = int(os.getenv("MINC_LOGIN_FLOW_MAX", 10000))
+
+_flows: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+FLOW_STATS = {"started": 0, "hits": 0, "revalidated": 0, "refreshed": 0, "misses": 0}
+
+
+def _bump(key: str) -> None:
+    with _lock:
+        FLOW_STATS[key] += 1
+
+
+def _evict(now: float) -> None:
+    for k in [k for k, v in _flows.items() if v["expires"] <= now]:
+        del _flows[k]
+    while len(_flows) >= FLOW_MAX:
+        # dicts keep insertion order → drop the oldest flow
+        del _flows[next(iter(_flows))]
+
+
+def start(user: Dict[str, Any]) -> str:
+    """Cache the resolved user and return a new flowId."""
+    flow_id = secrets.token_urlsafe(16)
+    now = time.time()
+    with _lock:
+        _evict(now)
+        _flows[flow_id] = {"user": user, "expires": now + FLOW_TTL_S}
+        FLOW_STATS["started"] += 1
+    return flow_id
+
+
+def _matches(user: Dict[str, Any], identifier: Optional[str]) -> bool:
+    if not identifier:
+        return True
+    ident = identifier.strip().lower()
+    return ident in ((user.get("email") or "").lower(), (user.get("mincId") or "").lower())
+
+
+def peek(flow_id: Optional[str], identifier: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Cached user for flow_id (no I/O), or None when unknown / expired / other identity."""
+    if not flow_id:
+        return None
+    with _lock:
+        ent = _flows.get(flow_id)
+        if not ent or ent["expires"] <= time.time():
+            _flows.pop(flow_id, None)
+            ent = None
+    if ent is None or not _matches(ent["user"], identifier):
+        _bump("misses")
+        return None
+    _bump("hits")
+    return ent["user"]
+
+
+def resolve(flow_id: Optional[str], cont, identifier: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Cached user revalidated against Cosmos by ETag (point read, ~1 RU).
+    Returns None when there is no usable flow; the caller then queries as before.
+    """
+    user = peek(flow_id, identifier)
+    if user is None:
+        return None
+    etag = user.get("_etag")
+    try:
+        fresh = cont.read_item(item=user["id"], partition_key=users_partition_key(user),
+                               initial_headers={"If-None-Match": etag} if etag else None)
+    except CosmosHttpResponseError as e:
+        if e.status_code == 304:
+            fresh = None
+        else:
+            logging.warning("[LOGIN-FLOW] revalidation failed status=%s", e.status_code)
+            return None
+    if not fresh:
+        # 304 Not Modified → cached copy is current
+        _bump("revalidated")
+        return user
+    _bump("refreshed")
+    update(flow_id, fresh)
+    return fresh
+
+
+def update(flow_id: Optional[str], user: Dict[str, Any]) -> None:
+    """Keep the cached copy in step with our own writes (new _etag)."""
+    if not flow_id or not user:
+        return
+    with _lock:
+        ent = _flows.get(flow_id)
+        if ent:
+            ent["user"] = user
+
+
+def finish(flow_id: Optional[str]) -> None:
+    if flow_id:
+        with _lock:
+            _flows.pop(flow_id, None)
@@ -0,0 +1,191 @@
+# shared/metrics.py v1.0
+#
+# In-process counters and histograms, rendered in Prometheus text format.
+# - hot path takes no lock: every thread writes into its own shard
+#   (threading.local); a scrape sums the shards
+# - when a thread exits its shard is folded into one retained shard, so
+#   short-lived pools (bulk updates) do not grow the shard list and counters
+#   stay monotonic
+# - series are (metric name, label tuple); label values are capped by the callers
+#   (route names, normalized query templates)
+# - other modules' stats dicts are exported through register_collector()
+
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# seconds — request and Cosmos latency
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# request units per operation
+RU_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# items returned per operation
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 1000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_HELP: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}   # name → (type, help, buckets)
+_shards: List[Dict] = []
+_retired: Dict = {}               # shards of threads that have exited, summed
+_shards_lock = threading.Lock()   # taken when a thread's shard is created or retired
+_local = threading.local()
+
+
+class _Owner:
+    """Lives in the thread's threading.local; collected when the thread exits."""
+    __slots__ = ("__weakref__",)
+
+
+def _merge(into: Dict, s: Dict) -> None:
+    for key, v in list(s.items()):
+        if isinstance(v, list):
+            cur = into.get(key)
+            if cur is None:
+                into[key] = list(v)
+            else:
+                for i, x in enumerate(v):
+                    cur[i] += x
+        else:
+            into[key] = into.get(key, 0) + v
+
+
+def _retire(s: Dict) -> None:
+    with _shards_lock:
+        _merge(_retired, s)
+        _shards.remove(s)
+
+
+def _shard() -> Dict:
+    s = getattr(_local, "shard", None)
+    if s is None:
+        s = {}
+        with _shards_lock:
+            _shards.append(s)
+        owner = _Owner()
+        weakref.finalize(owner, _retire, s)
+        _local.owner = owner
+        _local.shard = s
+    return s
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def counter(name: str, help_text: str) -> None:
+    _HELP.setdefault(name, ("counter", help_text, ()))
+
+
+def histogram(name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+    _HELP.setdefault(name, ("histogram", help_text, tuple(buckets)))
+
+
+def inc(name: str, labels: Optional[Dict[str, str]] = None, n: float = 1) -> None:
+    s = _shard()
+    key = (name, _labels(labels))
+    s[key] = s.get(key, 0) + n
+
+
+def observe(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+    buckets = _HELP[name][2]
+    s = _shard()
+    key = (name, _labels(labels))
+    h = s.get(key)
+    if h is None:
+        # [bucket counts..., +Inf count, sum]
+        h = s[key] = [0] * (len(buckets) + 2)
+    for i, b in enumerate(buckets):
+        if value <= b:
+            h[i] += 1
+            break
+    else:
+        h[len(buckets)] += 1
+    h[-1] += value
+
+
+def reset() -> None:
+    """Drop all recorded samples (benchmarks: discard the warm-up)."""
+    with _shards_lock:
+        _retired.clear()
+        for s in _shards:
+            s.clear()
+
+
+# ----- collectors (gauges/counters owned by other modules) -----
+# fn() → iterable of (name, type, help, labels dict, value[, family])
+# `family` groups histogram parts (x_bucket / x_sum / x_count) under one TYPE line
+Sample = Tuple[str, str, str, Dict[str, str], float]
+_collectors: List[Callable[[], Iterable[Sample]]] = []
+
+
+def register_collector(fn: Callable[[], Iterable[Sample]]) -> None:
+    _collectors.append(fn)
+
+
+# ----- exposition -----
+
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def _fmt_num(v: float) -> str:
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return repr(v) if isinstance(v, float) else str(v)
+
+
+def snapshot() -> Dict[Tuple[str, Labels], object]:
+    """Sum of all thread shards, live and retired."""
+    total: Dict[Tuple[str, Labels], object] = {}
+    with _shards_lock:
+        # copied together: a shard retired after this point is still in `shards`
+        _merge(total, _retired)
+        shards = list(_shards)
+    for s in shards:
+        _merge(total, s)
+    return total
+
+
+def render_prometheus() -> str:
+    by_name: Dict[str, List[Tuple[Labels, object]]] = {}
+    for (name, labels), v in snapshot().items():
+        by_name.setdefault(name, []).append((labels, v))
+
+    out: List[str] = []
+    for name in sorted(by_name):
+        mtype, help_text, buckets = _HELP.get(name, ("untyped", "", ()))
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {mtype}")
+        for labels, v in sorted(by_name[name]):
+            if mtype == "histogram":
+                cum = 0
+                for b, c in zip(buckets, v):
+                    cum += c
+                    out.append(f"{name}_bucket{_fmt_labels(labels, (('le', _fmt_num(float(b))),))} {cum}")
+                cum += v[len(buckets)]
+                out.append(f"{name}_bucket{_fmt_labels(labels, (('le', '+Inf'),))} {cum}")
+                out.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_num(float(v[-1]))}")
+                out.append(f"{name}_count{_fmt_labels(labels)} {cum}")
+            else:
+                out.append(f"{name}{_fmt_labels(labels)} {_fmt_num(v)}")
+
+    seen = set()
+    for fn in _collectors:
+        try:
+            samples = list(fn())
+        except Exception:
+            continue
+        for sample in samples:
+            name, mtype, help_text, labels, value = sample[:5]
+            family = sample[5] if len(sample) > 5 else name
+            if value is None:
+                continue
+            if family not in seen:
+                seen.add(family)
+                out.append(f"# HELP {family} {help_text}")
+                out.append(f"# TYPE {family} {mtype}")
+            out.append(f"{name}{_fmt_labels(_labels(labels))} {_fmt_num(value)}")
+    return "\n".join(out) + "\n"
@@ -1,31 +1,196 @@
-# shared/normalizers.py 1.4
-from typing import Any, Dict, Optional
+# shared/normalizers.py 2.0
+#
+# Declarative FE payload shapes, compiled once per entity.
+# - a spec is a list of fields: first(out, *sources, default=…) takes the first
+#   truthy source (camelCase/snake_case fallbacks), get(out, src, default) is a
+#   plain dict.get, const(out, value) is fixed
+# - compile_spec() generates one straight-line function per entity (no per-field
+#   loop at run time) plus a page variant that converts a whole result list
+# - .record() builds an optional __slots__ class with the same fields, for
+#   in-process caches that hold many normalized docs
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Field(NamedTuple):
+    out: str
+    sources: Tuple[str, ...]
+    default: Any
+    mode: str                       # "first" | "get" | "const"
+    transform: Optional[Callable] = None
+
+
+_NO_DEFAULT = object()
+
+
+def first(out: str, *sources: str, default: Any = _NO_DEFAULT, transform: Optional[Callable] = None) -> Field:
+    """doc.get(a) or doc.get(b) or … [or default]"""
+    return Field(out, sources or (out,), default, "first", transform)
+
+
+def get(out: str, source: Optional[str] = None, default: Any = None) -> Field:
+    """doc.get(source, default) — default only when the key is missing."""
+    return Field(out, (source or out,), default, "get")
+
+
+def const(out: str, value: Any) -> Field:
+    return Field(out, (), value, "const")
+
+
+_LITERALS = (str, int, float, bool, type(None))
+
+
+class Normalizer:
+    def __init__(self, name: str, fields: List[Field], one: Callable, many: Callable):
+        self.name = name
+        self.fields = fields
+        self.one = one        # doc → dict
+        self.many = many      # iterable of docs → list of dicts (falsy docs skipped)
+        self._record = None
+
+    def __call__(self, doc: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return self.one(doc) if doc else {}
+
+    def record(self):
+        """__slots__ class with from_doc()/to_dict(); built on first use."""
+        if self._record is None:
+            self._record = _make_record(self)
+        return self._record
+
+
+def _expr(f: Field, i: int, env: Dict[str, Any]) -> str:
+    if f.default is not _NO_DEFAULT and not isinstance(f.default, _LITERALS):
+        raise TypeError(f"{f.out}: default must be an immutable literal")
+    if f.mode == "const":
+        return repr(f.default)
+    if f.mode == "get":
+        expr = f"g({f.sources[0]!r}, {f.default!r})"
+    else:
+        expr = " or ".join(f"g({s!r})" for s in f.sources)
+        if f.default is not _NO_DEFAULT:
+            expr += f" or {f.default!r}"
+    if f.transform is not None:
+        env[f"_t{i}"] = f.transform
+        expr = f"_t{i}({expr})"
+    return expr
+
+
+def compile_spec(name: str, fields: List[Field]) -> Normalizer:
+    env: Dict[str, Any] = {}
+    body = ", ".join(f"{f.out!r}: {_expr(f, i, env)}" for i, f in enumerate(fields))
+    src = (
+        f"def one(d):\n"
+        f"    g = d.get\n"
+        f"    return {{{body}}}\n"
+        f"def many(docs):\n"
+        f"    out = []\n"
+        f"    ap = out.append\n"
+        f"    for d in docs:\n"
+        f"        if d:\n"
+        f"            g = d.get\n"
+        f"            ap({{{body}}})\n"
+        f"    return out\n"
+    )
+    exec(compile(src, f"<normalizer:{name}>", "exec"), env)
+    return Normalizer(name, fields, env["one"], env["many"])
+
+
+def _make_record(norm: Normalizer):
+    names = tuple(f.out for f in norm.fields)
+    if not all(n.isidentifier() for n in names):
+        raise ValueError(f"{norm.name}: field names must be identifiers for a slots record")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {n: getattr(self, n) for n in names}
+
+    # generated like the dict converters: one straight-line attribute fill
+    env: Dict[str, Any] = {}
+    assigns = "".join(f"    o.{f.out} = {_expr(f, i, env)}\n" for i, f in enumerate(norm.fields))
+    src = f"def from_doc(cls, d):\n    o = cls.__new__(cls)\n    g = d.get\n{assigns}    return o\n"
+    exec(compile(src, f"<record:{norm.name}>", "exec"), env)
+    from_doc = env["from_doc"]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{n}={getattr(self, n)!r}' for n in names[:3])}, …)"
+
+    cls_name = "".join(p.title() for p in norm.name.split("_")) + "Record"
+    return type(cls_name, (), {
+        "__slots__": names, "to_dict": to_dict, "from_doc": classmethod(from_doc), "__repr__": __repr__,
+    })
+
+
+def _upper(v):
+    return v.upper()
+
+
+# ===== Responders (vegu-responders/{vg_id}, update) =====
+RESPONDER = compile_spec("responder", [
+    first("vg_id", "vg_id", "id", default=""),
+    first("id", "id", "vg_id", default=""),
+    get("email", default=""),
+    first("institution_name", "institution_name", "institutionName", default=""),
+    first("institution_id", "institution_id", "institutionId", default=""),
+    first("first_name", "first_name", "firstName", default=""),
+    first("middle_name", "middle_name", "middleName", default=""),
+    first("last_name", "last_name", "lastName", default=""),
+    get("phone", default=""),
+    get("country", default=""),
+    get("department", default=""),
+    get("status", default=""),
+    get("timezone", default=""),
+    # timestamps (strings or None)
+    get("local_created_at"),
+    get("created_at"),
+    get("last_login"),
+    get("reset_locked_until"),
+    # prefer explicit updated_at; else use _ts
+    first("updated_at", "updated_at", "_ts"),
+    # extras
+    get("admin_notes", default=""),
+    get("_ts"),
+])
+
+# ===== Responder search rows (typeahead) =====
+RESPONDER_ROW = compile_spec("responder_row", [
+    get("id"),
+    first("vg_id", "vg_id", "id"),
+    get("email"),
+    get("firstName"),
+    get("middleName"),
+    get("lastName"),
+    get("institution_name"),
+    get("institution_id"),
+])
+
+# ===== Complaints =====
+COMPLAINT_SHELL = compile_spec("complaint_shell", [
+    first("vg_id", "vg_id", "id"),
+    first("subject", "display_subject", "subject", default=""),
+    first("severity", "threat_level", default="", transform=_upper),
+    first("status", "threat_status", default="", transform=_upper),
+    get("institution_id", "institutionId"),
+    get("institution_name"),
+    get("created_at"),
+    first("updated_at", "last_updated", "_ts"),
+])
+
+COMPLAINT_ROW = compile_spec("complaint_row", [
+    first("vg_id", "vg_id", "id"),
+    first("subject", "display_subject", "subject", default=""),
+    first("institution_name", "institution_name", default=""),
+    first("threat_level", "threat_level", default="", transform=_upper),
+    first("threat_status", "threat_status", default="", transform=_upper),
+    first("updated_at", "last_updated", "_ts"),
+    const("preview", ""),   # could later add first 120 chars of latest msg if desired
+])
+
+COMPLAINT_MESSAGE = compile_spec("complaint_message", [
+    get("id"),
+    get("role", "sender_type"),            # 'user' | 'responder' | 'system'
+    first("text", "content", default=""),
+    get("ts", "timestamp"),
+    first("type", "message_type", default="text"),
+])
+
 
 def normalize_responder(doc: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    if not doc:
-        return {}
-    return {
-        "vg_id":              doc.get("vg_id") or doc.get("id") or "",
-        "id":                 doc.get("id") or doc.get("vg_id") or "",
-        "email":              doc.get("email", ""),
-        "institution_name":   doc.get("institution_name") or doc.get("institutionName") or "",
-        "institution_id":     doc.get("institution_id") or doc.get("institutionId") or "",
-        "first_name":         doc.get("first_name") or doc.get("firstName") or "",
-        "middle_name":        doc.get("middle_name") or doc.get("middleName") or "",
-        "last_name":          doc.get("last_name") or doc.get("lastName") or "",
-        "phone":              doc.get("phone", ""),
-        "country":            doc.get("country", ""),
-        "department":         doc.get("department", ""),
-        "status":             doc.get("status", ""),
-        "timezone":           doc.get("timezone", ""),
-        # timestamps (strings or None)
-        "local_created_at":   doc.get("local_created_at"),
-        "created_at":         doc.get("created_at"),
-        "last_login":         doc.get("last_login"),
-        "reset_locked_until": doc.get("reset_locked_until"),
-        # prefer explicit updated_at; else use _ts
-        "updated_at":         doc.get("updated_at") or doc.get("_ts"),
-        # extras
-        "admin_notes":        doc.get("admin_notes", ""),
-        "_ts":                doc.get("_ts"),
-    }
+    return RESPONDER(doc)
@@ -0,0 +1,142 @@
+# shared/password_pool.py v1.0
+#
+# bcrypt off the request thread, with a hard bound on queued work.
+# - bcrypt (pyca, Rust core) releases the GIL while hashing, so a small thread
+#   pool gives real parallelism without process-pool pickling overhead
+# - at most MINC_BCRYPT_WORKERS + MINC_BCRYPT_MAX_QUEUE checks may be pending;
+#   beyond that `PasswordPoolBusy` is raised at once (callers answer 503)
+# - cost factor: hashes whose cost differs from MINC_BCRYPT_ROUNDS are re-hashed
+#   after a successful check, in the background (see schedule_rehash)
+
+import os
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional
+
+import bcrypt
+
+from . import tracing
+
+BCRYPT_WORKERS   = int(os.getenv("MINC_BCRYPT_WORKERS", os.cpu_count() or 2))
+BCRYPT_MAX_QUEUE = int(os.getenv("MINC_BCRYPT_MAX_QUEUE", 32))
+BCRYPT_TIMEOUT_S = float(os.getenv("MINC_BCRYPT_TIMEOUT_S", 5))
+BCRYPT_ROUNDS    = int(os.getenv("MINC_BCRYPT_ROUNDS", 12))   # target cost factor
+
+_COST_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordPoolBusy(Exception):
+    """Too many password checks already queued on this instance."""
+
+
+_pool = ThreadPoolExecutor(max_workers=max(1, BCRYPT_WORKERS), thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(max(1, BCRYPT_WORKERS) + max(0, BCRYPT_MAX_QUEUE))
+_lock = threading.Lock()
+POOL_STATS: Dict[str, object] = {
+    "submitted": 0, "completed": 0, "rejected": 0, "timeouts": 0,
+    "in_flight": 0, "running": 0, "busy_seconds": 0.0,
+    "rehash_scheduled": 0, "cost_seen": {},
+}
+
+
+def _bump(key: str, n=1) -> None:
+    with _lock:
+        POOL_STATS[key] += n
+
+
+def queue_depth() -> int:
+    """Checks waiting for a worker (submitted but not yet running)."""
+    return max(0, int(POOL_STATS["in_flight"]) - int(POOL_STATS["running"]))
+
+
+def hash_cost(hashed: str) -> Optional[int]:
+    m = _COST_RE.match(hashed or "")
+    return int(m.group(1)) if m else None
+
+
+def _run(fn: Callable, *args):
+    _bump("running")
+    t0 = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        with _lock:
+            POOL_STATS["running"] -= 1
+            POOL_STATS["in_flight"] -= 1
+            POOL_STATS["completed"] += 1
+            POOL_STATS["busy_seconds"] += time.perf_counter() - t0
+        _slots.release()
+
+
+def submit(fn: Callable, *args):
+    """Reserve a slot (fail fast when full) and run fn(*args) on the pool."""
+    if not _slots.acquire(blocking=False):
+        _bump("rejected")
+        raise PasswordPoolBusy("password verification queue is full")
+    with _lock:
+        POOL_STATS["submitted"] += 1
+        POOL_STATS["in_flight"] += 1
+    try:
+        return _pool.submit(_run, fn, *args)
+    except Exception:
+        with _lock:
+            POOL_STATS["in_flight"] -= 1
+        _slots.release()
+        raise
+
+
+def _checkpw(plain: bytes, hashed: bytes) -> bool:
+    try:
+        return bcrypt.checkpw(plain, hashed)
+    except Exception:
+        return False
+
+
+def check_password(plain: str, hashed: str) -> bool:
+    """Blocking for the caller, but the CPU burst runs on the bounded pool."""
+    if not hashed:
+        return False
+    cost = hash_cost(hashed)
+    with _lock:
+        seen = POOL_STATS["cost_seen"]
+        seen[cost] = seen.get(cost, 0) + 1
+    with tracing.span("bcrypt.check", {"minc.bcrypt.cost": cost or 0, "minc.bcrypt.queue_depth": queue_depth()}):
+        fut = submit(_checkpw, plain.encode("utf-8"), hashed.encode("utf-8"))
+        try:
+            return fut.result(timeout=BCRYPT_TIMEOUT_S)
+        except FutureTimeout:
+            _bump("timeouts")
+            raise PasswordPoolBusy("password verification timed out")
+
+
+def needs_rehash(hashed: str) -> bool:
+    cost = hash_cost(hashed)
+    return cost is not None and cost != BCRYPT_ROUNDS
+
+
+def _hash(plain: bytes) -> str:
+    return bcrypt.hashpw(plain, bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def schedule_rehash(plain: str, on_done: Callable[[str], None]) -> bool:
+    """
+    Re-hash at the target cost in the background and hand the new hash to
+    `on_done` (e.g. a write-behind patch). Skipped when the pool is busy;
+    the next successful login will try again.
+    """
+    try:
+        fut = submit(_hash, plain.encode("utf-8"))
+    except PasswordPoolBusy:
+        return False
+    _bump("rehash_scheduled")
+
+    def _cb(f):
+        try:
+            on_done(f.result())
+        except Exception:
+            logging.exception("[BCRYPT] rehash failed")
+    fut.add_done_callback(_cb)
+    return True
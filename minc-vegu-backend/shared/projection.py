@@ -0,0 +1,93 @@
+# shared/projection.py v1.0
+#
+# Client-selectable field projection (`?fields=a,b,c`) pushed down into Cosmos SQL.
+# - every entity has an allow-list; unknown names are a 400, never a silent drop
+# - fields stored under camelCase/snake_case variants are aliased server-side:
+#     SELECT VALUE {"first_name": IIF(IS_DEFINED(c.first_name), c.first_name, c.firstName)}
+#   otherwise a plain `SELECT c.a, c.b` is used
+# - ALWAYS_FIELDS are added so handlers keep what they rely on (ids, _etag)
+# No `fields` → `*`, i.e. the previous full-document behavior.
+
+from typing import Dict, List, Optional, Tuple
+
+MAX_FIELDS = 40
+
+FIELD_ALLOW: Dict[str, frozenset] = {
+    "institution": frozenset((
+        "id", "vg_id", "type", "name", "address1", "address2", "city", "state", "postal_code",
+        "country", "country_code", "timezone", "complaint_email", "complaint_phone",
+        "status", "plan_type", "subscription_expiry", "institution_type", "institution_category",
+        "personnel_name", "comment", "admin_notes", "max_responders", "testing",
+        "primary_contact_name", "primary_contact_phone", "primary_contact_email",
+        "website_url", "logo_url", "created_at", "updated_at", "last_updated",
+    )),
+    "vegu_user": frozenset((
+        "id", "vg_id", "type", "email", "first_name", "middle_name", "last_name", "dob",
+        "status", "institution_name", "institution_id", "timezone", "country", "phone",
+        "admin_notes", "created_at", "updated_at",
+    )),
+    "message": frozenset((
+        "id", "complaint_vg_id", "sender_type", "message_type", "content", "timestamp",
+    )),
+}
+
+# output name → stored variants, first defined wins
+FIELD_ALIASES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "vegu_user": {
+        "first_name":  ("first_name", "firstName"),
+        "middle_name": ("middle_name", "middleName"),
+        "last_name":   ("last_name", "lastName"),
+        "institution_id": ("institution_id", "institutionId"),
+    },
+    "institution": {},
+    "message": {},
+}
+
+ALWAYS_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "institution": ("vg_id", "_etag"),
+    "vegu_user":   ("id", "_etag"),
+    "message":     ("id",),
+}
+
+
+def parse_fields(raw: Optional[str], entity: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    `?fields=` → (field list | None, error | None).
+    None means "no projection requested" (full documents).
+    """
+    if raw is None or not raw.strip():
+        return None, None
+    allow = FIELD_ALLOW[entity]
+    fields: List[str] = []
+    for f in raw.split(","):
+        f = f.strip()
+        if not f or f in fields:
+            continue
+        if f not in allow:
+            return None, f"unknown field '{f}'"
+        fields.append(f)
+    if len(fields) > MAX_FIELDS:
+        return None, f"too many fields (max {MAX_FIELDS})"
+    return (fields or None), None
+
+
+def _expr(alias: str, variants: Tuple[str, ...]) -> str:
+    # IIF(IS_DEFINED(c.a), c.a, IIF(IS_DEFINED(c.b), c.b, c.c))
+    out = f"{alias}.{variants[-1]}"
+    for v in reversed(variants[:-1]):
+        out = f"IIF(IS_DEFINED({alias}.{v}), {alias}.{v}, {out})"
+    return out
+
+
+def select_clause(entity: str, fields: Optional[List[str]], alias: str = "c") -> str:
+    """
+    Text that follows `SELECT [TOP n]`: "*", "c.a, c.b" or "VALUE {...}".
+    """
+    if not fields:
+        return "*"
+    wanted = list(fields) + [f for f in ALWAYS_FIELDS.get(entity, ()) if f not in fields]
+    aliases = FIELD_ALIASES.get(entity, {})
+    if not any(f in aliases for f in wanted):
+        return ", ".join(f"{alias}.{f}" for f in wanted)
+    parts = [f'"{f}": {_expr(alias, aliases.get(f, (f,)))}' for f in wanted]
+    return "VALUE {" + ", ".join(parts) + "}"
@@ -0,0 +1,198 @@
+# shared/query_guard.py v1.0
+#
+# Cost guard for the typeahead / search handlers, whose SQL is one
+# CONTAINS(LOWER()) group per token and field — a cross-partition scan whose
+# cost grows with tokens × fields and with how unselective each token is.
+# - tokens: shorter than MINC_QG_MIN_TOKEN are dropped (a 1-char CONTAINS
+#   matches nearly everything); duplicates removed; at most MINC_QG_MAX_TOKENS,
+#   keeping the longest (most selective) in their original order
+# - estimate: Σ over containers of weight × fields × Σ(1 + 4/len(token));
+#   weights reflect container size/scan cost (messages ≫ complaints > the rest)
+# - over MINC_QG_MAX_COST the plan is "degraded": optional scans are dropped
+#   first (complaint search stops scanning message bodies); only if that is not
+#   enough is each token routed to the fields it can match (narrow_fields:
+#   ids such as VG25C0001141 → vg_id, "@" → email)
+# - fan-out: follow-up lookups by id are capped at MINC_QG_MAX_FANOUT
+# - RU budget: collect() reads a query page by page and stops once this
+#   request's Cosmos charge (shared.instrumentation, from x-ms-request-charge)
+#   passes MINC_QG_RU_BUDGET; the response is then marked truncated
+# - nothing to search (every token too short) → "rejected": the handler answers
+#   an empty list without touching Cosmos
+#
+# Env:
+#   MINC_QG               0 disables the guard (plans pass everything through)
+#   MINC_QG_MIN_TOKEN     default 2
+#   MINC_QG_MAX_TOKENS    default 4
+#   MINC_QG_MAX_COST      default 60 (≈ a 3-token users search)
+#   MINC_QG_MAX_FANOUT    default 100
+#   MINC_QG_RU_BUDGET     per request, default 300
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import metrics
+from .instrumentation import request_ru
+
+QG_ENABLED    = os.getenv("MINC_QG", "1") != "0"
+QG_MIN_TOKEN  = int(os.getenv("MINC_QG_MIN_TOKEN", 2))
+QG_MAX_TOKENS = int(os.getenv("MINC_QG_MAX_TOKENS", 4))
+QG_MAX_COST   = float(os.getenv("MINC_QG_MAX_COST", 60))
+QG_MAX_FANOUT = int(os.getenv("MINC_QG_MAX_FANOUT", 100))
+QG_RU_BUDGET  = float(os.getenv("MINC_QG_RU_BUDGET", 300))
+
+# relative scan cost per document set; unknown containers weigh 1
+CONTAINER_WEIGHT: Dict[str, float] = {
+    "messages": 8.0,
+    "complaints": 2.0,
+    "user-profiles": 2.0,
+    "responders": 1.0,
+    "institutions": 1.0,
+}
+
+_SPLIT = re.compile(r"[^A-Za-z0-9@._+-]+")
+_ID_TOKEN = re.compile(r"^vg\d*[a-z]?\d+$")   # vgi000001, vg25001055, vg25c0001141
+
+metrics.counter("minc_query_guard_total", "Search plans by route and outcome.")
+
+
+def tokens(q: str) -> List[str]:
+    """Lowercased search tokens (same split the search handlers always used)."""
+    return [t.lower() for t in _SPLIT.split(q or "") if t]
+
+
+def _token_cost(tok: str) -> float:
+    return 1.0 + 4.0 / max(1, len(tok))
+
+
+def estimate(targets: Dict[str, int], toks: Sequence[str]) -> float:
+    """targets: container → number of CONTAINS fields per token."""
+    per_token = sum(_token_cost(t) for t in toks)
+    return sum(CONTAINER_WEIGHT.get(c, 1.0) * n * per_token for c, n in targets.items())
+
+
+def _select_tokens(raw: List[str]) -> Tuple[List[str], List[str]]:
+    seen, kept, dropped = set(), [], []
+    for t in raw:
+        if t in seen:
+            continue
+        seen.add(t)
+        (kept if len(t) >= QG_MIN_TOKEN else dropped).append(t)
+    if len(kept) > QG_MAX_TOKENS:
+        longest = set(sorted(kept, key=len, reverse=True)[:QG_MAX_TOKENS])
+        dropped += [t for t in kept if t not in longest]
+        kept = [t for t in kept if t in longest]
+    return kept, dropped
+
+
+def plan(route: str, q: str, targets: Dict[str, int], optional: Sequence[str] = (),
+         split=tokens) -> Dict[str, Any]:
+    """
+    Decide how to run one search. `targets` lists every container the full
+    query would scan (→ fields per token); `optional` names the ones that may
+    be skipped when the estimate is over budget, in the order to drop them.
+    Returns {"tokens", "dropped", "skip", "mode", "narrow", "cost", "truncated"};
+    "narrow" is set when the cost is still over budget after every optional
+    scan was dropped, and tells fields_for to narrow the fields per token.
+    """
+    raw = split(q)
+    if not QG_ENABLED:
+        return {"route": route, "tokens": raw, "dropped": [], "skip": [], "mode": "full",
+                "narrow": False, "cost": estimate(targets, raw), "truncated": False}
+    kept, dropped = _select_tokens(raw)
+    p = {"route": route, "tokens": kept, "dropped": dropped, "skip": [], "mode": "full",
+         "narrow": False, "cost": 0.0, "truncated": False}
+    if not kept:
+        p["mode"] = "rejected"
+        metrics.inc("minc_query_guard_total", {"route": route, "outcome": "rejected"})
+        return p
+    active = dict(targets)
+    cost = estimate(active, kept)
+    for name in optional:
+        if cost <= QG_MAX_COST:
+            break
+        active.pop(name, None)
+        p["skip"].append(name)
+        cost = estimate(active, kept)
+    p["narrow"] = cost > QG_MAX_COST
+    if p["skip"] or p["narrow"]:
+        p["mode"] = "degraded"
+    p["cost"] = round(cost, 1)
+    outcome = p["mode"] if p["mode"] != "full" else ("trimmed" if dropped else "full")
+    metrics.inc("minc_query_guard_total", {"route": route, "outcome": outcome})
+    return p
+
+
+def narrow_fields(tok: str, id_fields: Sequence[str], email_fields: Sequence[str],
+                  text_fields: Sequence[str]) -> List[str]:
+    """Fields a token is worth matching against in degraded mode."""
+    if _ID_TOKEN.match(tok):
+        return list(id_fields)
+    if "@" in tok:
+        return list(email_fields)
+    return list(text_fields)
+
+
+def fields_for(p: Dict[str, Any], tok: str, all_fields: Sequence[str], id_fields: Sequence[str],
+               email_fields: Sequence[str], text_fields: Sequence[str]) -> List[str]:
+    """all_fields normally; narrowed per token when dropping optional scans was not enough."""
+    if not p.get("narrow"):
+        return list(all_fields)
+    return narrow_fields(tok, id_fields, email_fields, text_fields)
+
+
+def fanout(p: Dict[str, Any], ids: Iterable[str]) -> List[str]:
+    """At most QG_MAX_FANOUT ids (sorted, so the cut is stable); marks the plan truncated."""
+    ids = sorted(ids)
+    if QG_ENABLED and len(ids) > QG_MAX_FANOUT:
+        p["truncated"] = True
+        return ids[:QG_MAX_FANOUT]
+    return ids
+
+
+def collect(p: Dict[str, Any], query_iterable, max_items: Optional[int] = None) -> List[Any]:
+    """Read pages until done, max_items, or the request's RU passes the budget."""
+    out: List[Any] = []
+    pages = query_iterable.by_page()
+    for page in pages:
+        out.extend(page)
+        if max_items is not None and len(out) >= max_items:
+            return out[:max_items]
+        # only a query with pages left is cut short
+        if QG_ENABLED and request_ru() > QG_RU_BUDGET and getattr(pages, "continuation_token", None):
+            p["truncated"] = True
+            metrics.inc("minc_query_guard_total", {"route": p["route"], "outcome": "ru_budget"})
+            break
+    return out
+
+
+def budget_skip(p: Dict[str, Any], name: str) -> bool:
+    """True (and the plan degraded) when the request's RU is spent before optional step `name`."""
+    if not QG_ENABLED or request_ru() <= QG_RU_BUDGET:
+        return False
+    p["skip"].append(name)
+    p["mode"] = "degraded"
+    metrics.inc("minc_query_guard_total", {"route": p["route"], "outcome": "ru_budget"})
+    return True
+
+
+def summary(p: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """What the guard changed, for the response body; None when nothing was."""
+    if not p["dropped"] and not p["truncated"] and p["mode"] in ("full", "rejected"):
+        return None   # untouched, or an empty query
+    out: Dict[str, Any] = {"mode": p["mode"], "truncated": p["truncated"]}
+    if p["dropped"]:
+        out["droppedTokens"] = p["dropped"]
+    if p["skip"]:
+        out["skipped"] = p["skip"]
+    if p["mode"] == "rejected":
+        out["minTokenLength"] = QG_MIN_TOKEN
+    return out
+
+
+def annotate(body: Dict[str, Any], p: Dict[str, Any]) -> Dict[str, Any]:
+    """body with a "guard" entry when the plan changed anything."""
+    guard = summary(p)
+    if guard:
+        body["guard"] = guard
+    return body
@@ -0,0 +1,203 @@
+# shared/rate_limit.py v1.0
+#
+# Sliding-window rate limits for the unauthenticated auth / OTP routes.
+# Checked first thing in the handler, so an over-limit request costs one
+# counter increment — no Cosmos query, no bcrypt, no email.
+#
+# Scopes (per route): client IP, identifier (email / mincId), global.
+# Limits are "<count>/<seconds>" (env overridable, empty or 0 disables):
+#   MINC_RL_IP          default 60/60
+#   MINC_RL_IDENTIFIER  default 10/300
+#   MINC_RL_GLOBAL      default 1200/60
+# Client IP: the X-Forwarded-For entry appended by the platform front end
+# (rightmost; the client controls everything to its left), so rotating the
+# header does not get a fresh per-IP budget.
+#   MINC_RL_TRUSTED_HOPS       proxies that append to X-Forwarded-For in front
+#                              of the app, default 1 (the App Service front end)
+#   MINC_RL_CLIENT_IP_HEADER   header to use instead, only when the platform
+#                              sets / overwrites it (e.g. x-azure-clientip
+#                              behind Front Door); default unset
+# The per-IP limit is checked before the global one, and only requests that
+# pass it count toward the global budget, so one IP cannot use it up.
+# Backends:
+#   in-process (default) — per instance
+#   Redis (MINC_RATE_LIMIT_REDIS_URL, e.g. redis://localhost:6379/0) — shared
+#   across instances; any Redis-compatible server works for local tests.
+#
+# Algorithm: sliding window counter — the previous fixed window's count is
+# weighted by how much of it still overlaps the sliding window.
+
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import azure.functions as func
+
+from .http_response import json_response
+
+try:
+    import redis  # optional
+except Exception:
+    redis = None
+
+RATE_LIMIT_ENABLED = os.getenv("MINC_RATE_LIMIT", "1") != "0"
+REDIS_URL = os.getenv("MINC_RATE_LIMIT_REDIS_URL", "")
+KEY_PREFIX = "minc:rl:"
+TRUSTED_HOPS = max(1, int(os.getenv("MINC_RL_TRUSTED_HOPS", 1)))
+CLIENT_IP_HEADER = (os.getenv("MINC_RL_CLIENT_IP_HEADER") or "").strip().lower()
+
+
+def _limit(env: str, default: str) -> Optional[Tuple[int, int]]:
+    raw = (os.getenv(env, default) or "").strip()
+    try:
+        n, w = raw.split("/", 1)
+        n, w = int(n), int(w)
+    except ValueError:
+        return None
+    return (n, w) if n > 0 and w > 0 else None
+
+
+LIMIT_IP         = _limit("MINC_RL_IP", "60/60")
+LIMIT_IDENTIFIER = _limit("MINC_RL_IDENTIFIER", "10/300")
+LIMIT_GLOBAL     = _limit("MINC_RL_GLOBAL", "1200/60")
+
+
+# ----- backends -----
+
+class MemoryBackend:
+    """Fixed-window counters in a dict; stale windows are pruned lazily."""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def incr(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        cur_id = int(now // window)
+        cur_k, prev_k = f"{key}:{cur_id}", f"{key}:{cur_id - 1}"
+        with self._lock:
+            cur = self._counts.get(cur_k, 0) + 1
+            self._counts[cur_k] = cur
+            prev = self._counts.get(prev_k, 0)
+            if now - self._last_prune > 60:
+                self._prune(now)
+        return cur, prev
+
+    def _prune(self, now: float) -> None:
+        # keys end in ":<window_id>"; drop anything older than the previous window
+        self._last_prune = now
+        for k in list(self._counts):
+            base, _, wid = k.rpartition(":")
+            window = _WINDOW_OF.get(base.rsplit("|", 1)[-1])
+            if window and int(wid) < int(now // window) - 1:
+                del self._counts[k]
+
+
+class RedisBackend:
+    """INCR + EXPIRE on the current window, GET on the previous one (one round trip)."""
+
+    def __init__(self, url: str):
+        self._r = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+    def incr(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        cur_id = int(now // window)
+        cur_k, prev_k = f"{KEY_PREFIX}{key}:{cur_id}", f"{KEY_PREFIX}{key}:{cur_id - 1}"
+        pipe = self._r.pipeline(transaction=False)
+        pipe.incr(cur_k)
+        pipe.expire(cur_k, window * 2)
+        pipe.get(prev_k)
+        cur, _, prev = pipe.execute()
+        return int(cur), int(prev or 0)
+
+
+# scope name → window seconds (used by MemoryBackend pruning)
+_WINDOW_OF = {s: l[1] for s, l in (("ip", LIMIT_IP), ("id", LIMIT_IDENTIFIER), ("global", LIMIT_GLOBAL)) if l}
+
+_memory = MemoryBackend()
+_backend = None
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        if REDIS_URL and redis is not None:
+            _backend = RedisBackend(REDIS_URL)
+        else:
+            if REDIS_URL:
+                logging.warning("[RATE-LIMIT] redis package missing; using in-process limits")
+            _backend = _memory
+    return _backend
+
+
+def hit(key: str, limit: Tuple[int, int], now: Optional[float] = None) -> Tuple[bool, int]:
+    """Count one request against `key`. Returns (allowed, retry_after_seconds)."""
+    n, window = limit
+    now = time.time() if now is None else now
+    try:
+        cur, prev = _get_backend().incr(key, window, now)
+    except Exception:
+        # shared backend down → fall back to per-instance limits, never fail closed
+        logging.warning("[RATE-LIMIT] backend error; using in-process limits", exc_info=True)
+        cur, prev = _memory.incr(key, window, now)
+    elapsed = (now % window) / window
+    weighted = prev * (1.0 - elapsed) + cur
+    if weighted <= n:
+        return True, 0
+    return False, max(1, math.ceil(window - (now % window)))
+
+
+# ----- HTTP helpers -----
+
+def _strip_port(ip: str) -> str:
+    # Azure front ends append the port ("1.2.3.4:5678", "[2001:db8::1]:5678")
+    if ip.startswith("["):
+        return ip[1:].split("]", 1)[0]
+    if ip.count(":") == 1:
+        return ip.split(":")[0]
+    return ip
+
+
+def client_ip(req: func.HttpRequest) -> str:
+    """The caller's address as seen by the trusted front end, never a client-chosen one."""
+    if CLIENT_IP_HEADER:
+        ip = (req.headers.get(CLIENT_IP_HEADER) or "").strip()
+    else:
+        hops = [h.strip() for h in (req.headers.get("x-forwarded-for") or "").split(",") if h.strip()]
+        ip = hops[-TRUSTED_HOPS] if len(hops) >= TRUSTED_HOPS else ""
+    return _strip_port(ip) or "unknown"
+
+
+def too_many(retry_after: int, scope: str) -> func.HttpResponse:
+    return json_response(
+        {"success": False, "error": "Too many requests. Try again later.",
+         "reason": "rate_limited", "scope": scope, "retryAfter": retry_after},
+        429,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def check_request(req: func.HttpRequest, route: str) -> Optional[func.HttpResponse]:
+    """Per-IP + global limits. Returns a 429 response, or None to proceed."""
+    if not RATE_LIMIT_ENABLED:
+        return None
+    # per-IP first: a request refused here never counts toward the global budget
+    if LIMIT_IP:
+        ok, retry = hit(f"{route}|{client_ip(req)}|ip", LIMIT_IP)
+        if not ok:
+            return too_many(retry, "ip")
+    if LIMIT_GLOBAL:
+        ok, retry = hit(f"{route}|global", LIMIT_GLOBAL)
+        if not ok:
+            return too_many(retry, "global")
+    return None
+
+
+def check_identifier(route: str, identifier: str) -> Optional[func.HttpResponse]:
+    """Per-identifier limit (normalized email / mincId)."""
+    if not RATE_LIMIT_ENABLED or not LIMIT_IDENTIFIER or not identifier:
+        return None
+    ok, retry = hit(f"{route}|{identifier.strip().lower()}|id", LIMIT_IDENTIFIER)
+    return None if ok else too_many(retry, "identifier")
@@ -0,0 +1,197 @@
+# shared/regions.py v1.0
+#
+# Multi-region reads for the shared Cosmos clients.
+# - preferred read regions and consistency level (client_kwargs(), passed to
+#   every CosmosClient): reads go to the first available region in
+#   MINC_COSMOS_PREFERRED_REGIONS instead of always the write region; writes
+#   are unaffected (single write region)
+# - hedged reads (MINC_HEDGE=1, needs two or more preferred regions): on the
+#   read-only routes in MINC_HEDGE_ROUTES, a point read or a read_all() query
+#   that has not answered within the hedge delay is sent a second time with
+#   the first region excluded (per-request excluded_locations); whichever
+#   answers first wins, the other is left to finish in the background
+# - hedge delay: p95 of recent primary-region latency for that container and
+#   operation (MINC_HEDGE_PERCENTILE), clamped to [MIN, MAX]; MINC_HEDGE_DELAY_MS
+#   until MINC_HEDGE_MIN_SAMPLES calls have been seen
+# - at most MINC_HEDGE_MAX_IN_FLIGHT hedges run at once, so a slow region does
+#   not double the load on the other one
+# - threads: a hedged read's primary call runs on a worker of its own
+#   (MINC_HEDGE_PRIMARY_THREADS) only when one is idle, so it never waits in a
+#   queue (which would count against the hedge delay); when none is idle it
+#   runs on the calling thread, unhedged, so read concurrency is never capped.
+#   Hedges run on a separate pool sized to MINC_HEDGE_MAX_IN_FLIGHT
+# - an answer (404, 412 …) from the first region is final; only throttling,
+#   unavailability and 5xx wait for the hedge
+#
+# Env:
+#   MINC_COSMOS_PREFERRED_REGIONS  comma-separated, e.g. "West Europe,North Europe"
+#   MINC_COSMOS_CONSISTENCY        Session | Eventual | ConsistentPrefix | BoundedStaleness |
+#                                  Strong (only weaker than the account's takes effect);
+#                                  default: the account's
+#   MINC_HEDGE                     1 enables hedged reads (default 0)
+#   MINC_HEDGE_ROUTES              comma-separated routes, default the get / search / thread routes
+#   MINC_HEDGE_PERCENTILE          default 0.95
+#   MINC_HEDGE_DELAY_MS            delay before enough samples, default 100
+#   MINC_HEDGE_MIN_DELAY_MS        default 10
+#   MINC_HEDGE_MAX_DELAY_MS        default 1000
+#   MINC_HEDGE_MIN_SAMPLES         default 50
+#   MINC_HEDGE_MAX_IN_FLIGHT       default 16
+#   MINC_HEDGE_PRIMARY_THREADS     reads that can be hedged at once, default 32
+
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from . import metrics, resilience
+
+PREFERRED_REGIONS: List[str] = [r.strip() for r in os.getenv("MINC_COSMOS_PREFERRED_REGIONS", "").split(",") if r.strip()]
+CONSISTENCY       = (os.getenv("MINC_COSMOS_CONSISTENCY") or "").strip() or None
+
+DEFAULT_HEDGE_ROUTES = (
+    "vegu-complaints/{vg_id}", "vegu-complaint-messages", "vegu/reveal-user/{complaint_vg_id}",
+    "vegu-users/{vg_id}", "vegu-institutions/{vg_id}", "vegu-responders/{vg_id}",
+    "vegu-complaints-search", "vegu-users-search", "vegu-institutions-search", "vegu-responders-search",
+    "minc-audit-log/{subject_id}",
+)
+
+HEDGE_ENABLED      = os.getenv("MINC_HEDGE", "0") == "1" and len(PREFERRED_REGIONS) >= 2
+HEDGE_ROUTES       = frozenset(r.strip() for r in (os.getenv("MINC_HEDGE_ROUTES") or ",".join(DEFAULT_HEDGE_ROUTES)).split(",") if r.strip())
+HEDGE_PERCENTILE   = float(os.getenv("MINC_HEDGE_PERCENTILE", 0.95))
+HEDGE_DELAY_MS     = float(os.getenv("MINC_HEDGE_DELAY_MS", 100))
+HEDGE_MIN_DELAY_MS = float(os.getenv("MINC_HEDGE_MIN_DELAY_MS", 10))
+HEDGE_MAX_DELAY_MS = float(os.getenv("MINC_HEDGE_MAX_DELAY_MS", 1000))
+HEDGE_MIN_SAMPLES  = int(os.getenv("MINC_HEDGE_MIN_SAMPLES", 50))
+HEDGE_MAX_IN_FLIGHT = int(os.getenv("MINC_HEDGE_MAX_IN_FLIGHT", 16))
+HEDGE_PRIMARY_THREADS = int(os.getenv("MINC_HEDGE_PRIMARY_THREADS", 32))
+
+SAMPLES = 256          # recent primary latencies kept per (container, op)
+RECOMPUTE_EVERY = 16   # samples between percentile recomputations
+
+metrics.counter("minc_hedge_sent_total", "Hedged (second-region) reads sent, by container and op.")
+metrics.counter("minc_hedge_wins_total", "Hedged reads by which region answered first.")
+metrics.counter("minc_hedge_skipped_total", "Reads not hedged: MINC_HEDGE_MAX_IN_FLIGHT reached, or no idle primary worker.")
+
+
+def client_kwargs() -> Dict[str, Any]:
+    """CosmosClient kwargs for the configured read regions / consistency (empty when unset)."""
+    kw: Dict[str, Any] = {}
+    if PREFERRED_REGIONS:
+        kw["preferred_locations"] = list(PREFERRED_REGIONS)
+    if CONSISTENCY:
+        kw["consistency_level"] = CONSISTENCY
+    return kw
+
+
+def hedge_kwargs() -> Dict[str, Any]:
+    """Per-request kwargs that send a read past the first preferred region."""
+    return {"excluded_locations": [PREFERRED_REGIONS[0]]}
+
+
+def should_hedge(route: str) -> bool:
+    return HEDGE_ENABLED and route in HEDGE_ROUTES
+
+
+# ----- hedge delay (p95 of the primary region) -----
+
+_lat: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_lat_lock = threading.Lock()
+
+
+def _observe(container: str, op: str, seconds: float) -> None:
+    with _lat_lock:
+        s = _lat.get((container, op))
+        if s is None:
+            s = _lat[(container, op)] = {"samples": deque(maxlen=SAMPLES), "n": 0, "delay": None}
+        samples: Deque[float] = s["samples"]
+        samples.append(seconds)
+        s["n"] += 1
+        if len(samples) >= HEDGE_MIN_SAMPLES and s["n"] % RECOMPUTE_EVERY == 0:
+            ordered = sorted(samples)
+            p = ordered[min(len(ordered) - 1, int(HEDGE_PERCENTILE * len(ordered)))]
+            s["delay"] = min(HEDGE_MAX_DELAY_MS, max(HEDGE_MIN_DELAY_MS, p * 1000.0)) / 1000.0
+
+
+def hedge_delay_s(container: str, op: str) -> float:
+    s = _lat.get((container, op))
+    delay = s["delay"] if s else None
+    return delay if delay is not None else HEDGE_DELAY_MS / 1000.0
+
+
+def delays() -> Dict[str, Optional[float]]:
+    """Current hedge delay (ms) per container/op, None while still on the default."""
+    return {f"{c}/{op}": (round(s["delay"] * 1000.0, 1) if s["delay"] is not None else None)
+            for (c, op), s in list(_lat.items())}
+
+
+# ----- hedged call -----
+
+_primary_pool = ThreadPoolExecutor(max_workers=max(1, HEDGE_PRIMARY_THREADS), thread_name_prefix="minc-read")
+_primary_slots = threading.BoundedSemaphore(max(1, HEDGE_PRIMARY_THREADS))   # = idle workers
+_pool = ThreadPoolExecutor(max_workers=max(1, HEDGE_MAX_IN_FLIGHT), thread_name_prefix="minc-hedge")
+_hedging = [0]
+_hedging_lock = threading.Lock()
+
+
+def _final(e: BaseException) -> bool:
+    """An answer from Cosmos (404, 409, 412 …), not a reason to wait for the other region."""
+    status = resilience.status_of(e)
+    return status is not None and 0 < status < 500 and status not in resilience.THROTTLED \
+        and status not in resilience.UNAVAILABLE
+
+
+def _primary(container: str, op: str, fn: Callable[[], Any]) -> Any:
+    t0 = time.perf_counter()
+    result = fn()
+    _observe(container, op, time.perf_counter() - t0)
+    return result
+
+
+def _release(_fut) -> None:
+    with _hedging_lock:
+        _hedging[0] -= 1
+
+
+def _release_primary(_fut) -> None:
+    _primary_slots.release()
+
+
+def hedged(container: str, op: str, primary: Callable[[], Any], hedge: Callable[[], Any]) -> Any:
+    """primary(); if it is slower than the hedge delay, also hedge(); first answer wins."""
+    if not _primary_slots.acquire(blocking=False):
+        # every primary worker busy: queueing would eat into the hedge delay
+        metrics.inc("minc_hedge_skipped_total", {"container": container, "op": op})
+        return _primary(container, op, primary)
+    fp = _primary_pool.submit(contextvars.copy_context().run, _primary, container, op, primary)
+    fp.add_done_callback(_release_primary)
+    done, _ = wait([fp], timeout=hedge_delay_s(container, op))
+    if done:
+        return fp.result()
+    with _hedging_lock:
+        if _hedging[0] >= HEDGE_MAX_IN_FLIGHT:
+            allowed = False
+        else:
+            _hedging[0] += 1
+            allowed = True
+    if not allowed:
+        metrics.inc("minc_hedge_skipped_total", {"container": container, "op": op})
+        return fp.result()
+    metrics.inc("minc_hedge_sent_total", {"container": container, "op": op})
+    fh = _pool.submit(contextvars.copy_context().run, hedge)
+    fh.add_done_callback(_release)
+
+    pending = {fp, fh}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in (fp, fh):   # primary first when both are done
+            if f not in done:
+                continue
+            e = f.exception()
+            if e is None or _final(e):
+                metrics.inc("minc_hedge_wins_total", {"container": container, "op": op,
+                                                      "winner": "hedge" if f is fh else "primary"})
+                return f.result()
+    return fp.result()   # both failed: surface the primary region's error
@@ -0,0 +1,218 @@
+# shared/resilience.py v1.0
+#
+# Retry + circuit-breaker policy for every Cosmos container call. Applied by
+# shared.instrumentation.InstrumentedContainer (point operations per call,
+# queries per page, resuming from the last continuation token), so handlers
+# need no changes.
+# - retryable: 429 / 449 and requests that never reached the service, for any
+#   operation (nothing was executed); 408 / 503 only for reads, queries and
+#   upserts, whose repetition is harmless when the first attempt did land
+# - wait: x-ms-retry-after-ms when Cosmos sends it, else exponential backoff
+#   from MINC_RETRY_BASE_MS; ±20% jitter either way so retries of a burst spread
+#   out. A wait longer than MINC_RETRY_MAX_WAIT_MS, or beyond
+#   MINC_RETRY_BUDGET_MS for the call, is not taken: the error surfaces at once
+#   instead of holding a worker
+# - circuit breaker per container: MINC_CB_FAILURES consecutive throttled /
+#   unavailable attempts open it; while open, calls fail fast with
+#   CircuitOpenError (a 503 CosmosHttpResponseError) for MINC_CB_OPEN_S, then
+#   one trial call decides between closing and re-opening
+# - the SDK's own throttle retries (9 attempts / 30 s by default) are cut to
+#   MINC_SDK_RETRY_TOTAL so the waits above are the ones that apply; passed as
+#   retry_throttle_total / retry_throttle_backoff_max, which leave the
+#   transport's connection retries alone (retry_total would cut those too)
+# - handlers answer throttling / open circuits with 503 + Retry-After
+#   (unavailable_response), not a generic 500
+#
+# Env:
+#   MINC_RETRY_MAX          retries after the first attempt, default 3
+#   MINC_RETRY_BASE_MS      first backoff without Retry-After, default 50
+#   MINC_RETRY_MAX_WAIT_MS  longest single wait, default 2000
+#   MINC_RETRY_BUDGET_MS    total wait per call, default 4000
+#   MINC_CB_FAILURES        consecutive failures that open a circuit, default 8
+#   MINC_CB_OPEN_S          seconds a circuit stays open, default 5
+#   MINC_SDK_RETRY_TOTAL    SDK throttle retries (>= 1; 0 means "SDK default"), default 1
+#   MINC_SDK_RETRY_MAX_S    SDK throttle wait cap in seconds, default 1
+
+import os
+import time
+import random
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import azure.functions as func
+from azure.core.exceptions import ServiceRequestError
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from . import metrics
+from .http_response import json_response
+
+RETRY_MAX         = int(os.getenv("MINC_RETRY_MAX", 3))
+RETRY_BASE_MS     = float(os.getenv("MINC_RETRY_BASE_MS", 50))
+RETRY_MAX_WAIT_MS = float(os.getenv("MINC_RETRY_MAX_WAIT_MS", 2000))
+RETRY_BUDGET_MS   = float(os.getenv("MINC_RETRY_BUDGET_MS", 4000))
+CB_FAILURES       = int(os.getenv("MINC_CB_FAILURES", 8))
+CB_OPEN_S         = float(os.getenv("MINC_CB_OPEN_S", 5))
+SDK_RETRY_TOTAL   = int(os.getenv("MINC_SDK_RETRY_TOTAL", 1))
+SDK_RETRY_MAX_S   = int(os.getenv("MINC_SDK_RETRY_MAX_S", 1))
+
+THROTTLED = frozenset((429, 449))
+UNAVAILABLE = frozenset((408, 503))
+# safe to repeat even if the failed attempt was applied
+IDEMPOTENT_OPS = frozenset(("read_item", "query_items", "upsert_item"))
+
+metrics.counter("minc_cosmos_policy_retries_total", "Retries taken by shared.resilience, by status.")
+metrics.counter("minc_cosmos_policy_retry_wait_seconds_total", "Time spent waiting before retries.")
+metrics.counter("minc_cosmos_policy_giveups_total", "Retryable errors surfaced (attempts or wait budget exhausted).")
+metrics.counter("minc_circuit_rejections_total", "Calls refused while a container circuit was open.")
+metrics.counter("minc_circuit_transitions_total", "Circuit state changes, by container and new state.")
+
+
+class CircuitOpenError(CosmosHttpResponseError):
+    """Raised instead of calling a container whose circuit is open."""
+
+    def __init__(self, container: str, retry_after_s: float):
+        super().__init__(status_code=503, message=f"circuit open for {container}")
+        self.container = container
+        self.retry_after_s = retry_after_s
+        self.headers = {"x-ms-retry-after-ms": str(int(retry_after_s * 1000))}
+
+
+class Breaker:
+    """closed → open (fail fast) → half_open (one trial call) → closed | open."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial = False
+        self._lock = threading.Lock()
+
+    def _move(self, state: str) -> None:
+        self.state = state
+        metrics.inc("minc_circuit_transitions_total", {"container": self.name, "state": state})
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < CB_OPEN_S:
+                    return False
+                self._move("half_open")
+            if self.trial:
+                return False
+            self.trial = True
+            return True
+
+    def retry_after_s(self) -> float:
+        return max(0.0, CB_OPEN_S - (time.monotonic() - self.opened_at)) if self.state == "open" else 1.0
+
+    def record(self, ok: Optional[bool]) -> None:
+        """ok=True: the container answered; False: throttled/unavailable; None: no verdict."""
+        with self._lock:
+            self.trial = False
+            if ok is None:
+                return
+            if ok:
+                self.failures = 0
+                if self.state != "closed":
+                    self._move("closed")
+                return
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= CB_FAILURES):
+                self.opened_at = time.monotonic()
+                self._move("open")
+
+
+_breakers: Dict[str, Breaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(container: str) -> Breaker:
+    b = _breakers.get(container)
+    if b is None:
+        with _breakers_lock:
+            b = _breakers.setdefault(container, Breaker(container))
+    return b
+
+
+def breakers() -> Dict[str, Dict[str, Any]]:
+    return {name: {"state": b.state, "failures": b.failures} for name, b in list(_breakers.items())}
+
+
+def status_of(e: BaseException) -> Optional[int]:
+    if isinstance(e, ServiceRequestError):
+        return 0   # never reached the service
+    return getattr(e, "status_code", None) if isinstance(e, CosmosHttpResponseError) else None
+
+
+def _retryable(op: str, status: Optional[int]) -> bool:
+    if status in THROTTLED or status == 0:
+        return True   # not executed: safe for any operation
+    return op in IDEMPOTENT_OPS and status in UNAVAILABLE
+
+
+def retry_after_ms(e: BaseException) -> Optional[float]:
+    raw = (getattr(e, "headers", None) or {}).get("x-ms-retry-after-ms")
+    try:
+        return float(raw) if raw is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _wait_ms(e: BaseException, attempt: int) -> float:
+    hinted = retry_after_ms(e)
+    base = hinted if hinted is not None else RETRY_BASE_MS * (2 ** attempt)
+    return base * random.uniform(0.8, 1.2)
+
+
+def run(container: str, op: str, attempt_fn: Callable[[], Any]) -> Any:
+    """attempt_fn() under the container's breaker, retried per the policy above."""
+    b = breaker(container)
+    waited = 0.0
+    attempt = 0
+    while True:
+        if not b.allow():
+            metrics.inc("minc_circuit_rejections_total", {"container": container, "op": op})
+            raise CircuitOpenError(container, b.retry_after_s())
+        try:
+            result = attempt_fn()
+        except Exception as e:
+            status = status_of(e)
+            failed = status in THROTTLED or status in UNAVAILABLE or status == 0
+            b.record(False if failed else (True if status is not None else None))
+            if not _retryable(op, status):
+                raise
+            wait = _wait_ms(e, attempt)
+            if attempt >= RETRY_MAX or wait > RETRY_MAX_WAIT_MS or waited + wait > RETRY_BUDGET_MS:
+                metrics.inc("minc_cosmos_policy_giveups_total", {"container": container, "op": op, "status": str(status)})
+                raise
+            metrics.inc("minc_cosmos_policy_retries_total", {"container": container, "op": op, "status": str(status)})
+            metrics.inc("minc_cosmos_policy_retry_wait_seconds_total", {"container": container}, wait / 1000.0)
+            time.sleep(wait / 1000.0)
+            waited += wait
+            attempt += 1
+            continue
+        b.record(True)
+        return result
+
+
+def sdk_retry_kwargs() -> Dict[str, Any]:
+    """CosmosClient kwargs that leave throttle retries to this module (0 keeps SDK defaults)."""
+    if SDK_RETRY_TOTAL <= 0:
+        return {}
+    return {"retry_throttle_total": SDK_RETRY_TOTAL, "retry_throttle_backoff_max": max(1, SDK_RETRY_MAX_S)}
+
+
+def unavailable_response(e: BaseException) -> Optional[func.HttpResponse]:
+    """503 + Retry-After for throttling / unavailable / open-circuit errors; None for anything else."""
+    status = status_of(e)
+    if not (isinstance(e, CircuitOpenError) or status in THROTTLED or status in UNAVAILABLE):
+        return None
+    if isinstance(e, CircuitOpenError):
+        after = e.retry_after_s
+    else:
+        after = (retry_after_ms(e) or 1000.0) / 1000.0
+    return json_response({"success": False, "error": "busy", "retryAfterS": round(after, 1)}, 503,
+                         headers={"Retry-After": str(max(1, int(after + 0.999)))})
@@ -0,0 +1,194 @@
+# shared/session_tokens.py v1.0
+#
+# Compact HMAC-SHA256 session tokens issued after OTP login.
+#   v1.<kid>.<base64url(payload json)>.<base64url(signature)>
+#   payload: {"sub": mincId, "uid": user id, "email", "roles", "iat", "exp", "jti"}
+#
+# Validation is pure CPU (no Cosmos): split, constant-time HMAC compare,
+# expiry check, revocation-set lookup.
+#
+# Env:
+#   MINC_SESSION_KEYS    "kid:secret[,kid:secret...]" — first key signs, all verify
+#                        (rotation: prepend the new key, drop the old after TTL)
+#   MINC_SESSION_TTL_MIN token lifetime, default 480
+#   MINC_REQUIRE_SESSION 1 → admin routes reject requests without a valid token
+#   MINC_SESSION_REVOKED comma-separated jti list (static revocations)
+#   MINC_SESSION_REVOCATION_CONTAINER optional Cosmos container holding revoked
+#                        jti docs ({id: jti, ttl}); re-read every 60 s in the
+#                        background and shared by all instances
+
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import logging
+import secrets
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import azure.functions as func
+
+from .http_response import json_response
+
+SESSION_TTL_MIN = int(os.getenv("MINC_SESSION_TTL_MIN", 480))
+REQUIRE_SESSION = os.getenv("MINC_REQUIRE_SESSION", "0") == "1"
+REVOCATION_CONTAINER = os.getenv("MINC_SESSION_REVOCATION_CONTAINER", "")
+REVOCATION_REFRESH_S = 60
+TOKEN_VERSION = "v1"
+
+
+class SessionError(Exception):
+    pass
+
+
+def _b64e(b: bytes) -> str:
+    return base64.urlsafe_b64encode(b).rstrip(b"=").decode("ascii")
+
+
+def _b64d(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+
+def _load_keys() -> List[Tuple[str, bytes]]:
+    keys = []
+    for part in (os.getenv("MINC_SESSION_KEYS") or "").split(","):
+        kid, _, secret = part.strip().partition(":")
+        if kid and secret:
+            keys.append((kid, secret.encode("utf-8")))
+    return keys
+
+
+_KEYS = _load_keys()
+_KEY_BY_ID = dict(_KEYS)
+
+
+def enabled() -> bool:
+    return bool(_KEYS)
+
+
+def _sign(kid: str, key: bytes, body: str) -> str:
+    # utf-8, not ascii: the body comes from the client and may hold anything
+    msg = f"{TOKEN_VERSION}.{kid}.{body}".encode("utf-8")
+    return _b64e(hmac.new(key, msg, hashlib.sha256).digest())
+
+
+def issue(sub: str, roles: Optional[List[str]] = None, uid: Optional[str] = None,
+          email: Optional[str] = None, ttl_min: int = SESSION_TTL_MIN) -> Tuple[str, int]:
+    """Return (token, exp_epoch_seconds). Raises SessionError when no key is configured."""
+    if not _KEYS:
+        raise SessionError("MINC_SESSION_KEYS not configured")
+    kid, key = _KEYS[0]
+    now = int(time.time())
+    payload = {"sub": sub, "uid": uid, "email": email, "roles": roles or [],
+               "iat": now, "exp": now + ttl_min * 60, "jti": secrets.token_urlsafe(9)}
+    body = _b64e(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{TOKEN_VERSION}.{kid}.{body}.{_sign(kid, key, body)}", payload["exp"]
+
+
+# ----- revocation -----
+
+_revoked = {j.strip() for j in (os.getenv("MINC_SESSION_REVOKED") or "").split(",") if j.strip()}
+_revoked_lock = threading.Lock()
+_revoked_loaded_at = 0.0
+
+
+def _refresh_revocations() -> None:
+    global _revoked_loaded_at
+    _revoked_loaded_at = time.time()
+    try:
+        from .cosmos_client import get_container, COSMOS_DB_ENV, DEFAULT_DB
+        cont = get_container(os.getenv(COSMOS_DB_ENV, DEFAULT_DB), REVOCATION_CONTAINER)
+        ids = {r["id"] for r in cont.query_items(query="SELECT c.id FROM c", enable_cross_partition_query=True)}
+        with _revoked_lock:
+            _revoked.update(ids)
+    except Exception:
+        logging.warning("[SESSION] revocation refresh failed", exc_info=True)
+
+
+def _maybe_refresh() -> None:
+    if REVOCATION_CONTAINER and time.time() - _revoked_loaded_at > REVOCATION_REFRESH_S:
+        # keep validation off the network: refresh in the background
+        threading.Thread(target=_refresh_revocations, daemon=True).start()
+
+
+def revoke(claims: Dict[str, Any]) -> None:
+    jti = claims.get("jti")
+    if not jti:
+        return
+    with _revoked_lock:
+        _revoked.add(jti)
+    if REVOCATION_CONTAINER:
+        try:
+            from .cosmos_client import get_container, COSMOS_DB_ENV, DEFAULT_DB
+            ttl = max(60, int(claims.get("exp", 0)) - int(time.time()))
+            get_container(os.getenv(COSMOS_DB_ENV, DEFAULT_DB), REVOCATION_CONTAINER).upsert_item(
+                {"id": jti, "sub": claims.get("sub"), "ttl": ttl})
+        except Exception:
+            logging.exception("[SESSION] revocation write failed")
+
+
+# ----- validation -----
+
+def verify(token: str) -> Dict[str, Any]:
+    """Return claims or raise SessionError. No I/O."""
+    parts = (token or "").split(".")
+    if len(parts) != 4 or parts[0] != TOKEN_VERSION:
+        raise SessionError("malformed token")
+    _, kid, body, sig = parts
+    key = _KEY_BY_ID.get(kid)
+    if key is None:
+        raise SessionError("unknown key")
+    # compare bytes: compare_digest raises TypeError on non-ASCII str
+    if not hmac.compare_digest(_sign(kid, key, body).encode("ascii"), sig.encode("utf-8")):
+        raise SessionError("bad signature")
+    try:
+        claims = json.loads(_b64d(body))
+    except Exception:
+        raise SessionError("malformed payload")
+    if not isinstance(claims, dict):
+        raise SessionError("malformed payload")
+    if int(claims.get("exp", 0)) <= time.time():
+        raise SessionError("expired")
+    _maybe_refresh()
+    if claims.get("jti") in _revoked:
+        raise SessionError("revoked")
+    return claims
+
+
+def bearer_token(req: func.HttpRequest) -> str:
+    auth = req.headers.get("authorization") or ""
+    if auth[:7].lower() == "bearer ":
+        return auth[7:].strip()
+    return (req.headers.get("x-minc-session") or "").strip()
+
+
+def _unauthorized(reason: str, status: int = 401) -> func.HttpResponse:
+    return json_response(
+        {"success": False, "error": "unauthorized", "reason": reason},
+        status,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def require_session(req: func.HttpRequest, roles: Optional[List[str]] = None):
+    """
+    Returns (claims|None, error_response|None).
+    With MINC_REQUIRE_SESSION off, a missing/invalid token is tolerated
+    (claims=None) so the FE can roll out token support first.
+    """
+    token = bearer_token(req)
+    if not token:
+        return None, (_unauthorized("missing token") if REQUIRE_SESSION else None)
+    try:
+        claims = verify(token)
+    except SessionError as e:
+        return None, (_unauthorized(str(e)) if REQUIRE_SESSION else None)
+    if roles and not set(roles) & set(claims.get("roles") or []):
+        return claims, _unauthorized("insufficient role", 403)
+    return claims, None
+
+
+def actor_of(claims: Optional[Dict[str, Any]]) -> Optional[str]:
+    return (claims or {}).get("sub")
@@ -0,0 +1,103 @@
+# shared/single_flight.py v1.0
+#
+# Single-flight coalescing of identical concurrent reads on this instance.
+# Applied by shared.instrumentation.InstrumentedContainer:
+# - point reads: same container + item + partition key
+# - queries read with instrumentation.read_all() (plain iteration stays lazy):
+#   same container + SQL + parameters + partition key / cross-partition flag
+# While one call (the leader) is in flight, identical calls wait for it and
+# share its result (each gets its own deep copy, so handlers may mutate what
+# they receive) or its exception. Nothing is cached: once the leader returns,
+# the next identical call goes to Cosmos again.
+# - writes through the wrapper bump the container's generation, which is part
+#   of every key: a read that starts after this instance wrote never joins a
+#   flight that started before the write
+# - a follower waits at most MINC_SF_WAIT_S, then makes its own call
+# - calls with extra kwargs (response_hook, etags, continuation tokens …) are
+#   never coalesced
+#
+# Env:
+#   MINC_SF          0 disables coalescing (default 1)
+#   MINC_SF_WAIT_S   longest a follower waits for the leader, default 10
+
+import os
+import copy
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import metrics
+
+SF_ENABLED = os.getenv("MINC_SF", "1") != "0"
+SF_WAIT_S  = float(os.getenv("MINC_SF_WAIT_S", 10))
+
+metrics.counter("minc_singleflight_leaders_total", "Coalescable reads that went to Cosmos, by container and op.")
+metrics.counter("minc_singleflight_coalesced_total", "Reads served from another request's in-flight call.")
+metrics.counter("minc_singleflight_wait_timeouts_total", "Followers that gave up waiting and called Cosmos themselves.")
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+_flights: Dict[Tuple, _Flight] = {}
+_lock = threading.Lock()
+_generation: Dict[str, int] = {}
+
+
+def bump(container: str) -> None:
+    """A write on `container` landed (or may have): later reads start new flights."""
+    with _lock:
+        _generation[container] = _generation.get(container, 0) + 1
+
+
+def key(container: str, op: str, *parts: Any) -> Optional[Tuple]:
+    """Flight key, or None when the call cannot be coalesced (unhashable / unserializable parts)."""
+    try:
+        body = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return (container, op, _generation.get(container, 0), body)
+
+
+def do(k: Optional[Tuple], fn: Callable[[], Any]) -> Any:
+    """fn(), shared with every identical call in flight at the same time."""
+    if not SF_ENABLED or k is None:
+        return fn()
+    container, op = k[0], k[1]
+    with _lock:
+        flight = _flights.get(k)
+        leader = flight is None
+        if leader:
+            flight = _flights[k] = _Flight()
+        else:
+            flight.followers += 1
+
+    if not leader:
+        if not flight.done.wait(SF_WAIT_S):
+            metrics.inc("minc_singleflight_wait_timeouts_total", {"container": container, "op": op})
+            return fn()
+        metrics.inc("minc_singleflight_coalesced_total", {"container": container, "op": op})
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.result)
+
+    metrics.inc("minc_singleflight_leaders_total", {"container": container, "op": op})
+    try:
+        flight.result = fn()
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            _flights.pop(k, None)   # no new followers from here on
+            shared = flight.followers
+        flight.done.set()
+    # followers copy flight.result; the leader must not hand out the same object
+    return copy.deepcopy(flight.result) if shared else flight.result
@@ -0,0 +1,243 @@
+# shared/slow_queries.py v1.0
+#
+# Slow-query recorder for the dynamic search SQL (per-token CONTAINS groups grow
+# with the query string).
+# - listens on shared.instrumentation: any query over MINC_SLOWQ_RU request
+#   units or MINC_SLOWQ_MS milliseconds lands in a bounded ring buffer with its
+#   normalized template, parameter shape (names/types/count — never values),
+#   route, RU, latency and item count
+# - a sample of them (MINC_SLOWQ_SAMPLE, at most once per template every
+#   MINC_SLOWQ_COOLDOWN_S) is re-run off the request path with
+#   populate_query_metrics / populate_index_metrics; retrieved-vs-output document
+#   counts, execution-time breakdown and utilized/potential indexes are attached
+#   to the entry
+# - the re-run costs RU of its own: at most MINC_SLOWQ_MAX_PAGES pages are read,
+#   the work queue is small and full means "drop"
+#
+# Env:
+#   MINC_SLOWQ             0 disables the recorder (default on)
+#   MINC_SLOWQ_RU          RU threshold per query, default 50
+#   MINC_SLOWQ_MS          latency threshold per query, default 500
+#   MINC_SLOWQ_SAMPLE      share of slow queries re-run for metrics, default 0.25
+#   MINC_SLOWQ_COOLDOWN_S  min seconds between re-runs of one template, default 300
+#   MINC_SLOWQ_BUFFER      ring buffer size, default 200
+#   MINC_SLOWQ_MAX_PAGES   pages read by a re-run, default 5
+
+import os
+import json
+import time
+import re
+import queue
+import base64
+import random
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+from .instrumentation import add_observer, current_route, query_template
+
+SLOWQ_ENABLED   = os.getenv("MINC_SLOWQ", "1") != "0"
+SLOWQ_RU        = float(os.getenv("MINC_SLOWQ_RU", 50))
+SLOWQ_MS        = float(os.getenv("MINC_SLOWQ_MS", 500))
+SLOWQ_SAMPLE    = float(os.getenv("MINC_SLOWQ_SAMPLE", 0.25))
+SLOWQ_COOLDOWN  = float(os.getenv("MINC_SLOWQ_COOLDOWN_S", 300))
+SLOWQ_BUFFER    = int(os.getenv("MINC_SLOWQ_BUFFER", 200))
+SLOWQ_MAX_PAGES = int(os.getenv("MINC_SLOWQ_MAX_PAGES", 5))
+
+QUERY_METRICS_HEADER = "x-ms-documentdb-query-metrics"
+INDEX_METRICS_HEADER = "x-ms-cosmos-index-utilization"
+# re-run kwargs we must not forward (they belong to the original call)
+_DROP_KWARGS = ("parameters", "response_hook", "populate_query_metrics", "populate_index_metrics")
+
+SLOWQ_STATS = {"recorded": 0, "sampled": 0, "explained": 0, "explain_failed": 0, "dropped": 0}
+
+_buffer: deque = deque(maxlen=max(1, SLOWQ_BUFFER))
+_lock = threading.Lock()
+_last_explain: Dict[str, float] = {}     # template → monotonic time of the last re-run
+_jobs: "queue.Queue" = queue.Queue(maxsize=8)
+_PARAM_N = re.compile(r"(@[A-Za-z_]+)\d+\b")
+_worker: Optional[threading.Thread] = None
+
+metrics.counter("minc_slowq_explain_request_units_total", "RU spent re-running sampled slow queries.")
+
+
+def param_shape(params) -> Dict[str, Dict[str, Any]]:
+    """[{"name": "@t0", "value": "x"}, …] → {"@t#": {"n": 3, "type": "str"}} (values dropped)."""
+    shape: Dict[str, Dict[str, Any]] = {}
+    for p in params or []:
+        name = _PARAM_N.sub(r"\1#", str((p or {}).get("name", "?")))
+        s = shape.setdefault(name, {"n": 0, "type": type((p or {}).get("value")).__name__})
+        s["n"] += 1
+    return shape
+
+
+def _parse_query_metrics(raw: Optional[str]) -> Dict[str, float]:
+    # "totalExecutionTimeInMs=1.2;retrievedDocumentCount=40;outputDocumentCount=3;…"
+    out: Dict[str, float] = {}
+    for part in (raw or "").split(";"):
+        k, sep, v = part.partition("=")
+        if not sep:
+            continue
+        try:
+            out[k.strip()] = float(v)
+        except ValueError:
+            continue
+    return out
+
+
+def _parse_index_metrics(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    # base64 JSON: UtilizedSingleIndexes / PotentialSingleIndexes / …CompositeIndexes
+    if not raw:
+        return None
+    try:
+        doc = json.loads(base64.b64decode(raw).decode("utf-8"))
+    except Exception:
+        try:
+            doc = json.loads(raw)
+        except Exception:
+            return {"raw": raw[:500]}
+
+    def specs(key):
+        return [i.get("IndexSpec") or i.get("IndexSpecs") for i in doc.get(key) or []]
+
+    return {
+        "utilizedSingle": specs("UtilizedSingleIndexes"),
+        "potentialSingle": specs("PotentialSingleIndexes"),
+        "utilizedComposite": specs("UtilizedCompositeIndexes"),
+        "potentialComposite": specs("PotentialCompositeIndexes"),
+    }
+
+
+_SUMMED = ("retrievedDocumentCount", "retrievedDocumentSize", "outputDocumentCount", "outputDocumentSize",
+           "totalExecutionTimeInMs", "indexLookupTimeInMs", "documentLoadTimeInMs",
+           "queryCompileTimeInMs", "writeOutputTimeInMs")
+
+
+def _explain(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-run the query (first few pages) with query + index metrics enabled."""
+    container = ctx["container"]
+    kwargs = {k: v for k, v in (ctx.get("kwargs") or {}).items() if k not in _DROP_KWARGS}
+    kwargs["populate_query_metrics"] = True
+    kwargs["populate_index_metrics"] = True
+    paged = container.query_items(ctx["sql"], parameters=ctx.get("parameters"), **kwargs)
+
+    totals: Dict[str, float] = {k: 0.0 for k in _SUMMED}
+    ratio = None
+    indexes = None
+    ru = 0.0
+    pages = 0
+    exhausted = True
+    for page in paged.by_page():
+        list(page)
+        h = container.client_connection.last_response_headers or {}
+        ru += float(h.get("x-ms-request-charge") or 0)
+        qm = _parse_query_metrics(h.get(QUERY_METRICS_HEADER))
+        for k in _SUMMED:
+            totals[k] += qm.get(k, 0.0)
+        if ratio is None and "indexUtilizationRatio" in qm:
+            ratio = qm["indexUtilizationRatio"]
+        if indexes is None:
+            indexes = _parse_index_metrics(h.get(INDEX_METRICS_HEADER))
+        pages += 1
+        if pages >= SLOWQ_MAX_PAGES:
+            exhausted = False
+            break
+
+    metrics.inc("minc_slowq_explain_request_units_total", {"container": ctx.get("container_name", "?")}, ru)
+    out: Dict[str, Any] = {k: (int(v) if k.endswith(("Count", "Size")) else round(v, 3)) for k, v in totals.items()}
+    out.update({"indexUtilizationRatio": ratio, "indexes": indexes, "ru": round(ru, 2),
+                "pages": pages, "complete": exhausted})
+    return out
+
+
+def _run_worker() -> None:
+    while True:
+        entry, ctx = _jobs.get()
+        try:
+            result = _explain(ctx)
+            with _lock:
+                entry["explain"] = result
+                SLOWQ_STATS["explained"] += 1
+        except Exception as e:
+            logging.warning("slow-query explain failed (%s): %s", entry.get("template", "")[:80], e)
+            with _lock:
+                entry["explain"] = {"error": str(e)[:200]}
+                SLOWQ_STATS["explain_failed"] += 1
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        with _lock:
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(target=_run_worker, name="minc-slowq", daemon=True)
+                _worker.start()
+
+
+def _should_explain(template: str) -> bool:
+    if SLOWQ_SAMPLE <= 0 or random.random() >= SLOWQ_SAMPLE:
+        return False
+    now = time.monotonic()
+    with _lock:
+        last = _last_explain.get(template)
+        if last is not None and now - last < SLOWQ_COOLDOWN:
+            return False
+        _last_explain[template] = now
+    return True
+
+
+def observe(container: str, op: str, seconds: float, ru: float, items, template: str, ctx) -> None:
+    if op != "query_items" or ctx is None:
+        return
+    ms = seconds * 1000.0
+    if ru < SLOWQ_RU and ms < SLOWQ_MS:
+        return
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "route": current_route(),
+        "container": container,
+        "template": template or query_template(ctx.get("sql") or ""),
+        "params": param_shape(ctx.get("parameters")),
+        "crossPartition": bool((ctx.get("kwargs") or {}).get("enable_cross_partition_query")),
+        "ru": round(ru, 2),
+        "ms": round(ms, 1),
+        "items": items,
+        "explain": None,
+    }
+    with _lock:
+        _buffer.append(entry)
+        SLOWQ_STATS["recorded"] += 1
+    if _should_explain(entry["template"]):
+        entry["explain"] = {"pending": True}
+        try:
+            _jobs.put_nowait((entry, dict(ctx, container_name=container)))
+            with _lock:
+                SLOWQ_STATS["sampled"] += 1
+            _ensure_worker()
+        except queue.Full:
+            entry["explain"] = None
+            with _lock:
+                SLOWQ_STATS["dropped"] += 1
+
+
+def recent(limit: int = 50, container: Optional[str] = None, route: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Newest first; copies, so the caller can serialize while the worker fills in `explain`."""
+    with _lock:
+        entries = [dict(e) for e in reversed(_buffer)]
+    if container:
+        entries = [e for e in entries if e["container"] == container]
+    if route:
+        entries = [e for e in entries if e["route"] == route]
+    return entries[:max(1, limit)]
+
+
+def thresholds() -> Dict[str, Any]:
+    return {"enabled": SLOWQ_ENABLED, "ru": SLOWQ_RU, "ms": SLOWQ_MS, "sample": SLOWQ_SAMPLE,
+            "cooldownS": SLOWQ_COOLDOWN, "buffer": _buffer.maxlen, "maxPages": SLOWQ_MAX_PAGES}
+
+
+if SLOWQ_ENABLED:
+    add_observer(observe)
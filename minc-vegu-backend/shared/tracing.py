@@ -0,0 +1,152 @@
+# shared/tracing.py v1.0
+#
+# OpenTelemetry tracing for the shared layers, off unless MINC_TRACING=1.
+# - request span per instrumented handler (shared.instrumentation), joined to
+#   an incoming W3C traceparent; attributes: route, status, RU, cold start
+# - child spans: every Cosmos operation / query (RU, items, retries, template —
+#   recorded after the fact from shared.instrumentation.record), bcrypt checks,
+#   email sends, JSON serialization; handlers can add their own with
+#   `with span("…")` or `@traced("…")`
+# - sampling: parent-based, MINC_TRACE_SAMPLE of new traces
+# - export: OTLP/HTTP (collector, Jaeger, Aspire dashboard …) or a JSON-lines
+#   file; batched off the request thread
+# - disabled (or opentelemetry not installed): nothing is imported, span() hands
+#   back one shared no-op object and traced() returns the function unchanged
+#
+# Env:
+#   MINC_TRACING          1 enables tracing (default 0)
+#   MINC_TRACE_SAMPLE     share of new traces kept, default 1.0
+#   MINC_TRACE_EXPORTER   otlp | file | console, default file
+#   MINC_TRACE_FILE       path for the file exporter, default minc-traces.jsonl
+#   MINC_TRACE_SERVICE    service.name, default minc-vegu-backend
+#   OTEL_EXPORTER_OTLP_ENDPOINT / OTEL_EXPORTER_OTLP_TRACES_ENDPOINT  (read by the
+#                         OTLP exporter itself; default http://localhost:4318)
+
+import os
+import time
+import logging
+import functools
+from typing import Any, Callable, Dict, Optional
+
+TRACING_ENABLED = os.getenv("MINC_TRACING", "0") == "1"
+TRACE_SAMPLE    = float(os.getenv("MINC_TRACE_SAMPLE", 1.0))
+TRACE_EXPORTER  = (os.getenv("MINC_TRACE_EXPORTER") or "file").strip().lower()
+TRACE_FILE      = os.getenv("MINC_TRACE_FILE", "minc-traces.jsonl")
+TRACE_SERVICE   = os.getenv("MINC_TRACE_SERVICE", "minc-vegu-backend")
+
+_PROCESS_STARTED = time.time()
+
+
+class _NoopSpan:
+    """Stands in for a span (and its context manager) when tracing is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+NOOP = _NoopSpan()
+_tracer = None
+_trace = None        # opentelemetry.trace, once set up
+_propagate = None    # opentelemetry.propagate
+_cold = [True]
+
+
+def _exporter():
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    if TRACE_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            return OTLPSpanExporter()
+        except ImportError:
+            logging.warning("[TRACE] opentelemetry-exporter-otlp-proto-http not installed; writing %s", TRACE_FILE)
+    if TRACE_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    out = open(TRACE_FILE, "a", buffering=1, encoding="utf-8")
+    return ConsoleSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + "\n")
+
+
+def _setup() -> bool:
+    global _tracer, _trace, _propagate
+    try:
+        from opentelemetry import trace, propagate
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logging.warning("[TRACE] MINC_TRACING=1 but opentelemetry-sdk is not installed; tracing off")
+        return False
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": TRACE_SERVICE}),
+        sampler=ParentBased(TraceIdRatioBased(max(0.0, min(1.0, TRACE_SAMPLE)))),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("minc.shared")
+    _trace, _propagate = trace, propagate
+    return True
+
+
+if TRACING_ENABLED:
+    TRACING_ENABLED = _setup()
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Context manager: a child span of the current one (no-op when tracing is off)."""
+    if not TRACING_ENABLED:
+        return NOOP
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span(); returns the function untouched when tracing is off."""
+    def deco(fn: Callable):
+        if not TRACING_ENABLED:
+            return fn
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _tracer.start_as_current_span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def request_span(route: str, req: Any = None):
+    """Server span for one handler call, continuing the caller's traceparent if sent."""
+    if not TRACING_ENABLED:
+        return NOOP
+    headers = getattr(req, "headers", None)
+    ctx = _propagate.extract(dict(headers)) if headers else None
+    attrs = {"http.route": route, "faas.coldstart": _cold[0]}
+    if _cold[0]:
+        _cold[0] = False
+        attrs["minc.process_age_s"] = round(time.time() - _PROCESS_STARTED, 3)
+    method = getattr(req, "method", None)
+    if method:
+        attrs["http.request.method"] = method
+    return _tracer.start_as_current_span(f"{method or 'HTTP'} {route}", context=ctx,
+                                         kind=_trace.SpanKind.SERVER, attributes=attrs)
+
+
+def record_span(name: str, seconds: float, attributes: Dict[str, Any], error: Optional[str] = None) -> None:
+    """A finished child span ending now and lasting `seconds` (for work timed elsewhere)."""
+    if not TRACING_ENABLED:
+        return
+    end = time.time_ns()
+    s = _tracer.start_span(name, start_time=end - int(seconds * 1e9), kind=_trace.SpanKind.CLIENT,
+                           attributes={k: v for k, v in attributes.items() if v is not None})
+    if error:
+        s.set_status(_trace.Status(_trace.StatusCode.ERROR, error))
+    s.end(end_time=end)
@@ -7,6 +7,10 @@ from azure.cosmos import CosmosClient
 from azure.cosmos import exceptions as cosmos_exceptions
 from azure.cosmos.exceptions import CosmosHttpResponseError
 from typing import Dict
+from functools import lru_cache
+from .projection import select_clause
+from . import regions, resilience
+from .instrumentation import instrument, read_all
 
 _client = None
 _db = None
@@ -35,16 +39,20 @@ CN_RESPONDERS     = os.getenv("VEGU_CONTAINER_RESPONDERS", "responders")
 CN_USERS          = os.getenv("VEGU_USERS_CONTAINER", "user-profiles")
 
 # ----- client helpers -----
+# Clients are cached: CosmosClient construction costs a metadata round trip and
+# its own connection pool.
+@lru_cache(maxsize=1)
 def _client() -> CosmosClient:
     if not VEGU_COSMOS_URI or not VEGU_COSMOS_KEY:
         raise RuntimeError("VEGU Cosmos credentials are not configured.")
-    return CosmosClient(VEGU_COSMOS_URI, VEGU_COSMOS_KEY)
+    return CosmosClient(VEGU_COSMOS_URI, VEGU_COSMOS_KEY, **resilience.sdk_retry_kwargs(), **regions.client_kwargs())
 
 def _db():
     return _client().get_database_client(VEGU_COSMOS_DB)
 
+@lru_cache(maxsize=1)
 def institutions_container():
-    return _db().get_container_client(CN_INSTITUTIONS)
+    return instrument(_db().get_container_client(CN_INSTITUTIONS), CN_INSTITUTIONS)
 
 
 # ----- read helpers -----
@@ -64,14 +72,15 @@ def institutions_count(country: Optional[str] = None) -> int:
         return int(v)
     return 0
 
-def get_institution_by_vg_id(vg_id: str) -> Optional[Dict[str, Any]]:
+def get_institution_by_vg_id(vg_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
     """
     Query by exact vg_id. Partition key is /country, so we query cross-partition.
+    `fields` (validated by shared.projection) limits the projection; None = whole doc.
     """
     cont = institutions_container()
-    q = "SELECT TOP 1 * FROM c WHERE c.type='institution' AND c.vg_id=@vg_id"
+    q = f"SELECT TOP 1 {select_clause('institution', fields)} FROM c WHERE c.type='institution' AND c.vg_id=@vg_id"
     params = [{"name":"@vg_id","value":vg_id}]
-    items = list(cont.query_items(query=q, parameters=params, enable_cross_partition_query=True))
+    items = read_all(cont.query_items(query=q, parameters=params, enable_cross_partition_query=True))
     return items[0] if items else None
 
 def list_institutions(
@@ -149,7 +158,7 @@ def search_institutions(
       ORDER BY c.updated_at DESC
     """
     params = [{"name":"@q", "value": text.lower()}]
-    items = list(cont.query_items(query=q, parameters=params, enable_cross_partition_query=True))
+    items = read_all(cont.query_items(query=q, parameters=params, enable_cross_partition_query=True))
     return items
 
 # ----- write helper (safe replace) -----
@@ -251,7 +260,7 @@ def get_responder_by_vg_id(vg_id: str) -> Optional[Dict[str, Any]]:
 
     # Fallback: cross-partition query
     q = "SELECT TOP 1 * FROM c WHERE c.vg_id = @id OR c.id = @id"
-    items = list(c.query_items(
+    items = read_all(c.query_items(
         query=q,
         parameters=[{"name": "@id", "value": vg_id}],
         enable_cross_partition_query=True
@@ -309,6 +318,7 @@ def update_responder_fields(vg_id: str, patch: dict, expected_etag: str | None =
 def _env(name: str, default=None):
     return os.getenv(name, default)
 
+@lru_cache(maxsize=1)
 def _resolve_cosmos():
     uri = (
         _env("VEGU_COSMOS_URI")
@@ -324,7 +334,7 @@ def _resolve_cosmos():
     )
     if not uri or not key:
         raise RuntimeError("Cosmos credentials missing: VEGU_COSMOS_URI/COSMOS_URI and VEGU_COSMOS_KEY/COSMOS_KEY are required.")
-    client = CosmosClient(uri, credential=key)
+    client = CosmosClient(uri, credential=key, **resilience.sdk_retry_kwargs(), **regions.client_kwargs())
     db = client.get_database_client(db_name)
     return client, db
 
@@ -342,10 +352,11 @@ def get_client():
     """Return client (legacy/compat)."""
     return _resolve_cosmos()[0]
 
+@lru_cache(maxsize=64)
 def get_container(name: str):
-    """Generic container getter using the canonical VEGU cosmos resolution."""
+    """Generic container getter using the canonical VEGU cosmos resolution (instrumented)."""
     _, db = _resolve_cosmos()
-    return db.get_container_client(name)
+    return instrument(db.get_container_client(name), name)
 
 def get_responders_container():
     """Public, consistent name used by functions."""
@@ -368,7 +379,7 @@ def search_responders(q: str, limit: int = 25):
          OR CONTAINS(LOWER(c.institution_name), @q)
     """
     params = [{"name": "@q", "value": qn}, {"name": "@limit", "value": int(limit or 25)}]
-    return list(c.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+    return read_all(c.query_items(query=query, parameters=params, enable_cross_partition_query=True))
 
 def _get_client():
     global _client
@@ -376,7 +387,7 @@ def _get_client():
         return _client
     url = os.environ["COSMOS_DB_URL"]
     key = os.environ["COSMOS_DB_KEY"]
-    _client = CosmosClient(url, credential=key)
+    _client = CosmosClient(url, credential=key, **resilience.sdk_retry_kwargs(), **regions.client_kwargs())
     return _client
 
 def _get_db():
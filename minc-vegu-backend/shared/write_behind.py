@@ -0,0 +1,135 @@
+# shared/write_behind.py v1.0
+#
+# Write-behind buffer for best-effort bookkeeping (lastLoginAt, counter clears).
+# - put() never touches Cosmos; repeated updates to the same key are coalesced
+# - a daemon thread flushes every MINC_WRITE_BEHIND_INTERVAL_S seconds, or
+#   immediately once MINC_WRITE_BEHIND_MAX keys are pending
+# - pending writes are flushed at interpreter shutdown (atexit)
+# - MINC_WRITE_BEHIND=0 flushes synchronously on every put (local debugging)
+
+import os
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from .cosmos_client import users_container, users_partition_key, users_pk_select
+
+WRITE_BEHIND_ENABLED  = os.getenv("MINC_WRITE_BEHIND", "1") != "0"
+WRITE_BEHIND_MAX      = int(os.getenv("MINC_WRITE_BEHIND_MAX", 100))
+WRITE_BEHIND_INTERVAL = float(os.getenv("MINC_WRITE_BEHIND_INTERVAL_S", 2.0))
+
+
+class WriteBehindBuffer:
+    """Coalescing key → fields buffer drained in batches by `flush_fn(batch)`."""
+
+    def __init__(self, name: str, flush_fn: Callable[[Dict[Hashable, Dict[str, Any]]], None],
+                 max_items: int = WRITE_BEHIND_MAX, interval_s: float = WRITE_BEHIND_INTERVAL):
+        self.name = name
+        self._flush_fn = flush_fn
+        self._max = max(1, max_items)
+        self._interval = max(0.05, interval_s)
+        self._pending: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.stats = {"queued": 0, "coalesced": 0, "flushed": 0, "failed_batches": 0}
+        atexit.register(self.flush)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name=f"write-behind-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            self.flush()
+
+    def put(self, key: Hashable, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            self.stats["queued"] += 1
+            cur = self._pending.get(key)
+            if cur is None:
+                self._pending[key] = dict(fields)
+            else:
+                # later values win for the same field
+                self.stats["coalesced"] += 1
+                cur.update(fields)
+            full = len(self._pending) >= self._max
+        if not WRITE_BEHIND_ENABLED:
+            self.flush()
+            return
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Drain everything pending. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self._flush_fn(batch)
+                self.stats["flushed"] += len(batch)
+            except Exception:
+                # best-effort by design: log and drop, never block a login
+                self.stats["failed_batches"] += 1
+                logging.exception("[WRITE-BEHIND] %s flush failed (%d keys dropped)", self.name, len(batch))
+            return len(batch)
+
+
+# ===== minc_users login bookkeeping =====
+# Keys: ("id", id, pk) when the caller knows the doc, else ("email", email).
+
+def _resolve_by_email(cont, emails: List[str]) -> Dict[str, Tuple[str, Any]]:
+    """One projected query per 100 emails → {email: (id, pk)}."""
+    out: Dict[str, Tuple[str, Any]] = {}
+    q = f"SELECT c.id, c.email, {users_pk_select()} FROM c WHERE ARRAY_CONTAINS(@emails, c.email)"
+    for i in range(0, len(emails), 100):
+        rows = cont.query_items(query=q, parameters=[{"name": "@emails", "value": emails[i:i + 100]}],
+                                enable_cross_partition_query=True)
+        for r in rows:
+            out.setdefault(r.get("email"), (r["id"], users_partition_key(r)))
+    return out
+
+
+def _flush_user_fields(batch: Dict[Hashable, Dict[str, Any]]) -> None:
+    cont = users_container()
+    targets: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+    by_email = {k[1]: v for k, v in batch.items() if k[0] == "email"}
+    if by_email:
+        resolved = _resolve_by_email(cont, list(by_email))
+        for email, fields in by_email.items():
+            if email not in resolved:
+                logging.warning("[WRITE-BEHIND] user not found for email=%s", email)
+                continue
+            targets.setdefault(resolved[email], {}).update(fields)
+    for k, fields in batch.items():
+        if k[0] == "id":
+            targets.setdefault((k[1], k[2]), {}).update(fields)
+
+    for (doc_id, pk), fields in targets.items():
+        ops = [{"op": "set", "path": f"/{f}", "value": v} for f, v in fields.items()]
+        try:
+            cont.patch_item(item=doc_id, partition_key=pk, patch_operations=ops)
+        except Exception:
+            logging.exception("[WRITE-BEHIND] patch failed for user id=%s", doc_id)
+
+
+login_bookkeeping = WriteBehindBuffer("login_bookkeeping", _flush_user_fields)
+
+
+def queue_user_fields(fields: Dict[str, Any], email: str = None, user_id: str = None, pk: Any = None) -> None:
+    """Queue a best-effort partial update of one minc_users doc."""
+    if user_id:
+        login_bookkeeping.put(("id", user_id, pk), fields)
+    elif email:
+        login_bookkeeping.put(("email", email.lower()), fields)
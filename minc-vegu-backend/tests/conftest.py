@@ -0,0 +1,27 @@
+# tests/conftest.py
+#
+# Run from minc-vegu-backend:  python -m pytest -q tests
+# Everything runs in-process against fakes (bench/fake_cosmos.py, stubbed
+# HTTP / SMTP sinks on localhost, a fake Redis client); no Cosmos account,
+# Redis or mail server is needed.
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def app_functions():
+    """
+    function name → decorated Python function, with every Cosmos client pointed
+    at an in-memory FakeCosmos. get_functions() may only be called once per app.
+    """
+    from bench.fake_cosmos import FakeCosmos, install
+    install(FakeCosmos())
+    import function_app
+    return {fn.get_function_name(): fn.get_user_function() for fn in function_app.app.get_functions()}
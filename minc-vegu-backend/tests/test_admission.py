@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from shared import admission as adm
+
+
+@pytest.fixture
+def small(monkeypatch):
+    """Capacity 4 with short queues, so saturation is easy to reach."""
+    monkeypatch.setattr(adm, "ADMIT_ENABLED", True)
+    monkeypatch.setattr(adm, "ADMIT_CAPACITY", 4)
+    classes = {}
+    for name in adm.CLASS_ORDER:
+        cfg = dict(adm._CLASS_DEFAULTS[name], queue_ms=50)
+        cfg["slots"] = max(1, int(4 * cfg["share"]))
+        classes[name] = cfg
+    monkeypatch.setattr(adm, "CLASSES", classes)
+    yield
+    assert adm.snapshot()["inFlight"] == 0
+
+
+def test_default_capacity_follows_worker_threads(monkeypatch):
+    monkeypatch.delenv("PYTHON_THREADPOOL_THREAD_COUNT", raising=False)
+    monkeypatch.setattr(adm.os, "cpu_count", lambda: 1)
+    assert adm._default_capacity() == 5
+    monkeypatch.setattr(adm.os, "cpu_count", lambda: 64)
+    assert adm._default_capacity() == 32
+    monkeypatch.setenv("PYTHON_THREADPOOL_THREAD_COUNT", "12")
+    assert adm._default_capacity() == 12
+
+
+def test_health_is_never_refused(small):
+    held = [r for r in ["vegu-users/{vg_id}"] * 4 if adm.admit(r) is None]
+    try:
+        assert adm.admit("vegu-users/{vg_id}") is not None
+        assert adm.admit("health") is None
+        adm.release("health")
+        assert adm.snapshot()["inFlight"] == len(held)
+    finally:
+        for r in held:
+            adm.release(r)
+
+
+def test_search_refused_while_point_reads_still_admitted(small):
+    held = [r for r in ["vegu-users-search"] * 4 if adm.admit(r) is None]
+    try:
+        # search share 0.6 of 4 → 2 slots; point (0.9 → 3) still has room
+        assert len(held) == 2
+        refused = adm.admit("vegu-users-search")
+        assert refused.status_code == 503 and refused.headers["Retry-After"] == "1"
+        assert adm.admit("vegu-users/{vg_id}") is None
+        held.append("vegu-users/{vg_id}")
+    finally:
+        for r in held:
+            adm.release(r)
+
+
+def test_queued_request_admitted_when_slot_frees(small):
+    held = [r for r in ["vegu-users/{vg_id}"] * 3 if adm.admit(r) is None]
+    threading.Timer(0.01, adm.release, args=(held.pop(),)).start()
+    t0 = time.monotonic()
+    assert adm.admit("vegu-users/{vg_id}") is None
+    assert time.monotonic() - t0 < 0.05
+    held.append("vegu-users/{vg_id}")
+    for r in held:
+        adm.release(r)
@@ -0,0 +1,41 @@
+import json
+
+import azure.functions as func
+import pytest
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from shared import session_tokens
+
+BODY = {"vg_ids": ["VG1", "VG2"], "patch": {"status": "suspended"}}
+
+
+@pytest.fixture
+def handler(app_functions, monkeypatch):
+    import vegu_users_bulk_update as mod
+
+    monkeypatch.setattr(session_tokens, "REQUIRE_SESSION", False)
+
+    def call(error):
+        def boom(*_a, **_kw):
+            raise error
+        monkeypatch.setattr(mod, "bulk_update_users", boom)
+        req = func.HttpRequest(method="POST", url="http://localhost/api/vegu-users-bulk-update",
+                               body=json.dumps(BODY).encode("utf-8"))
+        return app_functions["vegu_users_bulk_update"](req)
+    return call
+
+
+def test_unexpected_error_is_a_generic_500(handler, caplog):
+    resp = handler(KeyError("minc_users secret detail"))
+    assert resp.status_code == 500
+    assert json.loads(resp.get_body()) == {"success": False, "error": "server_error"}
+    assert "vegu_users_bulk_update failed" in caplog.text
+
+
+def test_throttling_is_503_with_retry_after(handler):
+    e = CosmosHttpResponseError(status_code=429, message="Request rate is large.")
+    e.headers = {"x-ms-retry-after-ms": "1500"}
+    resp = handler(e)
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "2"
+    assert json.loads(resp.get_body())["error"] == "busy"
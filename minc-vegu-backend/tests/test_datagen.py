@@ -0,0 +1,20 @@
+import bcrypt
+
+from bench import datagen
+
+COUNTS = {"institutions": 3, "responders": 10, "users": 20, "complaints": 15, "minc": 5}
+
+
+def _docs(seed):
+    return list(datagen.documents(COUNTS, seed=seed, bcrypt_rounds=4))
+
+
+def test_same_seed_same_documents_including_hashes():
+    a, b = _docs(11), _docs(11)
+    assert a == b
+    minc = [d for _, c, d in a if c == "minc_users"]
+    assert minc and all(bcrypt.checkpw(datagen.BENCH_PASSWORD.encode(), d["passwordHash"].encode()) for d in minc)
+
+
+def test_other_seed_other_documents():
+    assert _docs(11) != _docs(12)
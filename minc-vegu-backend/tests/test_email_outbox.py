@@ -0,0 +1,220 @@
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from shared import email_outbox as ob
+
+
+# ----- local sinks -----
+
+class _SendGridSink(BaseHTTPRequestHandler):
+    status = 202
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).received.append((self.path, self.headers.get("Authorization"), json.loads(body)))
+        self.send_response(type(self).status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class _SMTPSink(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib.send_message; rcpt_reply decides RCPT TO."""
+    rcpt_reply = b"250 ok"
+    messages = []
+
+    def handle(self):
+        self.wfile.write(b"220 sink\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line[:4].upper()
+            if cmd == b"EHLO":
+                self.wfile.write(b"250 sink\r\n")
+            elif cmd == b"RCPT":
+                self.wfile.write(type(self).rcpt_reply + b"\r\n")
+            elif cmd == b"DATA":
+                self.wfile.write(b"354 go\r\n")
+                data = b""
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                    data += chunk
+                type(self).messages.append(data.decode())
+                self.wfile.write(b"250 queued\r\n")
+            elif cmd == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+@pytest.fixture
+def sendgrid(monkeypatch):
+    _SendGridSink.status, _SendGridSink.received = 202, []
+    srv = HTTPServer(("127.0.0.1", 0), _SendGridSink)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(ob, "EMAIL_TRANSPORT", "sendgrid")
+    monkeypatch.setattr(ob, "SENDGRID_API_KEY", "SG.test")
+    monkeypatch.setattr(ob, "SENDGRID_API_BASE", f"http://127.0.0.1:{srv.server_port}")
+    yield _SendGridSink
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    _SMTPSink.rcpt_reply, _SMTPSink.messages = b"250 ok", []
+    srv = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPSink)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(ob, "EMAIL_TRANSPORT", "smtp")
+    monkeypatch.setattr(ob, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(ob, "SMTP_PORT", srv.server_address[1])
+    yield _SMTPSink
+    srv.shutdown()
+    srv.server_close()
+
+
+def _job():
+    return ob.build_job("user@example.org", "Your MinC code", "Your code is 482913", kind="otp")
+
+
+# ----- transports -----
+
+def test_sendgrid_202_delivers(sendgrid):
+    sent = ob.DELIVERY_STATS["sent"]
+    ob.send_now(_job())
+    path, auth, payload = sendgrid.received[0]
+    assert path == "/v3/mail/send" and auth == "Bearer SG.test"
+    assert payload["personalizations"][0]["to"] == [{"email": "user@example.org"}]
+    assert payload["content"][0]["value"] == "Your code is 482913"
+    assert ob.DELIVERY_STATS["sent"] == sent + 1
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_sendgrid_throttle_and_5xx_are_retryable(sendgrid, status):
+    sendgrid.status = status
+    with pytest.raises(ob.RetryableSendError):
+        ob.send_now(_job())
+
+
+@pytest.mark.parametrize("status", [400, 401, 403])
+def test_sendgrid_4xx_is_permanent(sendgrid, status):
+    sendgrid.status = status
+    with pytest.raises(ob.PermanentSendError):
+        ob.send_now(_job())
+
+
+def test_sendgrid_unreachable_is_retryable(monkeypatch):
+    monkeypatch.setattr(ob, "EMAIL_TRANSPORT", "sendgrid")
+    monkeypatch.setattr(ob, "SENDGRID_API_KEY", "SG.test")
+    monkeypatch.setattr(ob, "SENDGRID_API_BASE", "http://127.0.0.1:9")
+    with pytest.raises(ob.RetryableSendError):
+        ob.send_now(_job())
+
+
+def test_smtp_delivers(smtp):
+    ob.send_now(_job())
+    assert "Subject: Your MinC code" in smtp.messages[0]
+    assert "Your code is 482913" in smtp.messages[0]
+
+
+@pytest.mark.parametrize("reply,error", [(b"451 try later", ob.RetryableSendError),
+                                         (b"550 no such user", ob.PermanentSendError)])
+def test_smtp_failures(smtp, reply, error):
+    smtp.rcpt_reply = reply
+    with pytest.raises(error):
+        ob.send_now(_job())
+
+
+# ----- worker -----
+
+class _Msg:
+    def __init__(self, body, dequeue_count=1):
+        self._body, self.dequeue_count = body, dequeue_count
+
+    def get_body(self):
+        return self._body
+
+
+class _Out:
+    value = None
+
+    def set(self, v):
+        self.value = v
+
+
+@pytest.fixture
+def worker(app_functions):
+    return app_functions["minc_email_outbox_worker"]
+
+
+def test_worker_permanent_failure_dead_letters_redacted_job(worker, sendgrid):
+    sendgrid.status = 400
+    job, dead = _job(), _Out()
+    worker(_Msg(json.dumps(job).encode()), dead)
+    record = json.loads(dead.value)
+    assert "482913" not in dead.value and "text" not in record
+    assert record["to"] == "user@example.org" and record["kind"] == "otp" and record["id"] == job["id"]
+    assert record["redacted"] == ["text"] and record["reason"].startswith("SendGrid status 400")
+
+
+def test_worker_retryable_failure_raises_until_last_attempt(worker, sendgrid):
+    sendgrid.status = 503
+    body = json.dumps(_job()).encode()
+    dead = _Out()
+    with pytest.raises(ob.RetryableSendError):
+        worker(_Msg(body, dequeue_count=1), dead)
+    assert dead.value is None
+    worker(_Msg(body, dequeue_count=ob.MAX_ATTEMPTS), dead)
+    assert "482913" not in dead.value
+    assert json.loads(dead.value)["dequeue_count"] == ob.MAX_ATTEMPTS
+
+
+def test_worker_unparseable_job_keeps_no_body(worker):
+    dead = _Out()
+    worker(_Msg(b"code 482913 {not json"), dead)
+    assert "482913" not in dead.value
+    assert json.loads(dead.value)["reason"] == "unparseable job"
+
+
+@pytest.mark.parametrize("body", [b'["482913"]', b'"code 482913"', b"42"])
+def test_worker_non_object_job_keeps_no_body(worker, body):
+    dead = _Out()
+    worker(_Msg(body, dequeue_count=1), dead)
+    record = json.loads(dead.value)
+    assert "482913" not in dead.value and record["raw_length"] == len(body)
+    assert "not an object" in record["reason"]
+
+
+def test_worker_job_missing_fields_dead_lettered_redacted(worker, sendgrid):
+    job = _job()
+    del job["to"]
+    dead = _Out()
+    worker(_Msg(json.dumps(job).encode(), dequeue_count=1), dead)
+    record = json.loads(dead.value)
+    assert "482913" not in dead.value and record["reason"] == "job missing to"
+    assert record["id"] == job["id"] and not sendgrid.received
+
+
+def test_worker_unexpected_error_dead_lettered_on_last_attempt(worker, monkeypatch):
+    def boom(job):
+        raise RuntimeError("transport bug")
+
+    monkeypatch.setattr("minc_email_outbox_worker.send_now", boom)
+    body = json.dumps(_job()).encode()
+    dead = _Out()
+    with pytest.raises(RuntimeError):
+        worker(_Msg(body, dequeue_count=1), dead)
+    assert dead.value is None
+    worker(_Msg(body, dequeue_count=ob.MAX_ATTEMPTS), dead)
+    record = json.loads(dead.value)
+    assert "482913" not in dead.value and record["reason"] == "unexpected RuntimeError"
@@ -0,0 +1,74 @@
+import json
+
+import azure.functions as func
+import pytest
+
+from shared import health
+
+
+def _ok(ms=3.0):
+    return {"ok": True, "status": 404, "ms": ms}
+
+
+def _all_ok():
+    return {label: _ok() for label, _ in health.PROBES}
+
+
+@pytest.fixture
+def probe_results(monkeypatch):
+    results = _all_ok()
+    monkeypatch.setattr(health, "probes", lambda: (results, 0.0))
+    monkeypatch.setattr(health, "recent_cosmos", lambda _s: {"ops": 0, "throttleRate": 0.0, "errorRate": 0.0})
+    return results
+
+
+def _get(fn, **params):
+    req = func.HttpRequest(method="GET", url="http://localhost/api/x", body=b"", params=params)
+    resp = fn(req)
+    return resp.status_code, json.loads(resp.get_body())
+
+
+def test_all_ok(probe_results):
+    report, status = health.deep()
+    assert status == "ok" and report["reasons"] == [] and report["warnings"] == []
+
+
+def test_audit_outage_is_a_warning_not_a_drain(probe_results):
+    probe_results["minc/audit"] = {"ok": False, "status": 503, "ms": 4.0}
+    report, status = health.deep()
+    assert status == "warn" and health.STATUS_CODES[status] == 200
+    assert report["warnings"] == ["minc/audit (optional): status 503"]
+
+
+def test_account_wide_throttling_does_not_drain(probe_results, monkeypatch):
+    monkeypatch.setattr(health, "recent_cosmos", lambda _s: {"ops": 500, "throttleRate": 0.4, "errorRate": 0.0})
+    report, status = health.deep()
+    assert status == "warn" and report["reasons"] == []
+
+
+def test_local_saturation_drains(probe_results, monkeypatch):
+    monkeypatch.setattr(health, "in_flight", lambda: {"vegu-users-search": health.HEALTH_MAX_IN_FLIGHT + 1})
+    _, status = health.deep()
+    assert status == "degraded" and health.STATUS_CODES[status] == 503
+
+
+def test_nothing_required_answers_is_down(probe_results):
+    for label in probe_results:
+        if label not in health.OPTIONAL_PROBES:
+            probe_results[label] = {"ok": False, "status": None, "ms": None, "error": "timeout"}
+    _, status = health.deep()
+    assert status == "down"
+
+
+def test_anonymous_deep_shows_no_internals(app_functions, probe_results):
+    status, body = _get(app_functions["minc_health"], deep="1")
+    assert status == 200
+    assert set(body) == {"status", "service", "reasons", "warnings"}
+    status, body = _get(app_functions["minc_health"])
+    assert (status, body) == (200, {"status": "ok", "service": "minc-vegu-backend"})
+
+
+def test_keyed_details_has_full_report(app_functions, probe_results):
+    status, body = _get(app_functions["minc_health_details"])
+    assert status == 200
+    assert {"cosmos", "inFlight", "pools", "caches", "identifierFilter"} <= set(body)
@@ -0,0 +1,47 @@
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from shared import metrics
+
+metrics.counter("test_metrics_total", "test counter")
+metrics.histogram("test_metrics_seconds", "test histogram")
+
+
+def _value(name, labels=None):
+    return metrics.snapshot().get((name, metrics._labels(labels)))
+
+
+def test_exited_threads_fold_into_retained_shard():
+    before_shards = len(metrics._shards)
+    before = _value("test_metrics_total", {"k": "pool"}) or 0
+
+    def work():
+        metrics.inc("test_metrics_total", {"k": "pool"})
+        metrics.observe("test_metrics_seconds", 0.02, {"k": "pool"})
+
+    for _ in range(50):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for _ in range(8):
+                pool.submit(work)
+    gc.collect()
+
+    assert len(metrics._shards) <= before_shards + 1
+    assert _value("test_metrics_total", {"k": "pool"}) == before + 400
+    h = _value("test_metrics_seconds", {"k": "pool"})
+    assert sum(h[:-1]) == 400
+
+
+def test_counter_is_monotonic_across_thread_exit():
+    seen = []
+
+    def work():
+        metrics.inc("test_metrics_total", {"k": "exit"}, 5)
+        seen.append(_value("test_metrics_total", {"k": "exit"}))
+
+    t = threading.Thread(target=work)
+    t.start()
+    t.join()
+    gc.collect()
+    assert _value("test_metrics_total", {"k": "exit"}) == seen[0] == 5
+    assert "test_metrics_total{k=\"exit\"} 5" in metrics.render_prometheus()
@@ -0,0 +1,38 @@
+import pytest
+
+from shared import query_guard as qg
+
+ALL = ["vg_id", "display_subject", "subject", "institution_name"]
+TEXT = ["display_subject", "subject", "institution_name"]
+
+
+@pytest.mark.parametrize("tok", ["vg25c0001141", "vg25001055", "vgi000001", "vgc000123"])
+def test_id_tokens_match_production_formats(tok):
+    assert qg.narrow_fields(tok, ["vg_id"], ["email"], TEXT) == ["vg_id"]
+
+
+@pytest.mark.parametrize("tok", ["vgcrypt", "delay", "vg"])
+def test_words_are_not_id_tokens(tok):
+    assert qg.narrow_fields(tok, ["vg_id"], ["email"], TEXT) == TEXT
+
+
+def test_dropping_optional_scan_is_enough_keeps_all_fields():
+    p = qg.plan("vegu-complaints-search", "VG25C0001141 report delay",
+                {"complaints": 4, "messages": 1}, optional=["messages"])
+    assert p["skip"] == ["messages"] and p["mode"] == "degraded"
+    assert p["cost"] <= qg.QG_MAX_COST and not p["narrow"]
+    # the id is still matched against vg_id (and everything else)
+    assert qg.fields_for(p, "vg25c0001141", ALL, ["vg_id"], [], TEXT) == ALL
+
+
+def test_still_over_budget_narrows_per_token():
+    p = qg.plan("vegu-complaints-search", "VG25C0001141 report delay ab",
+                {"complaints": 12, "messages": 1}, optional=["messages"])
+    assert p["cost"] > qg.QG_MAX_COST and p["narrow"] and p["mode"] == "degraded"
+    assert qg.fields_for(p, "vg25c0001141", ALL, ["vg_id"], [], TEXT) == ["vg_id"]
+    assert qg.fields_for(p, "delay", ALL, ["vg_id"], [], TEXT) == TEXT
+
+
+def test_cheap_query_is_untouched():
+    p = qg.plan("vegu-users-search", "anna", {"user-profiles": 3})
+    assert p["mode"] == "full" and not p["narrow"] and qg.summary(p) is None
@@ -0,0 +1,139 @@
+import azure.functions as func
+import pytest
+
+from shared import rate_limit as rl
+
+
+class FakeRedis:
+    """The slice of redis-py RedisBackend uses: pipeline() with incr / expire / get."""
+
+    def __init__(self, fail: bool = False):
+        self.store = {}
+        self.ttl = {}
+        self.fail = fail
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, r):
+        self._r, self._ops = r, []
+
+    def incr(self, k):
+        self._ops.append(("incr", k))
+
+    def expire(self, k, s):
+        self._ops.append(("expire", k, s))
+
+    def get(self, k):
+        self._ops.append(("get", k))
+
+    def execute(self):
+        if self._r.fail:
+            raise ConnectionError("redis down")
+        out = []
+        for op, k, *rest in self._ops:
+            if op == "incr":
+                self._r.store[k] = self._r.store.get(k, 0) + 1
+                out.append(self._r.store[k])
+            elif op == "expire":
+                self._r.ttl[k] = rest[0]
+                out.append(True)
+            else:
+                v = self._r.store.get(k)
+                out.append(None if v is None else str(v).encode())
+        return out
+
+
+def _redis_backend(fake):
+    b = rl.RedisBackend.__new__(rl.RedisBackend)
+    b._r = fake
+    return b
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(rl, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rl, "_memory", rl.MemoryBackend())
+    monkeypatch.setattr(rl, "_backend", None)
+    monkeypatch.setattr(rl, "REDIS_URL", "")
+    monkeypatch.setattr(rl, "TRUSTED_HOPS", 1)
+    monkeypatch.setattr(rl, "CLIENT_IP_HEADER", "")
+
+
+def _req(**headers):
+    return func.HttpRequest(method="POST", url="/api/minc-login-init", body=b"{}", headers=headers)
+
+
+def test_client_ip_is_rightmost_forwarded_hop():
+    assert rl.client_ip(_req(**{"X-Forwarded-For": "6.6.6.6, 10.0.0.1:4711"})) == "10.0.0.1"
+    assert rl.client_ip(_req(**{"X-Forwarded-For": "[2001:db8::1]:443"})) == "2001:db8::1"
+    assert rl.client_ip(_req()) == "unknown"
+
+
+def test_client_ip_trusted_hops_and_header(monkeypatch):
+    monkeypatch.setattr(rl, "TRUSTED_HOPS", 2)
+    assert rl.client_ip(_req(**{"X-Forwarded-For": "6.6.6.6, 1.2.3.4, 10.0.0.9"})) == "1.2.3.4"
+    assert rl.client_ip(_req(**{"X-Forwarded-For": "10.0.0.9"})) == "unknown"
+    monkeypatch.setattr(rl, "CLIENT_IP_HEADER", "x-azure-clientip")
+    assert rl.client_ip(_req(**{"X-Azure-ClientIP": "5.6.7.8", "X-Forwarded-For": "9.9.9.9"})) == "5.6.7.8"
+
+
+def test_rotating_spoofed_forwarded_for_does_not_bypass_ip_limit(monkeypatch):
+    monkeypatch.setattr(rl, "LIMIT_IP", (3, 60))
+    monkeypatch.setattr(rl, "LIMIT_GLOBAL", None)
+    statuses = [rl.check_request(_req(**{"X-Forwarded-For": f"7.7.7.{i}, 1.2.3.4:999"}), "r")
+                for i in range(5)]
+    assert statuses[:3] == [None, None, None]
+    assert all(r is not None and r.status_code == 429 for r in statuses[3:])
+
+
+def test_one_ip_cannot_exhaust_global_budget(monkeypatch):
+    monkeypatch.setattr(rl, "LIMIT_IP", (2, 60))
+    monkeypatch.setattr(rl, "LIMIT_GLOBAL", (5, 60))
+    for _ in range(50):
+        rl.check_request(_req(**{"X-Forwarded-For": "1.1.1.1"}), "r")
+    assert rl.check_request(_req(**{"X-Forwarded-For": "2.2.2.2"}), "r") is None
+    assert rl.check_request(_req(**{"X-Forwarded-For": "3.3.3.3"}), "r") is None
+
+
+def test_sliding_window_weights_previous_window():
+    limit = (10, 60)
+    for _ in range(10):
+        assert rl.hit("k", limit, now=59.0)[0]
+    # 30 s into the next window half of the previous 10 still count
+    results = [rl.hit("k", limit, now=90.0)[0] for _ in range(6)]
+    assert results == [True] * 5 + [False]
+    ok, retry = rl.hit("k", limit, now=90.0)
+    assert not ok and retry == 30
+
+
+def test_identifier_limit_is_case_insensitive(monkeypatch):
+    monkeypatch.setattr(rl, "LIMIT_IDENTIFIER", (2, 300))
+    assert rl.check_identifier("r", "A@x.org") is None
+    assert rl.check_identifier("r", "a@X.org ") is None
+    assert rl.check_identifier("r", "a@x.org").status_code == 429
+
+
+def test_redis_backend_shares_counts_between_instances(monkeypatch):
+    shared = FakeRedis()
+    limit = (3, 60)
+    monkeypatch.setattr(rl, "_backend", _redis_backend(shared))
+    assert rl.hit("r|1.2.3.4|ip", limit, now=120.0)[0]
+    assert rl.hit("r|1.2.3.4|ip", limit, now=121.0)[0]
+    # a second instance talking to the same Redis sees the same window
+    monkeypatch.setattr(rl, "_backend", _redis_backend(shared))
+    assert rl.hit("r|1.2.3.4|ip", limit, now=122.0)[0]
+    assert not rl.hit("r|1.2.3.4|ip", limit, now=123.0)[0]
+    assert shared.store == {"minc:rl:r|1.2.3.4|ip:2": 4}
+    assert shared.ttl["minc:rl:r|1.2.3.4|ip:2"] == 120
+    assert rl._memory._counts == {}
+
+
+def test_redis_error_falls_back_to_memory(monkeypatch):
+    monkeypatch.setattr(rl, "_backend", _redis_backend(FakeRedis(fail=True)))
+    limit = (1, 60)
+    assert rl.hit("k", limit, now=10.0) == (True, 0)
+    assert rl.hit("k", limit, now=11.0) == (False, 49)
+    assert rl._memory._counts == {"k:0": 2}
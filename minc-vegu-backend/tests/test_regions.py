@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+from azure.cosmos import exceptions as cx
+
+from bench.fake_cosmos import FakeCosmos
+from shared import regions
+
+
+@pytest.fixture
+def two_regions(monkeypatch):
+    """Fake account with regions "A" (preferred) and "B"; returns a factory for a container."""
+    monkeypatch.setattr(regions, "PREFERRED_REGIONS", ["A", "B"])
+    monkeypatch.setattr(regions, "HEDGE_DELAY_MS", 30.0)
+    monkeypatch.setattr(regions, "_lat", {})
+    monkeypatch.setattr(regions, "_hedging", [0])
+
+    def make(a_ms: float, b_ms: float):
+        cosmos = FakeCosmos(regions={"A": a_ms, "B": b_ms})
+        c = cosmos.container("db", "users", "/id")
+        c.upsert_item({"id": "u1", "name": "x"})
+        cosmos.region_calls = {"A": 0, "B": 0}
+        return cosmos, c
+
+    return make
+
+
+def _read(c, item="u1"):
+    return regions.hedged("users", "read_item",
+                          lambda: c.read_item(item, partition_key=item),
+                          lambda: c.read_item(item, partition_key=item, **regions.hedge_kwargs()))
+
+
+def test_fast_primary_sends_no_hedge(two_regions):
+    cosmos, c = two_regions(0, 0)
+    assert _read(c)["id"] == "u1"
+    time.sleep(0.05)
+    assert cosmos.region_calls == {"A": 1, "B": 0}
+
+
+def test_slow_primary_hedge_wins(two_regions):
+    cosmos, c = two_regions(400, 0)
+    t0 = time.perf_counter()
+    assert _read(c)["id"] == "u1"
+    assert time.perf_counter() - t0 < 0.2
+    assert cosmos.region_calls == {"A": 1, "B": 1}
+
+
+def test_primary_404_is_final(two_regions):
+    cosmos, c = two_regions(80, 1000)
+    t0 = time.perf_counter()
+    with pytest.raises(cx.CosmosResourceNotFoundError):
+        _read(c, "missing")
+    # answered by A at ~80 ms, without waiting for B's ~1 s
+    assert time.perf_counter() - t0 < 0.5
+    assert cosmos.region_calls["B"] == 1
+
+
+def test_max_in_flight_is_respected(two_regions, monkeypatch):
+    monkeypatch.setattr(regions, "HEDGE_MAX_IN_FLIGHT", 1)
+    cosmos, c = two_regions(250, 200)
+    threads = [threading.Thread(target=_read, args=(c,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cosmos.region_calls == {"A": 4, "B": 1}
+    assert regions._hedging == [0]
+
+
+def test_no_idle_primary_worker_runs_inline(two_regions, monkeypatch):
+    monkeypatch.setattr(regions, "_primary_slots", threading.BoundedSemaphore(1))
+    regions._primary_slots.acquire()
+    cosmos, c = two_regions(100, 0)
+    caller = threading.get_ident()
+    seen = []
+    result = regions.hedged("users", "read_item",
+                            lambda: (seen.append(threading.get_ident()), c.read_item("u1", partition_key="u1"))[1],
+                            lambda: c.read_item("u1", partition_key="u1", **regions.hedge_kwargs()))
+    assert result["id"] == "u1" and seen == [caller]
+    assert cosmos.region_calls == {"A": 1, "B": 0}
@@ -0,0 +1,231 @@
+import json
+
+import pytest
+from azure.cosmos.cosmos_client import _build_connection_policy
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from bench.fake_cosmos import FakeCosmos
+from shared import resilience
+from shared.instrumentation import InstrumentedContainer
+
+
+def _policy(**kwargs):
+    # what CosmosClient(**kwargs) would build, without connecting
+    return _build_connection_policy(dict(kwargs))
+
+
+def test_sdk_kwargs_cut_throttle_retries_only():
+    kw = resilience.sdk_retry_kwargs()
+    assert set(kw) == {"retry_throttle_total", "retry_throttle_backoff_max"}
+    default = _policy()
+    policy = _policy(**kw)
+    assert policy.RetryOptions.MaxRetryAttemptCount == resilience.SDK_RETRY_TOTAL
+    assert policy.RetryOptions.MaxWaitTimeInSeconds == max(1, resilience.SDK_RETRY_MAX_S)
+    # connection (transport) retries keep the SDK defaults
+    assert policy.ConnectionRetryConfiguration.total_retries == default.ConnectionRetryConfiguration.total_retries
+    assert _policy(retry_total=1).ConnectionRetryConfiguration.total_retries == 1
+
+
+# ----- retry policy and circuit breaker -----
+
+def _err(status, retry_after_ms=None):
+    e = CosmosHttpResponseError(status_code=status, message=f"status {status}")
+    e.headers = {"x-ms-retry-after-ms": str(retry_after_ms)} if retry_after_ms is not None else {}
+    return e
+
+
+class _Attempts:
+    """attempt_fn that raises the given errors in turn, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "RETRY_BASE_MS", 1.0)
+    monkeypatch.setattr(resilience, "RETRY_MAX", 3)
+    monkeypatch.setattr(resilience, "RETRY_MAX_WAIT_MS", 2000.0)
+    monkeypatch.setattr(resilience, "RETRY_BUDGET_MS", 4000.0)
+    monkeypatch.setattr(resilience, "CB_FAILURES", 8)   # above RETRY_MAX + 1
+    monkeypatch.setattr(resilience, "CB_OPEN_S", 0.05)
+    monkeypatch.setattr(resilience.random, "uniform", lambda a, b: 1.0)
+    waits = []
+    monkeypatch.setattr(resilience.time, "sleep", lambda s: waits.append(round(s * 1000.0, 3)))
+    return waits
+
+
+@pytest.mark.parametrize("status", [429, 449])
+def test_throttling_retried_for_any_op_honoring_retry_after(policy, status):
+    fn = _Attempts(_err(status, 30), _err(status, 40))
+    assert resilience.run("c", "patch_item", fn) == "ok"
+    assert fn.calls == 3
+    assert policy == [30.0, 40.0]
+
+
+def test_backoff_doubles_without_retry_after(policy):
+    fn = _Attempts(_err(429), _err(429), _err(429))
+    assert resilience.run("c", "read_item", fn) == "ok"
+    assert policy == [1.0, 2.0, 4.0]
+
+
+def test_gives_up_after_retry_max(policy):
+    fn = _Attempts(*[_err(429, 1) for _ in range(5)])
+    with pytest.raises(CosmosHttpResponseError):
+        resilience.run("c", "read_item", fn)
+    assert fn.calls == resilience.RETRY_MAX + 1
+
+
+def test_wait_over_per_wait_cap_surfaces_at_once(policy, monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_MAX_WAIT_MS", 100.0)
+    fn = _Attempts(_err(429, 500))
+    with pytest.raises(CosmosHttpResponseError):
+        resilience.run("c", "read_item", fn)
+    assert fn.calls == 1
+    assert policy == []
+
+
+def test_total_wait_budget_caps_retries(policy, monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BUDGET_MS", 100.0)
+    fn = _Attempts(_err(429, 60), _err(429, 60))
+    with pytest.raises(CosmosHttpResponseError):
+        resilience.run("c", "read_item", fn)
+    assert fn.calls == 2
+    assert policy == [60.0]
+
+
+@pytest.mark.parametrize("status", [408, 503])
+@pytest.mark.parametrize("op", sorted(resilience.IDEMPOTENT_OPS))
+def test_unavailable_retried_for_idempotent_ops(policy, status, op):
+    fn = _Attempts(_err(status))
+    assert resilience.run("c", op, fn) == "ok"
+    assert fn.calls == 2
+
+
+@pytest.mark.parametrize("status", [408, 503])
+@pytest.mark.parametrize("op", ["patch_item", "create_item", "replace_item", "delete_item"])
+def test_unavailable_not_retried_for_other_ops(policy, status, op):
+    fn = _Attempts(_err(status))
+    with pytest.raises(CosmosHttpResponseError) as ei:
+        resilience.run("c", op, fn)
+    assert ei.value.status_code == status
+    assert fn.calls == 1
+
+
+def test_other_errors_not_retried(policy):
+    fn = _Attempts(_err(404))
+    with pytest.raises(CosmosHttpResponseError):
+        resilience.run("c", "read_item", fn)
+    assert fn.calls == 1
+    assert resilience.breaker("c").failures == 0
+
+
+def test_breaker_opens_fails_fast_then_one_trial_closes(policy):
+    b = resilience.breaker("c")
+    for _ in range(resilience.CB_FAILURES):
+        with pytest.raises(CosmosHttpResponseError):
+            resilience.run("c", "patch_item", _Attempts(_err(503)))
+    assert b.state == "open"
+
+    fn = _Attempts()
+    with pytest.raises(resilience.CircuitOpenError) as ei:
+        resilience.run("c", "read_item", fn)
+    assert fn.calls == 0
+    assert ei.value.status_code == 503
+    assert 0 < ei.value.retry_after_s <= resilience.CB_OPEN_S
+
+    b.opened_at -= resilience.CB_OPEN_S   # open period over
+    assert b.allow() is True              # the one trial call
+    assert b.state == "half_open"
+    assert b.allow() is False             # nobody else while it runs
+    b.record(True)
+    assert b.state == "closed"
+    assert resilience.run("c", "read_item", _Attempts()) == "ok"
+
+
+def test_failed_trial_reopens(policy):
+    b = resilience.breaker("c")
+    for _ in range(resilience.CB_FAILURES):
+        with pytest.raises(CosmosHttpResponseError):
+            resilience.run("c", "patch_item", _Attempts(_err(503)))
+    b.opened_at -= resilience.CB_OPEN_S
+    with pytest.raises(CosmosHttpResponseError):
+        resilience.run("c", "patch_item", _Attempts(_err(503)))
+    assert b.state == "open"
+    with pytest.raises(resilience.CircuitOpenError):
+        resilience.run("c", "read_item", _Attempts())
+
+
+def test_success_resets_consecutive_failures(policy):
+    for _ in range(resilience.CB_FAILURES - 1):
+        with pytest.raises(CosmosHttpResponseError):
+            resilience.run("c", "patch_item", _Attempts(_err(503)))
+    resilience.run("c", "read_item", _Attempts())
+    with pytest.raises(CosmosHttpResponseError):
+        resilience.run("c", "patch_item", _Attempts(_err(503)))
+    assert resilience.breaker("c").state == "closed"
+
+
+# ----- unavailable_response -----
+
+def _body(resp):
+    return json.loads(resp.get_body())
+
+
+@pytest.mark.parametrize("status", [429, 449, 408, 503])
+def test_unavailable_response_maps_retry_after(status):
+    resp = resilience.unavailable_response(_err(status, 2500))
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "3"
+    assert _body(resp) == {"success": False, "error": "busy", "retryAfterS": 2.5}
+
+
+def test_unavailable_response_defaults_to_one_second():
+    resp = resilience.unavailable_response(_err(429))
+    assert resp.headers["Retry-After"] == "1"
+    assert _body(resp)["retryAfterS"] == 1.0
+
+
+def test_unavailable_response_for_open_circuit():
+    resp = resilience.unavailable_response(resilience.CircuitOpenError("c", 4.2))
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "5"
+    assert _body(resp)["retryAfterS"] == 4.2
+
+
+@pytest.mark.parametrize("e", [_err(404), _err(409), ValueError("x")])
+def test_unavailable_response_ignores_other_errors(e):
+    assert resilience.unavailable_response(e) is None
+
+
+# ----- end to end -----
+
+def test_instrumented_container_retries_fake_throttling(policy, monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_MAX", 10)
+    monkeypatch.setattr(resilience, "CB_FAILURES", 100)
+    cosmos = FakeCosmos(seed=7, throttle_rate=0.4, retry_after_ms=5)
+    raw = cosmos.container("db", "complaints", "/id")
+    c = InstrumentedContainer(raw, "complaints")
+    for i in range(20):
+        c.upsert_item({"id": f"VG25C{i:07d}"})
+    got = [c.read_item(f"VG25C{i:07d}", partition_key=f"VG25C{i:07d}")["id"] for i in range(20)]
+    assert got == [f"VG25C{i:07d}" for i in range(20)]
+    assert cosmos.throttled > 0
+    assert policy and set(policy) == {5.0}
+
+
+def test_instrumented_container_surfaces_persistent_throttling(policy):
+    cosmos = FakeCosmos(seed=7, throttle_rate=1.0, retry_after_ms=5)
+    c = InstrumentedContainer(cosmos.container("db", "complaints", "/id"), "complaints")
+    with pytest.raises(CosmosHttpResponseError) as ei:
+        c.read_item("VG25C0000001", partition_key="VG25C0000001")
+    assert cosmos.throttled == resilience.RETRY_MAX + 1
+    assert resilience.unavailable_response(ei.value).status_code == 503
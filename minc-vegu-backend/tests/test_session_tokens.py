@@ -0,0 +1,40 @@
+import azure.functions as func
+import pytest
+
+from shared import session_tokens as st
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    monkeypatch.setattr(st, "_KEYS", [("k1", b"secret")])
+    monkeypatch.setattr(st, "_KEY_BY_ID", {"k1": b"secret"})
+    monkeypatch.setattr(st, "REQUIRE_SESSION", True)
+
+
+def test_issue_verify_roundtrip(keys):
+    token, _ = st.issue("MINC1", roles=["admin"])
+    assert st.verify(token)["sub"] == "MINC1"
+
+
+def test_tampered_signature_rejected(keys):
+    token, _ = st.issue("MINC1")
+    with pytest.raises(st.SessionError):
+        st.verify(token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))
+
+
+@pytest.mark.parametrize("token", [
+    "v1.k1.é.abc",          # non-ASCII body
+    "v1.k1.eyJ9.sïg",       # non-ASCII signature
+    "v1.k1.☃.☃",
+])
+def test_non_ascii_token_is_session_error(keys, token):
+    with pytest.raises(st.SessionError):
+        st.verify(token)
+
+
+def test_require_session_non_ascii_header_is_401(keys):
+    req = func.HttpRequest(method="GET", url="/api/vegu-users/VG1", body=b"",
+                           headers={"Authorization": "Bearer v1.k1.é.sïg"})
+    claims, denied = st.require_session(req)
+    assert claims is None
+    assert denied is not None and denied.status_code == 401
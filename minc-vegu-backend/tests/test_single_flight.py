@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from bench.fake_cosmos import FakeCosmos
+from shared import single_flight
+from shared.instrumentation import InstrumentedContainer, read_all
+
+SQL = "SELECT * FROM c WHERE c.institution_id = @i"
+PARAMS = [{"name": "@i", "value": "VGI000001"}]
+
+
+@pytest.fixture
+def complaints(monkeypatch):
+    monkeypatch.setattr(single_flight, "SF_ENABLED", True)
+    cosmos = FakeCosmos(latency_ms=40)
+    raw = cosmos.container("db", "complaints", "/id")
+    for i in range(50):
+        raw.upsert_item({"id": f"VG25C{i:07d}", "institution_id": "VGI000001"})
+    raw.calls.clear()
+    pages = [0]
+    throttle = cosmos.maybe_throttle
+
+    def count_page():
+        pages[0] += 1
+        throttle()
+
+    cosmos.maybe_throttle = count_page
+    return InstrumentedContainer(raw, "complaints"), raw, pages
+
+
+def _query(c):
+    return c.query_items(query=SQL, parameters=PARAMS, enable_cross_partition_query=True, max_item_count=10)
+
+
+def test_stopping_early_reads_one_page(complaints):
+    c, raw, pages = complaints
+    for _ in _query(c):
+        break
+    assert pages[0] == 1
+
+
+def test_read_all_coalesces_concurrent_identical_queries(complaints):
+    c, raw, pages = complaints
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(read_all(_query(c)))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert raw.calls["query_items"] == 1
+    assert [len(r) for r in results] == [50] * 4
+    # followers get copies, not the leader's objects
+    assert len({id(r[0]) for r in results}) == 4
+
+
+def test_write_starts_new_generation(complaints):
+    c, raw, _ = complaints
+    k1 = single_flight.key("complaints", "query_items", SQL)
+    c.upsert_item({"id": "VG25C9999999", "institution_id": "VGI000001"})
+    assert single_flight.key("complaints", "query_items", SQL) != k1
+    assert len(read_all(_query(c))) == 51
+
+
+def test_read_all_of_plain_iterable():
+    assert read_all(iter([1, 2])) == [1, 2]
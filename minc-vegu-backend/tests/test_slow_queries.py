@@ -0,0 +1,151 @@
+import json
+import queue
+import time
+from collections import deque
+
+import azure.functions as func
+import pytest
+
+from bench.fake_cosmos import FakeCosmos
+from shared import instrumentation, session_tokens, slow_queries
+from shared.instrumentation import InstrumentedContainer, read_all
+
+SQL = "SELECT * FROM c WHERE c.institution_id = @i AND CONTAINS(LOWER(c.title), @t0)"
+
+
+@pytest.fixture
+def slowq(monkeypatch):
+    monkeypatch.setattr(slow_queries, "_buffer", deque(maxlen=50))
+    monkeypatch.setattr(slow_queries, "_last_explain", {})
+    monkeypatch.setattr(slow_queries, "SLOWQ_STATS", dict.fromkeys(slow_queries.SLOWQ_STATS, 0))
+    monkeypatch.setattr(slow_queries, "SLOWQ_RU", 1.0)
+    monkeypatch.setattr(slow_queries, "SLOWQ_MS", 1.0)
+    monkeypatch.setattr(slow_queries, "SLOWQ_SAMPLE", 1.0)
+    monkeypatch.setattr(slow_queries, "SLOWQ_COOLDOWN", 300.0)
+    cosmos = FakeCosmos()
+    raw = cosmos.container("db", "complaints", "/id")
+    for i in range(30):
+        raw.upsert_item({"id": f"VG25C{i:07d}", "institution_id": "VGI000001", "title": f"noise {i}"})
+    return InstrumentedContainer(raw, "complaints")
+
+
+@pytest.fixture
+def no_explain(monkeypatch):
+    """A private job queue nobody drains, so sampled entries stay pending."""
+    jobs = queue.Queue(maxsize=8)
+    monkeypatch.setattr(slow_queries, "_jobs", jobs)
+    monkeypatch.setattr(slow_queries, "_ensure_worker", lambda: None)
+    return jobs
+
+
+def _search(c, needle="secret-needle", route=None):
+    tok = instrumentation._route.set(route) if route else None
+    try:
+        return read_all(c.query_items(SQL, parameters=[{"name": "@i", "value": "VGI000001"},
+                                                       {"name": "@t0", "value": needle}],
+                                      enable_cross_partition_query=True))
+    finally:
+        if tok is not None:
+            instrumentation._route.reset(tok)
+
+
+def test_slow_query_recorded_with_shape_not_values(slowq, no_explain):
+    _search(slowq)
+    (entry,) = slow_queries.recent()
+    assert entry["container"] == "complaints"
+    assert entry["template"] == instrumentation.query_template(SQL)
+    assert entry["params"] == {"@i": {"n": 1, "type": "str"}, "@t#": {"n": 1, "type": "str"}}
+    assert entry["crossPartition"] is True and entry["ru"] >= 1.0
+    assert "secret-needle" not in json.dumps(entry) and "VGI000001" not in json.dumps(entry)
+
+
+def test_fast_query_and_point_reads_not_recorded(slowq, no_explain, monkeypatch):
+    monkeypatch.setattr(slow_queries, "SLOWQ_RU", 1e6)
+    monkeypatch.setattr(slow_queries, "SLOWQ_MS", 1e6)
+    _search(slowq)
+    monkeypatch.setattr(slow_queries, "SLOWQ_RU", 0.0)
+    slowq.read_item("VG25C0000001", partition_key="VG25C0000001")
+    assert slow_queries.recent() == []
+
+
+def test_explain_once_per_template_within_cooldown(slowq, no_explain):
+    for needle in ("a", "b", "c"):
+        _search(slowq, needle)
+    assert slow_queries.SLOWQ_STATS["recorded"] == 3
+    assert slow_queries.SLOWQ_STATS["sampled"] == 1
+    assert no_explain.qsize() == 1
+    pending = [e["explain"] for e in slow_queries.recent()]
+    assert pending == [None, None, {"pending": True}]
+
+
+def test_explain_again_after_cooldown(slowq, no_explain, monkeypatch):
+    _search(slowq)
+    monkeypatch.setattr(slow_queries, "SLOWQ_COOLDOWN", 0.0)
+    _search(slowq)
+    assert slow_queries.SLOWQ_STATS["sampled"] == 2
+
+
+def test_full_job_queue_counts_as_dropped(slowq, monkeypatch):
+    full = queue.Queue(maxsize=1)
+    full.put_nowait(None)
+    monkeypatch.setattr(slow_queries, "_jobs", full)
+    monkeypatch.setattr(slow_queries, "_ensure_worker", lambda: pytest.fail("worker started for a dropped job"))
+    _search(slowq)
+    assert slow_queries.SLOWQ_STATS["dropped"] == 1
+    assert slow_queries.SLOWQ_STATS["sampled"] == 0
+    assert slow_queries.recent()[0]["explain"] is None
+
+
+def test_sampled_query_explained_off_the_request_path(slowq):
+    _search(slowq)
+    entry = slow_queries._buffer[-1]
+    deadline = time.monotonic() + 5
+    while entry["explain"] == {"pending": True} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    explain = entry["explain"]
+    assert "error" not in explain
+    assert explain["pages"] >= 1 and explain["complete"] is True and explain["ru"] > 0
+    assert slow_queries.SLOWQ_STATS["explained"] == 1
+
+
+def test_recent_filters_by_container_and_route(slowq, no_explain):
+    other = InstrumentedContainer(FakeCosmos().container("db", "messages", "/id"), "messages")
+    other.unwrapped.upsert_item({"id": "m1", "institution_id": "VGI000001", "title": "x"})
+    _search(slowq, route="vegu-search")
+    _search(slowq, route="vegu-complaints")
+    _search(other, route="vegu-search")
+
+    assert [e["container"] for e in slow_queries.recent()] == ["messages", "complaints", "complaints"]
+    assert [e["route"] for e in slow_queries.recent(container="complaints")] == ["vegu-complaints", "vegu-search"]
+    assert [e["container"] for e in slow_queries.recent(route="vegu-search")] == ["messages", "complaints"]
+    assert slow_queries.recent(container="complaints", route="vegu-search")[0]["route"] == "vegu-search"
+    assert len(slow_queries.recent(limit=2)) == 2
+    assert len(slow_queries.recent(limit=0)) == 1
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (None, 50),
+    ("", 50),
+    ("7", 7),
+    ("abc", 50),
+    ("2.5", 50),
+    ("9999", 500),
+])
+def test_route_limit_parsing(app_functions, monkeypatch, raw, expected):
+    monkeypatch.setattr(session_tokens, "REQUIRE_SESSION", False)
+    seen = {}
+
+    def recent(limit=50, container=None, route=None):
+        seen.update(limit=limit, container=container, route=route)
+        return []
+
+    monkeypatch.setattr(slow_queries, "recent", recent)
+    params = {"container": "complaints"}
+    if raw is not None:
+        params["limit"] = raw
+    req = func.HttpRequest(method="GET", url="http://localhost/api/minc-slow-queries", body=b"", params=params)
+    resp = app_functions["minc_slow_queries"](req)
+    assert resp.status_code == 200
+    body = json.loads(resp.get_body())
+    assert body["success"] is True and body["items"] == []
+    assert seen == {"limit": expected, "container": "complaints", "route": None}
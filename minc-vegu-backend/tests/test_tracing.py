@@ -0,0 +1,86 @@
+import importlib
+import json
+
+import azure.functions as func
+import pytest
+
+from bench.fake_cosmos import FakeCosmos
+from shared import tracing
+from shared.http_response import json_response
+from shared.instrumentation import InstrumentedContainer, instrument_route
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def tracing_on(monkeypatch, tmp_path):
+    pytest.importorskip("opentelemetry.sdk")
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("MINC_TRACING", "1")
+    monkeypatch.setenv("MINC_TRACE_EXPORTER", "file")
+    monkeypatch.setenv("MINC_TRACE_FILE", str(path))
+    importlib.reload(tracing)
+    assert tracing.TRACING_ENABLED
+
+    def spans():
+        tracing._trace.get_tracer_provider().force_flush()
+        return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    yield spans
+    monkeypatch.delenv("MINC_TRACING")
+    importlib.reload(tracing)
+
+
+@pytest.fixture
+def tracing_off(monkeypatch):
+    monkeypatch.delenv("MINC_TRACING", raising=False)
+    importlib.reload(tracing)
+    yield
+    importlib.reload(tracing)
+
+
+def _complaints():
+    raw = FakeCosmos().container("db", "complaints", "/id")
+    raw.upsert_item({"id": "VG25C0000001", "institution_id": "VGI000001"})
+    return InstrumentedContainer(raw, "complaints")
+
+
+def test_handler_and_cosmos_spans_join_incoming_trace(tracing_on):
+    c = _complaints()
+
+    @instrument_route("trace-test")
+    def handler(req: func.HttpRequest) -> func.HttpResponse:
+        doc = c.read_item("VG25C0000001", partition_key="VG25C0000001")
+        return json_response({"success": True, "id": doc["id"]})
+
+    req = func.HttpRequest(method="GET", url="http://localhost/api/trace-test", body=b"",
+                           headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert handler(req).status_code == 200
+
+    spans = tracing_on()
+    (server,) = [s for s in spans if s["kind"] == "SpanKind.SERVER"]
+    (cosmos,) = [s for s in spans if s["name"] == "cosmos read_item"]
+    assert server["name"] == "GET trace-test"
+    assert server["context"]["trace_id"] == "0x" + TRACE_ID
+    assert server["parent_id"] == "0x" + PARENT_ID
+    assert server["attributes"]["http.response.status_code"] == 200
+    assert cosmos["context"]["trace_id"] == "0x" + TRACE_ID
+    assert cosmos["parent_id"] == server["context"]["span_id"]
+    assert cosmos["attributes"]["db.collection.name"] == "complaints"
+    assert cosmos["attributes"]["db.cosmosdb.request_charge"] > 0
+    assert server["attributes"]["minc.request_units"] == cosmos["attributes"]["db.cosmosdb.request_charge"]
+
+
+def test_tracing_off_is_a_noop(tracing_off):
+    assert not tracing.TRACING_ENABLED
+    assert tracing.span("x") is tracing.NOOP
+    assert tracing.request_span("r") is tracing.NOOP
+
+    def fn():
+        return 1
+
+    assert tracing.traced("x")(fn) is fn
+    with tracing.span("x") as sp:
+        sp.set_attribute("k", "v")
+        assert not sp.is_recording()
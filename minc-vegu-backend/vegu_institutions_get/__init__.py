@@ -1,31 +1,44 @@
-# vegu_institutions_get/__init__.py  v1.3
-import json
+# vegu_institutions_get/__init__.py  v1.4
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session
 from shared.auth import http_auth_level          # keep same auth behavior as others
 from shared.vegu_cosmos_client import get_institution_by_vg_id
+from shared.projection import parse_fields
 
-def _json(obj, status=200):
-    return func.HttpResponse(json.dumps(obj), status_code=status, mimetype="application/json")
 
 @app.function_name(name="vegu_institutions_get")
 @app.route(route="vegu-institutions/{vg_id}", methods=["GET"], auth_level=http_auth_level())
+@instrument_route("vegu-institutions/{vg_id}")
 def run(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
     vg_id = req.route_params.get("vg_id", "").strip()
     if not vg_id:
-        return _json({"success": False, "error": "Missing vg_id"}, 400)
+        return json_response({"success": False, "error": "Missing vg_id"}, 400)
+
+    # Optional ?fields=name,city,... → projected query instead of SELECT *
+    fields, err = parse_fields(req.params.get("fields"), "institution")
+    if err:
+        return json_response({"success": False, "error": err}, 400)
 
     try:
-        doc = get_institution_by_vg_id(vg_id)
+        doc = get_institution_by_vg_id(vg_id, fields=fields)
         if not doc:
-            return _json({"success": False, "error": "Institution not found"}, 404)
+            return json_response({"success": False, "error": "Institution not found"}, 404)
 
-        # remove noisy cosmos fields if present
+        # _rid/_self/_attachments are stripped by json_response
         etag = doc.pop("_etag", "")
-        for f in ("_rid", "_self", "_attachments", "_ts"):
-            doc.pop(f, None)
+        doc.pop("_ts", None)
 
-        return _json({"success": True, "institution": doc, "etag": etag})
+        return json_response({"success": True, "institution": doc, "etag": etag}, req=req)
     except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         # log if you want; keep generic error outward
-        return _json({"success": False, "error": "server_error"}, 500)
+        return json_response({"success": False, "error": "server_error"}, 500)
@@ -2,14 +2,19 @@
 # Route: GET /api/vegu-institutions-search?q=<text>&limit=20
 # - Partial, case-insensitive, multi-token (AND across tokens, OR across fields)
 # - Returns lightweight rows for the FE typeahead
+# - Tokens/fields/RU go through shared.query_guard (short tokens dropped, costly plans narrowed)
 
-import json
 from urllib.parse import unquote_plus
 
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session
 from shared.auth import http_auth_level
 from shared.vegu_cosmos_client import institutions_container
+from shared import query_guard
 
 SEARCH_FIELDS = [
     "vg_id", "name", "city",
@@ -22,22 +27,27 @@ MAX_LIMIT = 50
 DEFAULT_LIMIT = 20
 
 
-def _json(payload, status=200):
-    return func.HttpResponse(json.dumps(payload), status_code=status, mimetype="application/json")
-
-
 @app.function_name(name="vegu_institutions_search")
 @app.route(route="vegu-institutions-search", methods=["GET"], auth_level=http_auth_level())
+@instrument_route("vegu-institutions-search")
 def run(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
     try:
         raw_q = req.params.get("q", "")
         q = unquote_plus(raw_q).strip()
         if not q:
-            return _json({"success": False, "error": "Missing query param 'q'."}, 400)
-
-        tokens = [t.lower() for t in q.split() if t.strip()]
+            return json_response({"success": False, "error": "Missing query param 'q'."}, 400)
+
+        raw_tokens = [t.lower() for t in q.split() if t.strip()]
+        if not raw_tokens:
+            return json_response({"success": False, "error": "Empty search tokens."}, 400)
+        plan = query_guard.plan("vegu-institutions-search", q, {"institutions": len(SEARCH_FIELDS)},
+                                split=lambda _: raw_tokens)
+        tokens = plan["tokens"]
         if not tokens:
-            return _json({"success": False, "error": "Empty search tokens."}, 400)
+            return json_response(query_guard.annotate({"success": True, "items": []}, plan))
 
         try:
             limit = int(req.params.get("limit", DEFAULT_LIMIT))
@@ -53,7 +63,8 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
         for i, tok in enumerate(tokens):
             pname = f"@t{i}"
             params.append({"name": pname, "value": tok})
-            ors = [f"CONTAINS(LOWER(c.{f}), {pname})" for f in SEARCH_FIELDS]
+            fields = query_guard.fields_for(plan, tok, SEARCH_FIELDS, ["vg_id"], ["complaint_email"], ["name", "city"])
+            ors = [f"CONTAINS(LOWER(c.{f}), {pname})" for f in fields]
             clauses.append("(" + " OR ".join(ors) + ")")
         where = " AND ".join(clauses)
 
@@ -65,10 +76,13 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
             ORDER BY c._ts DESC
         """
 
-        items = list(cont.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        return _json({"success": True, "items": items})
+        items = query_guard.collect(plan, cont.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+        return json_response(query_guard.annotate({"success": True, "items": items}, plan), req=req)
 
     except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         # Keep logs verbose, response minimal
         print(f"❌ vegu_institutions_search error: {e}")
-        return _json({"success": False, "error": "server_error"}, 500)
+        return json_response({"success": False, "error": "server_error"}, 500)
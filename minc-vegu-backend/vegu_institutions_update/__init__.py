@@ -1,17 +1,19 @@
-# vegu_institutions_update/__init__.py  v1.9
-import json
+# vegu_institutions_update/__init__.py  v1.10
 import logging
 import azure.functions as func
 from datetime import datetime, timezone
 from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session, actor_of
 from shared.auth import http_auth_level
 from shared.vegu_cosmos_client import (
     get_institution_by_vg_id,
     update_institution_fields,
 )
+from shared.audit_log import record_event, changed_fields
 
-def _resp(obj, status=200):
-    return func.HttpResponse(json.dumps(obj), status_code=status, mimetype="application/json")
 
 # Fields we’re OK receiving from FE (extra safety — vegu_cosmos_client also defends)
 ALLOWED_FIELDS = {
@@ -24,19 +26,23 @@ ALLOWED_FIELDS = {
 
 @app.function_name(name="vegu_institutions_update")
 @app.route(route="vegu-institutions-update", methods=["POST", "PATCH"], auth_level=http_auth_level())
+@instrument_route("vegu-institutions-update")
 def run(req: func.HttpRequest) -> func.HttpResponse:
+    session, denied = require_session(req)
+    if denied:
+        return denied
     try:
         body = req.get_json()
     except ValueError:
-        return _resp({"success": False, "error": "Invalid JSON."}, 400)
+        return json_response({"success": False, "error": "Invalid JSON."}, 400)
 
     vg_id = (body or {}).get("vg_id") or (body or {}).get("id")
     if not vg_id:
-        return _resp({"success": False, "error": "vg_id is required"}, 400)
+        return json_response({"success": False, "error": "vg_id is required"}, 400)
 
     patch_in = (body or {}).get("patch") or {}
     if not isinstance(patch_in, dict) or not patch_in:
-        return _resp({"success": False, "error": "patch object is required"}, 400)
+        return json_response({"success": False, "error": "patch object is required"}, 400)
 
     # Optional optimistic concurrency
     client_etag = (body or {}).get("etag")
@@ -44,12 +50,12 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
     # Load current
     current = get_institution_by_vg_id(vg_id)
     if not current:
-        return _resp({"success": False, "error": "Institution not found"}, 404)
+        return json_response({"success": False, "error": "Institution not found"}, 404)
 
     # Concurrency: if client provided etag and doesn’t match, ask them to refresh
     server_etag = current.get("_etag")
     if client_etag and server_etag and client_etag != server_etag:
-        return _resp({
+        return json_response({
             "success": False,
             "error": "etag_mismatch",
             "message": "The record was modified by someone else. Refresh and retry.",
@@ -60,7 +66,7 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
     patch = {k: v for k, v in patch_in.items() if k in ALLOWED_FIELDS}
 
     if not patch:
-        return _resp({"success": False, "error": "No allowed fields in patch."}, 400)
+        return json_response({"success": False, "error": "No allowed fields in patch."}, 400)
     # ALWAYS server-stamp the update time (UTC, ISO8601 Z)
     patch["updated_at"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
@@ -68,17 +74,24 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
         updated = update_institution_fields(vg_id=vg_id, patch=patch)
     except ValueError as ve:
         # e.g., missing country (partition) or not found
-        return _resp({"success": False, "error": str(ve)}, 404)
+        return json_response({"success": False, "error": str(ve)}, 404)
     except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         logging.exception("vegu_institutions_update failed")
-        return _resp({"success": False, "error": "server_error"}, 500)
+        return json_response({"success": False, "error": "server_error"}, 500)
 
-    # Trim noisy cosmos internals but return fresh etag for the client
+    changes = changed_fields(current, patch)
+    if changes:
+        record_event(vg_id, "institution", "updated", "Institution updated via MinC.", changes,
+                     actor=actor_of(session))
+
+    # Return fresh etag for the client (other internals are stripped by json_response)
     etag = updated.get("_etag")
-    for f in ("_rid","_self","_attachments","_ts"):
-        updated.pop(f, None)
+    updated.pop("_ts", None)
 
-    return _resp({
+    return json_response({
         "success": True,
         "institution": updated,
         "etag": etag
@@ -1,9 +1,13 @@
-# minc_vegu_backend/vegu_mesages_thread/__init__.py v1.6
+# minc_vegu_backend/vegu_mesages_thread/__init__.py v1.7
 
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route, read_all
+from shared.session_tokens import require_session
 from shared.vegu_cosmos_client import get_messages_container
-import json
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.projection import parse_fields, select_clause
 
 _messages = get_messages_container()  # ⬅️ no "kind=" kwarg
 
@@ -12,36 +16,35 @@ _messages = get_messages_container()  # ⬅️ no "kind=" kwarg
     methods=["GET"],
     auth_level=func.AuthLevel.ANONYMOUS
 )
+@instrument_route("vegu-complaint-messages")
 def vegu_complaint_messages(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
     try:
         vg = (req.params.get("complaint_vg_id") or "").strip()
         if not vg:
-            return func.HttpResponse(
-                json.dumps({"success": False, "error": "Missing complaint_vg_id"}),
-                status_code=400,
-                mimetype="application/json",
-            )
+            return json_response({"success": False, "error": "Missing complaint_vg_id"}, 400)
 
-        query = """
-        SELECT * FROM c
+        fields, err = parse_fields(req.params.get("fields"), "message")
+        if err:
+            return json_response({"success": False, "error": err}, 400)
+
+        query = f"""
+        SELECT {select_clause("message", fields)} FROM c
         WHERE c.complaint_vg_id = @vg
         ORDER BY c.timestamp ASC
         """
         params = [{"name": "@vg", "value": vg}]
-        items = list(_messages.query_items(
+        items = read_all(_messages.query_items(
             query=query,
             parameters=params,
             enable_cross_partition_query=True
         ))
 
-        return func.HttpResponse(
-            json.dumps({"success": True, "count": len(items), "items": items}),
-            status_code=200,
-            mimetype="application/json",
-        )
+        return json_response({"success": True, "count": len(items), "items": items}, req=req)
     except Exception as e:
-        return func.HttpResponse(
-            json.dumps({"success": False, "error": str(e)}),
-            status_code=500,
-            mimetype="application/json",
-        )
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
+        return json_response({"success": False, "error": str(e)}, 500)
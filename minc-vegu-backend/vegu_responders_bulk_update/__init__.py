@@ -0,0 +1,76 @@
+# vegu_responders_bulk_update/__init__.py  v1.1
+# Route: POST /api/vegu-responders-bulk-update
+# Body: {"vg_ids": [...]} or {"institution_id": "..."}, plus {"patch": {"status": "suspended"}}
+# Returns one result row per vg_id (success/status/error).
+
+import logging
+import azure.functions as func
+from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session, actor_of
+from shared.auth import http_auth_level
+from shared.bulk_updates import (
+    clean_vg_ids,
+    bulk_update_responders,
+    responder_ids_for_institution,
+    summarize,
+)
+
+# Bulk edits are limited to status changes (suspend / reactivate)
+BULK_ALLOWED_FIELDS = {"status"}
+STATUS_VALUES = {"active", "pending", "suspended", "locked", "expired"}
+
+
+@app.function_name(name="vegu_responders_bulk_update")
+@app.route(
+    route="vegu-responders-bulk-update",
+    methods=[func.HttpMethod.POST],
+    auth_level=http_auth_level()
+)
+@instrument_route("vegu-responders-bulk-update")
+def run(req: func.HttpRequest) -> func.HttpResponse:
+    session, denied = require_session(req)
+    if denied:
+        return denied
+    try:
+        body = req.get_json()
+    except ValueError:
+        return json_response({"success": False, "error": "Invalid JSON."}, 400)
+
+    patch_in = (body or {}).get("patch") or {}
+    if not isinstance(patch_in, dict) or not patch_in:
+        return json_response({"success": False, "error": "patch object is required"}, 400)
+
+    patch = {k: v for k, v in patch_in.items() if k in BULK_ALLOWED_FIELDS}
+    if not patch:
+        return json_response({"success": False, "error": "No allowed fields in patch."}, 400)
+
+    status = patch.get("status")
+    if not isinstance(status, str) or status.strip().lower() not in STATUS_VALUES:
+        return json_response({"success": False, "error": "Invalid status value."}, 400)
+    patch["status"] = status.strip().lower()
+
+    try:
+        institution_id = ((body or {}).get("institution_id") or "").strip()
+        raw_ids = (body or {}).get("vg_ids")
+        if institution_id and not raw_ids:
+            raw_ids = responder_ids_for_institution(institution_id)
+            if not raw_ids:
+                return json_response({"success": True, "summary": summarize([]), "results": []}, 200)
+
+        vg_ids, err = clean_vg_ids(raw_ids)
+        if err:
+            return json_response({"success": False, "error": err}, 400)
+
+        results = bulk_update_responders(vg_ids, patch, actor=actor_of(session))
+    except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
+        logging.exception("vegu_responders_bulk_update failed")
+        return json_response({"success": False, "error": "server_error"}, 500)
+
+    summary = summarize(results)
+    return json_response({"success": summary["failed"] == 0, "summary": summary, "results": results}, 200, req=req)
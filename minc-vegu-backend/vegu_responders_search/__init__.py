@@ -1,41 +1,51 @@
-# vegu_responders_search/__init__.py V1.4
+# vegu_responders_search/__init__.py V1.5
 
 import os
-import json
 import azure.functions as func
 from function_app import app  # ← use the single global app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.normalizers import RESPONDER_ROW
+from shared.session_tokens import require_session
 from azure.cosmos import PartitionKey
-from shared.vegu_cosmos_client import get_vegu_db  # we already use this elsewhere
+from shared.vegu_cosmos_client import get_container
+from shared import query_guard
 
 RESPONDERS_CONTAINER = os.getenv("VEGU_CONTAINER_RESPONDERS", "responders")
+SEARCH_FIELDS = ["vg_id", "email", "firstName", "middleName", "lastName", "institution_name"]
 
 @app.route(route="vegu-responders-search", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+@instrument_route("vegu-responders-search")
 def vegu_responders_search(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
     try:
         q = (req.params.get("q") or "").strip()
         if not q:
-            return func.HttpResponse(
-                json.dumps({"success": True, "items": []}),
-                mimetype="application/json"
-            )
+            return json_response({"success": True, "items": []})
 
-        db = get_vegu_db()
-        container = db.get_container_client(RESPONDERS_CONTAINER)
+        # the whole string is one CONTAINS term; the guard checks its length / cost
+        plan = query_guard.plan("vegu-responders-search", q, {"responders": len(SEARCH_FIELDS)},
+                                split=lambda s: [s.lower()])
+        if not plan["tokens"]:
+            return json_response(query_guard.annotate({"success": True, "items": []}, plan))
+        fields = query_guard.fields_for(plan, plan["tokens"][0], SEARCH_FIELDS, ["vg_id"], ["email"],
+                                        ["firstName", "lastName", "institution_name"])
+
+        container = get_container(RESPONDERS_CONTAINER)
 
         # Case-insensitive substring matching on multiple fields
-        sql = """
+        where = "\n            OR ".join(f"CONTAINS(c.{f}, @q, true)" for f in fields)
+        sql = f"""
         SELECT TOP 20
             c.id, c.vg_id, c.email,
             c.firstName, c.middleName, c.lastName,
             c.institution_name, c.institution_id
         FROM c
         WHERE
-            CONTAINS(c.vg_id, @q, true)
-            OR CONTAINS(c.email, @q, true)
-            OR CONTAINS(c.firstName, @q, true)
-            OR CONTAINS(c.middleName, @q, true)
-            OR CONTAINS(c.lastName, @q, true)
-            OR CONTAINS(c.institution_name, @q, true)
+            {where}
         """
         params = [{"name": "@q", "value": q}]
         items_iter = container.query_items(
@@ -43,31 +53,16 @@ def vegu_responders_search(req: func.HttpRequest) -> func.HttpResponse:
             parameters=params,
             enable_cross_partition_query=True
         )
-        items = list(items_iter)
+        items = query_guard.collect(plan, items_iter)
 
         # Normalize a tiny shape for FE list
-        out = []
-        for it in items:
-            out.append({
-                "id": it.get("id"),
-                "vg_id": it.get("vg_id") or it.get("id"),
-                "email": it.get("email"),
-                "firstName": it.get("firstName"),
-                "middleName": it.get("middleName"),
-                "lastName": it.get("lastName"),
-                "institution_name": it.get("institution_name"),
-                "institution_id": it.get("institution_id"),
-            })
+        out = RESPONDER_ROW.many(items)
 
-        return func.HttpResponse(
-            json.dumps({"success": True, "items": out}),
-            mimetype="application/json"
-        )
+        return json_response(query_guard.annotate({"success": True, "items": out}, plan), req=req)
     except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         # Keep the message generic for FE, but print detail to logs
         print("vegu_responders_search error:", repr(e))
-        return func.HttpResponse(
-            json.dumps({"success": False, "error": "server_error"}),
-            mimetype="application/json",
-            status_code=500
-        )
+        return json_response({"success": False, "error": "server_error"}, 500)
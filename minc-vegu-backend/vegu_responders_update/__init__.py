@@ -1,6 +1,5 @@
-# vegu_responders_update/__init__.py  v1.4
+# vegu_responders_update/__init__.py  v1.5
 
-import json
 import re
 import logging
 from datetime import datetime, timezone
@@ -8,20 +7,19 @@ from zoneinfo import ZoneInfo
 
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session, actor_of
 from shared.auth import http_auth_level
 from shared.normalizers import normalize_responder
+from shared.audit_log import record_event, changed_fields
 from shared.vegu_cosmos_client import (
     get_responder_by_vg_id,
     update_responder_fields,
 )
 _DT_PAT = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}))?)?$")
 
-def _resp(obj, status=200):
-    return func.HttpResponse(
-        json.dumps(obj),
-        status_code=status,
-        mimetype="application/json"
-    )
 
 # map any snake_case to the camelCase we actually store
 KEY_SYNONYMS = {
@@ -46,20 +44,24 @@ ALLOWED_FIELDS = {
     methods=[func.HttpMethod.POST, func.HttpMethod.PATCH],
     auth_level=http_auth_level()
 )
+@instrument_route("vegu-responders-update")
 def run(req: func.HttpRequest) -> func.HttpResponse:
+    session, denied = require_session(req)
+    if denied:
+        return denied
     try:
         body = req.get_json()
     except ValueError:
-        return _resp({"success": False, "error": "Invalid JSON."}, 400)
+        return json_response({"success": False, "error": "Invalid JSON."}, 400)
 
     vg_id = (body or {}).get("vg_id") or (body or {}).get("id")
     if not vg_id:
-        return _resp({"success": False, "error": "vg_id is required"}, 400)
+        return json_response({"success": False, "error": "vg_id is required"}, 400)
 
     client_etag = (body or {}).get("etag")
     patch_in = (body or {}).get("patch") or {}
     if not isinstance(patch_in, dict) or not patch_in:
-        return _resp({"success": False, "error": "patch object is required"}, 400)
+        return json_response({"success": False, "error": "patch object is required"}, 400)
 
     # Normalize keys first (snake_case -> camelCase), then filter
     normalized = {}
@@ -71,13 +73,13 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
     patch = {k: v for k, v in normalized.items() if k in ALLOWED_FIELDS}
 
     if not patch:
-        return _resp({"success": False, "error": "No allowed fields in patch."}, 400)
+        return json_response({"success": False, "error": "No allowed fields in patch."}, 400)
 
     # Cheap sanitation
     if "status" in patch and isinstance(patch["status"], str):
         patch["status"] = patch["status"].strip().lower()
         if patch["status"] not in {"active", "pending", "suspended", "locked", "expired"}:
-            return _resp({"success": False, "error": "Invalid status value."}, 400)
+            return json_response({"success": False, "error": "Invalid status value."}, 400)
 
     if "admin_notes" in patch and patch["admin_notes"] is None:
         # prevent nulling notes accidentally
@@ -86,7 +88,7 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
     # Load current (for ETag + existence)
     current = get_responder_by_vg_id(vg_id)
     if not current:
-        return _resp({"success": False, "error": "Responder not found"}, 404)
+        return json_response({"success": False, "error": "Responder not found"}, 404)
 
     # Normalize reset_locked_until input (string) to ISO Z using responder's TZ
     if "reset_locked_until" in patch:
@@ -100,7 +102,7 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
 
     server_etag = current.get("_etag")
     if client_etag and server_etag and client_etag != server_etag:
-        return _resp({
+        return json_response({
             "success": False,
             "error": "etag_mismatch",
             "message": "The record was modified by someone else. Refresh and retry.",
@@ -118,7 +120,7 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
         )
     except ValueError as ve:
         # e.g., responder not found in helper
-        return _resp({"success": False, "error": str(ve)}, 404)
+        return json_response({"success": False, "error": str(ve)}, 404)
     except PermissionError:
         # ETag mismatch at write time
         try:
@@ -126,21 +128,25 @@ def run(req: func.HttpRequest) -> func.HttpResponse:
             fresh_etag = fresh.get("_etag")
         except Exception:
             fresh_etag = None
-        return _resp({
+        return json_response({
             "success": False,
             "error": "etag_mismatch",
             "message": "The record was modified by someone else. Refresh and retry.",
             "etag": fresh_etag
         }, 409)
-    except Exception:
+    except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         logging.exception("vegu_responders_update failed")
-        return _resp({"success": False, "error": "server_error"}, 500)
+        return json_response({"success": False, "error": "server_error"}, 500)
 
-    etag = updated.get("_etag")
-    for f in ("_rid", "_self", "_attachments"):
-        updated.pop(f, None)
+    changes = changed_fields(current, patch)
+    if changes:
+        record_event(vg_id, "responder", "updated", "Responder updated via MinC.", changes,
+                     actor=actor_of(session))
 
-    return _resp(
+    return json_response(
     {
         "success": True,
         "responder": normalize_responder(updated),
@@ -1,10 +1,13 @@
-# minc-vegu-backend/vegu_reveal_user/__init__.py v1.7
+# minc-vegu-backend/vegu_reveal_user/__init__.py v1.8
 
-import json
 import logging
 import os
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route, read_all
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session
 from shared.vegu_cosmos_client import get_container
 
 bp = func.Blueprint()
@@ -14,21 +17,21 @@ bp = func.Blueprint()
     methods=["GET"],
     auth_level=func.AuthLevel.FUNCTION,
 )
-
+@instrument_route("vegu/reveal-user/{complaint_vg_id}")
 def vegu_reveal_user(req: func.HttpRequest) -> func.HttpResponse:
     """
     Map complaint_vg_id -> user_vg_id by looking in the vgcrypt container.
     Returns only the mapping; FE should fetch user details via Users module.
     """
+    _, denied = require_session(req)
+    if denied:
+        return denied
     complaint_vg_id = (
         req.route_params.get("complaint_vg_id")
         or (req.params.get("complaint_vg_id") or "").strip()
     )
     if not complaint_vg_id:
-        return func.HttpResponse(
-            json.dumps({"success": False, "error": "Missing complaint_vg_id"}),
-            status_code=400, mimetype="application/json",
-        )
+        return json_response({"success": False, "error": "Missing complaint_vg_id"}, 400)
 
     try:
         crypt_name = os.getenv("VEGU_CRYPT_CONTAINER", "vgcrypt")
@@ -36,30 +39,24 @@ def vegu_reveal_user(req: func.HttpRequest) -> func.HttpResponse:
 
         query = "SELECT TOP 1 c.user_vg_id FROM c WHERE c.complaint_vg_id=@cid"
         params = [{"name": "@cid", "value": complaint_vg_id}]
-        items = list(vgcrypt.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+        items = read_all(vgcrypt.query_items(query=query, parameters=params, enable_cross_partition_query=True))
 
         if not items:
-            return func.HttpResponse(
-                json.dumps({
-                    "success": False,
-                    "error": "No user mapping found for this complaint.",
-                    "complaint_vg_id": complaint_vg_id
-                }),
-                status_code=404, mimetype="application/json",
-            )
-
-        return func.HttpResponse(
-            json.dumps({
-                "success": True,
-                "complaint_vg_id": complaint_vg_id,
-                "user_vg_id": items[0].get("user_vg_id")
-            }),
-            status_code=200, mimetype="application/json",
-        )
+            return json_response({
+                "success": False,
+                "error": "No user mapping found for this complaint.",
+                "complaint_vg_id": complaint_vg_id
+            }, 404)
+
+        return json_response({
+            "success": True,
+            "complaint_vg_id": complaint_vg_id,
+            "user_vg_id": items[0].get("user_vg_id")
+        }, 200)
 
     except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
         logging.exception("vegu_reveal_user failed")
-        return func.HttpResponse(
-            json.dumps({"success": False, "error": str(e)}),
-            status_code=500, mimetype="application/json",
-        )
+        return json_response({"success": False, "error": str(e)}, 500)
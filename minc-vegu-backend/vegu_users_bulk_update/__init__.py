@@ -0,0 +1,53 @@
+# minc-vegu-backend/vegu_users_bulk_update/__init__.py 1.0
+# Route: POST /api/vegu-users-bulk-update
+# Body: {"vg_ids": [...], "patch": {"status": "under investigation"}}
+
+import logging
+import azure.functions as func
+from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session, actor_of
+from shared.bulk_updates import clean_vg_ids, bulk_update_users, summarize
+
+BULK_ALLOWED = {"status"}  # server sets updated_at
+STATUS_VALUES = {"active", "pending", "suspended", "under investigation", "expired"}
+
+
+@app.route(route="vegu-users-bulk-update", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_route("vegu-users-bulk-update")
+def vegu_users_bulk_update(req: func.HttpRequest) -> func.HttpResponse:
+    session, denied = require_session(req)
+    if denied:
+        return denied
+    try:
+        data = req.get_json()
+    except ValueError:
+        return json_response({"success": False, "error": "invalid_json"}, 400)
+
+    patch = (data or {}).get("patch") or {}
+    if not isinstance(patch, dict):
+        return json_response({"success": False, "error": "missing vg_ids or patch"}, 400)
+
+    vg_ids, err = clean_vg_ids((data or {}).get("vg_ids"))
+    if err:
+        return json_response({"success": False, "error": err}, 400)
+
+    clean = {k: v for k, v in patch.items() if k in BULK_ALLOWED}
+    if not clean:
+        return json_response({"success": False, "error": "no_changes"}, 400)
+    if not isinstance(clean["status"], str) or clean["status"] not in STATUS_VALUES:
+        return json_response({"success": False, "error": "invalid status"}, 400)
+
+    try:
+        results = bulk_update_users(vg_ids, clean, actor=actor_of(session))
+    except Exception as e:
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
+        logging.exception("vegu_users_bulk_update failed")
+        return json_response({"success": False, "error": "server_error"}, 500)
+
+    summary = summarize(results)
+    return json_response({"success": summary["failed"] == 0, "summary": summary, "results": results}, req=req)
@@ -1,29 +1,49 @@
-# minc-vegu-backend/vegu_users_get/__init__.py v1.5
+# minc-vegu-backend/vegu_users_get/__init__.py v1.6
 
-import json
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route, read_all
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session
 from shared.vegu_cosmos_client import get_user_container
+from shared.projection import parse_fields, select_clause
 from azure.cosmos.exceptions import CosmosResourceNotFoundError
 
-def _j(body: dict, status: int = 200):
-    return func.HttpResponse(
-        json.dumps(body, ensure_ascii=False),
-        status_code=status,
-        mimetype="application/json",
-    )
 
 @app.route(route="vegu-users/{vg_id}", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_route("vegu-users/{vg_id}")
 def vegu_users_get(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
     vg_id = (req.route_params.get("vg_id") or "").strip()
     if not vg_id:
-        return _j({"success": False, "error": "missing vg_id"}, 400)
+        return json_response({"success": False, "error": "missing vg_id"}, 400)
+
+    fields, err = parse_fields(req.params.get("fields"), "vegu_user")
+    if err:
+        return json_response({"success": False, "error": err}, 400)
 
     cont = get_user_container()
     try:
-        doc = cont.read_item(item=vg_id, partition_key=vg_id)
-        return _j({"success": True, "user": doc, "etag": doc.get("_etag", "")})
+        if fields:
+            # single-partition projected query (id = pk = vg_id)
+            rows = read_all(cont.query_items(
+                query=f"SELECT {select_clause('vegu_user', fields)} FROM c WHERE c.id = @id",
+                parameters=[{"name": "@id", "value": vg_id}],
+                partition_key=vg_id,
+            ))
+            if not rows:
+                return json_response({"success": False, "error": "not_found"}, 404)
+            doc = rows[0]
+        else:
+            doc = cont.read_item(item=vg_id, partition_key=vg_id)
+        return json_response({"success": True, "user": doc, "etag": doc.get("_etag", "")}, req=req)
     except CosmosResourceNotFoundError:
-        return _j({"success": False, "error": "not_found"}, 404)
+        return json_response({"success": False, "error": "not_found"}, 404)
     except Exception as e:
-        return _j({"success": False, "error": f"{type(e).__name__}: {e}"}, 500)
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
+        return json_response({"success": False, "error": f"{type(e).__name__}: {e}"}, 500)
@@ -1,38 +1,38 @@
-# minc-vegu-backend/vegu_users_search/__init__.py v1.5
+# minc-vegu-backend/vegu_users_search/__init__.py v1.7
 
-import re
-import json
 import azure.functions as func
 from function_app import app
+from shared.instrumentation import instrument_route
+from shared.http_response import json_response
+from shared.resilience import unavailable_response
+from shared.session_tokens import require_session
 from shared.vegu_cosmos_client import get_user_container
+from shared import query_guard
+
+SEARCH_FIELDS = ["first_name", "middle_name", "last_name", "email", "vg_id"]
 
-def _j(body: dict, status: int = 200):
-    return func.HttpResponse(
-        json.dumps(body, ensure_ascii=False),
-        status_code=status,
-        mimetype="application/json",
-    )
 
 @app.route(route="vegu-users-search", methods=["GET"], auth_level=func.AuthLevel.FUNCTION)
+@instrument_route("vegu-users-search")
 def vegu_users_search(req: func.HttpRequest) -> func.HttpResponse:
+    _, denied = require_session(req)
+    if denied:
+        return denied
     q = (req.params.get("q") or "").strip()
     if not q:
-        return _j({"success": True, "items": []})
+        return json_response({"success": True, "items": []})
 
-    # split to tokens and lowercase
-    tokens = [t.lower() for t in re.split(r"[^A-Za-z0-9@._+-]+", q) if t]
+    # split to tokens and lowercase; the guard drops/caps tokens and narrows fields when costly
+    plan = query_guard.plan("vegu-users-search", q, {"user-profiles": len(SEARCH_FIELDS)})
+    tokens = plan["tokens"]
     if not tokens:
-        return _j({"success": True, "items": []})
+        return json_response(query_guard.annotate({"success": True, "items": []}, plan))
 
     # AND of ORs across fields (first/middle/last/email/vg_id)
     def ors(i: int) -> str:
-        return (
-            f"CONTAINS(LOWER(c.first_name), @t{i}) "
-            f"OR CONTAINS(LOWER(c.middle_name), @t{i}) "
-            f"OR CONTAINS(LOWER(c.last_name), @t{i}) "
-            f"OR CONTAINS(LOWER(c.email), @t{i}) "
-            f"OR CONTAINS(LOWER(c.vg_id), @t{i})"
-        )
+        fields = query_guard.fields_for(plan, tokens[i], SEARCH_FIELDS, ["vg_id"], ["email"],
+                                        ["first_name", "last_name", "email"])
+        return " OR ".join(f"CONTAINS(LOWER(c.{f}), @t{i})" for f in fields)
 
     where = " AND ".join([f"({ors(i)})" for i in range(len(tokens))])
 
@@ -47,7 +47,10 @@ def vegu_users_search(req: func.HttpRequest) -> func.HttpResponse:
 
     try:
         container = get_user_container()
-        items = list(container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
-        return _j({"success": True, "items": items})
+        items = query_guard.collect(plan, container.query_items(query=query, parameters=params, enable_cross_partition_query=True))
+        return json_response(query_guard.annotate({"success": True, "items": items}, plan), req=req)
     except Exception as e:
-        return _j({"success": False, "error": f"{type(e).__name__}: {e}"}, 500)
+        busy = unavailable_response(e)
+        if busy is not None:
+            return busy
+        return json_response({"success": False, "error": f"{type(e).__name__}: {e}"}, 500)
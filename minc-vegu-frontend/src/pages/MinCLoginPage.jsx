@@ -142,6 +142,7 @@ export default function MinCLoginPage() {
         roles: Array.isArray(data.roles) ? data.roles : [],
         failedAttempts: data.failedLoginCount ?? 0,
         lockoutUntil: data.lockoutUntil ?? null,
+        flowId: data.flowId ?? null,
       });
 
       if (rememberMe) {
@@ -181,7 +182,7 @@ const handleSubmitPassword = async (e) => {
     const res = await fetch(passUrl, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ identifier: idForCheck, password }),
+      body: JSON.stringify({ identifier: idForCheck, password, flowId: user?.flowId }),
     });
 
     // handle known statuses
@@ -238,7 +239,7 @@ const handleSubmitPassword = async (e) => {
     const otpRes = await fetch(sendUrl, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ email: emailToUse, context: "minc_login" }),
+      body: JSON.stringify({ email: emailToUse, context: "minc_login", flowId: user?.flowId }),
     });
 
     const { json: otpJson, text: otpRaw } = await safeJson(otpRes);
@@ -273,7 +274,7 @@ const handleSubmitPassword = async (e) => {
       const res = await fetch(url, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ email: user?.email, otp, context: "minc_login" }),
+        body: JSON.stringify({ email: user?.email, otp, context: "minc_login", flowId: user?.flowId }),
       });
 
       if (!res.ok) {
@@ -304,7 +305,7 @@ const handleSubmitPassword = async (e) => {
       const res = await fetch(url, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ email: user?.email, context: "minc_login" }),
+        body: JSON.stringify({ email: user?.email, context: "minc_login", flowId: user?.flowId }),
       });
       const j = await res.json();
       if (!res.ok || !j.success) {